@@ -1,15 +1,27 @@
+import sys
+import hmac
+import time
+import importlib
 import streamlit as st
 import logging
 
 # Configurar o logger
-from log_config.logging_config import logger  # Importa o logger centralizado
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
 
-# Importar páginas
-from frontend.planilhao_page import Pagina_planilhao
-from frontend.estrategia_page import Pagina_estrategia
-from frontend.grafico_page import Pagina_grafico
-from frontend.Pagina_inicio import Pagina_inicio
-from frontend.documentacao_page import Pagina_documentacao
+from backend.config import ADMIN_TOKEN
+
+logger = obter_logger("app")  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Páginas carregadas sob demanda: (módulo, função). As páginas de dados trazem pandas e o backend
+# inteiro; só são importadas na primeira vez em que alguém as abre, e ficam carregadas no processo.
+PAGINAS = {
+    "INÍCIO": ("frontend.Pagina_inicio", "Pagina_inicio"),
+    "PLANILHÃO": ("frontend.planilhao_page", "Pagina_planilhao"),
+    "ESTRATÉGIA": ("frontend.estrategia_page", "Pagina_estrategia"),
+    "GRÁFICO": ("frontend.grafico_page", "Pagina_grafico"),
+    "DOCUMENTAÇÃO": ("frontend.documentacao_page", "Pagina_documentacao"),
+    "DIAGNÓSTICO": ("frontend.diagnostico_page", "Pagina_diagnostico"),
+}
 
 # Configurar o estado inicial
 if "pagina_atual" not in st.session_state:
@@ -88,17 +100,36 @@ with st.container():
             logger.info("Botão 'Documentação' clicado.")
             st.session_state.pagina_atual = "DOCUMENTAÇÃO"
 
+def carregar_pagina(nome):
+    """
+    Importa, na primeira vez em que é pedida, a função que desenha uma página.
+
+    Args:
+        nome (str): Chave da página em PAGINAS.
+
+    Returns:
+        callable: Função da página.
+    """
+    modulo, funcao = PAGINAS[nome]
+    if modulo in sys.modules:
+        return getattr(sys.modules[modulo], funcao)
+    inicio = time.perf_counter()
+    with st.spinner("Carregando página..."):
+        pagina = getattr(importlib.import_module(modulo), funcao)
+    logger.info("Página %s carregada sob demanda em %.0f ms.", nome, (time.perf_counter() - inicio) * 1000)
+    return pagina
+
 def renderizar_pagina():
     """
     Renderiza a página atual com base no estado da sessão.
     """
-    logger.debug(f"Renderizando a página: {st.session_state.pagina_atual}")
+    logger.debug("Renderizando a página: %s", st.session_state.pagina_atual)
     if st.session_state.pagina_atual == "INÍCIO":
-        Pagina_inicio()
+        carregar_pagina("INÍCIO")()
     elif st.session_state.pagina_atual == "PLANILHÃO":
-        Pagina_planilhao()
+        carregar_pagina("PLANILHÃO")()
     elif st.session_state.pagina_atual == "ESTRATÉGIA":
-        Pagina_estrategia()
+        carregar_pagina("ESTRATÉGIA")()
         if "acoes_carteira" in st.session_state and st.session_state.acoes_carteira is not None:
             st.session_state.estrategia_preenchida = True
             logger.info("Estratégia preenchida com sucesso.")
@@ -109,12 +140,41 @@ def renderizar_pagina():
                 st.error("Você precisa preencher a Estratégia antes de acessar os Gráficos.")
         else:
             logger.info("Acessando a página de Gráfico.")
-            Pagina_grafico(restrict_access=False)
+            carregar_pagina("GRÁFICO")(restrict_access=False)
     elif st.session_state.pagina_atual == "DOCUMENTAÇÃO":
-        Pagina_documentacao()
+        carregar_pagina("DOCUMENTAÇÃO")()
+    elif st.session_state.pagina_atual == "DIAGNÓSTICO" and admin_liberado():
+        carregar_pagina("DIAGNÓSTICO")()
     else:
-        logger.error(f"Página desconhecida: {st.session_state.pagina_atual}")
+        logger.error("Página desconhecida: %s", st.session_state.pagina_atual)
         st.error("Página não encontrada.")
 
+def admin_liberado():
+    """
+    Indica se a sessão foi aberta com ?admin=<ADMIN_TOKEN> na URL.
+    """
+    admin = st.query_params.get("admin", "")
+    # Compara bytes: com str, compare_digest rejeita (TypeError) qualquer caractere não ASCII na URL.
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(admin.encode(), ADMIN_TOKEN.encode())
+
+def painel_admin():
+    """
+    Exibe na barra lateral as ações de administração, liberadas apenas com ?admin=<ADMIN_TOKEN> na URL.
+    """
+    if not admin_liberado():
+        return
+    from backend.cache_memoria import cache_memoria  # Sob demanda: traz pandas e numpy.
+    with st.sidebar:
+        st.markdown("### 🔧 Administração")
+        if st.button("📈 Diagnóstico"):
+            logger.info("Botão 'Diagnóstico' clicado.")
+            st.session_state.pagina_atual = "DIAGNÓSTICO"
+        st.json(cache_memoria.estatisticas())
+        if st.button("Limpar cache"):
+            removidas = cache_memoria.invalidar()
+            logger.warning("Cache em memória invalidado pelo painel de administração | Entradas removidas: %s", removidas)
+            st.success(f"✅ Cache limpo: {removidas} entradas removidas.")
+
 # Renderizar a página
+painel_admin()
 renderizar_pagina()
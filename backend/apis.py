@@ -1,19 +1,275 @@
 import os
+import json
+import threading
 import requests
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
 from dotenv import load_dotenv
-from log_config.logging_config import logger  # Importa o logger centralizado
+from backend.controle_fluxo import ChamadaUnica, BaldeFichas
+from backend.gravacao import MODOS, AdaptadorGravacao
+from backend.cache_http import CacheValidadores
+from backend.leitor_json import ler_tabela_json
+from backend.metricas import metricas, instrumentar, BALDES_BYTES
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+from backend.config import (
+    API_BASE_URL,
+    API_MODO,
+    API_GRAVACOES_DIR,
+    API_POOL_SIZE,
+    API_MAX_TENTATIVAS,
+    API_BACKOFF,
+    API_BACKOFF_JITTER,
+    API_MAX_CONCORRENCIA,
+    API_TAXA_MAXIMA,
+    API_RAJADA,
+    API_TIMEOUT_CONEXAO,
+    API_TIMEOUT_LEITURA,
+    API_CACHE_HTTP,
+)
 
-# Carregar o token do arquivo .env
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Tamanho dos blocos lidos das respostas consumidas em streaming
+TAMANHO_BLOCO = 64 * 1024
+
+# Carregar o token do arquivo .env; ele só é exigido na primeira requisição à rede.
 load_dotenv()
 token = os.getenv('TOKEN')
 
-if not token:
-    logger.error("TOKEN não encontrado no arquivo .env.")
-    raise ValueError("TOKEN não encontrado no arquivo .env.")
 
-headers = {'Authorization': f'JWT {token}'}
-logger.info("Token carregado com sucesso.")
+@instrumentar
+def cabecalhos_autorizacao():
+    """
+    Monta o cabeçalho de autenticação da API a partir do TOKEN.
+
+    Returns:
+        dict: Cabeçalho {'Authorization': 'JWT <token>'}.
+
+    Raises:
+        ValueError: Se o TOKEN não estiver definido no .env.
+    """
+    if not token:
+        logger.error("TOKEN não encontrado no arquivo .env.")
+        raise ValueError("TOKEN não encontrado no arquivo .env.")
+    return {'Authorization': f'JWT {token}'}
+
+
+class ClienteAPI:
+    """
+    Cliente HTTP compartilhado pelos endpoints da API do Laboratório de Finanças.
+
+    Mantém uma única sessão com pool de conexões keep-alive, timeouts de conexão e leitura
+    por endpoint, novas tentativas limitadas com espera exponencial e aleatória (jitter)
+    em respostas 429/5xx, e negociação de compressão (gzip e deflate; br e zstd se disponíveis).
+
+    Respostas com validadores (ETag/Last-Modified) ficam em uma cópia local; as consultas seguintes
+    são condicionais e, quando a API responde 304, o corpo vem da cópia sem trafegar de novo.
+
+    Requisições simultâneas iguais (mesmo endpoint e parâmetros) são agrupadas em uma única ida à
+    API, e o tráfego do processo é limitado em concorrência e em taxa (balde de fichas).
+
+    No modo 'gravar' as respostas também são gravadas em disco; no modo 'reproduzir' elas vêm
+    apenas das gravações, sem rede e sem TOKEN.
+
+    Args:
+        base_url (str): URL base da API.
+        headers (dict, opcional): Cabeçalhos enviados em todas as requisições. Padrão: o cabeçalho
+            de autenticação do TOKEN, montado na primeira requisição à rede.
+        modo (str): 'rede', 'gravar' ou 'reproduzir'.
+        pasta_gravacoes (str): Pasta das gravações usada nos modos 'gravar' e 'reproduzir'.
+        pool_size (int): Número máximo de conexões mantidas no pool.
+        max_tentativas (int): Número máximo de novas tentativas por requisição.
+        backoff (float): Fator da espera exponencial entre tentativas, em segundos.
+        backoff_jitter (float): Aleatoriedade máxima somada a cada espera, em segundos.
+        max_concorrencia (int): Máximo de requisições simultâneas à API.
+        taxa_maxima (float): Máximo de requisições por segundo (0 = sem limite).
+        rajada (int): Requisições permitidas em rajada acima da taxa.
+        timeout_conexao (float): Timeout de conexão, em segundos.
+        timeouts_leitura (dict): Timeout de leitura, em segundos, por endpoint.
+        cache_http (bool): Guarda as respostas com ETag/Last-Modified e revalida com requisições
+            condicionais (apenas no modo 'rede').
+    """
+
+    # Códigos de status que justificam uma nova tentativa.
+    STATUS_REPETIR = (429, 500, 502, 503, 504)
+
+    def __init__(self, base_url=API_BASE_URL, headers=None, modo=API_MODO, pasta_gravacoes=API_GRAVACOES_DIR,
+                 pool_size=API_POOL_SIZE, max_tentativas=API_MAX_TENTATIVAS, backoff=API_BACKOFF,
+                 backoff_jitter=API_BACKOFF_JITTER, max_concorrencia=API_MAX_CONCORRENCIA,
+                 taxa_maxima=API_TAXA_MAXIMA, rajada=API_RAJADA, timeout_conexao=API_TIMEOUT_CONEXAO,
+                 timeouts_leitura=None, cache_http=API_CACHE_HTTP):
+        if modo not in MODOS:
+            raise ValueError(f"Modo da API inválido: {modo}. Use {list(MODOS)}.")
+        self.base_url = base_url.rstrip('/')
+        # Com cabeçalhos explícitos ou no modo 'reproduzir' o TOKEN não é necessário.
+        self.autenticado = headers is not None or modo == 'reproduzir'
+        self.timeout_conexao = timeout_conexao
+        self.timeouts_leitura = dict(timeouts_leitura or API_TIMEOUT_LEITURA)
+        self.chamada_unica = ChamadaUnica()
+        self.semaforo = threading.BoundedSemaphore(max(1, max_concorrencia))
+        self.balde = BaldeFichas(taxa_maxima, rajada)
+        # Cópias locais para requisições condicionais; nos modos de gravação as respostas vêm (ou vão) para o disco.
+        self.cache_http = CacheValidadores() if cache_http and modo == 'rede' else None
+
+        retry = Retry(
+            total=max_tentativas,
+            backoff_factor=backoff,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=self.STATUS_REPETIR,
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False,  # Após esgotar as tentativas, devolve a última resposta.
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        if modo != 'rede':
+            adapter = AdaptadorGravacao(modo, pasta_gravacoes, adapter if modo == 'gravar' else None)
+            logger.info("Cliente da API no modo '%s' | Gravações em: %s", modo, pasta_gravacoes)
+
+        self.sessao = requests.Session()
+        self.sessao.mount('https://', adapter)
+        self.sessao.mount('http://', adapter)
+        # gzip e deflate sempre; br e zstd quando o urllib3 encontra os pacotes brotli/zstandard.
+        self.sessao.headers.update({'Accept-Encoding': ACCEPT_ENCODING})
+        self.sessao.headers.update(headers or {})
+
+    def get(self, endpoint, params):
+        """
+        Faz uma requisição GET a um endpoint da API usando a sessão compartilhada.
+
+        Se uma requisição igual já estiver em andamento, espera por ela e devolve a mesma resposta.
+
+        Args:
+            endpoint (str): Nome do endpoint, por exemplo 'planilhao'.
+            params (dict): Parâmetros da query string.
+
+        Returns:
+            requests.Response: Resposta da API.
+
+        Raises:
+            requests.RequestException: Em falhas de rede ou timeout após esgotar as tentativas.
+            ValueError: Se o TOKEN não estiver definido e a requisição precisar da rede.
+        """
+        if not self.autenticado:
+            self.sessao.headers.update(cabecalhos_autorizacao())
+            self.autenticado = True
+        chave = (endpoint, tuple(sorted((str(k), str(v)) for k, v in params.items())))
+        return self.chamada_unica.executar(chave, lambda: self._enviar(endpoint, params))
+
+    def consumir(self, endpoint, params, consumidor, chave=None):
+        """
+        Faz uma requisição GET em streaming e entrega o corpo, em blocos, a `consumidor`.
+
+        O corpo não é carregado inteiro em memória: `consumidor` recebe um iterável de blocos de bytes
+        (já descomprimidos) e devolve o resultado processado. Requisições iguais simultâneas são
+        agrupadas; cada uma recebe a sua cópia do resultado (DataFrames são copiados), que pode ser
+        alterada sem afetar as demais.
 
+        Args:
+            endpoint (str): Nome do endpoint, por exemplo 'planilhao'.
+            params (dict): Parâmetros da query string.
+            consumidor (Callable): Função que recebe os blocos do corpo de uma resposta 200.
+            chave (hashable, opcional): Identifica o processamento feito por `consumidor` (por exemplo as
+                colunas lidas), para que só chamadas com o mesmo processamento sejam agrupadas.
+
+        Returns:
+            Tuple[requests.Response, object]: Resposta (com o corpo já lido, exceto quando o status é 200)
+                e o resultado de `consumidor`, ou None se o status não for 200.
+
+        Raises:
+            requests.RequestException: Em falhas de rede ou timeout após esgotar as tentativas.
+            ValueError: Se o TOKEN não estiver definido e a requisição precisar da rede.
+        """
+        if not self.autenticado:
+            self.sessao.headers.update(cabecalhos_autorizacao())
+            self.autenticado = True
+        chave = (endpoint, tuple(sorted((str(k), str(v)) for k, v in params.items())), 'consumir', chave)
+        return self.chamada_unica.executar(chave, lambda: self._enviar(endpoint, params, consumidor), _copiar_resultado)
+
+    def _enviar(self, endpoint, params, consumidor=None, condicional=True):
+        """
+        Envia a requisição respeitando o limite de concorrência e a taxa máxima.
+
+        Com uma cópia local da consulta, a requisição é condicional: um 304 é atendido pela cópia e
+        devolvido como 200. Respostas 200 com validadores atualizam a cópia. Se a cópia for removida
+        (pelo limite de tamanho do cache) antes de ser lida, a requisição é refeita sem condicionais.
+
+        Com `consumidor`, a resposta é lida em streaming e processada ainda dentro do limite de
+        concorrência; o tempo medido inclui o processamento, que acontece junto com o download.
+        """
+        timeout = (self.timeout_conexao, self.timeouts_leitura.get(endpoint, max(self.timeouts_leitura.values())))
+        copia = self.cache_http.ler(endpoint, params) if self.cache_http and condicional else None
+        condicionais = CacheValidadores.cabecalhos_condicionais(copia) if copia else None
+        resultado, tamanho, copia_removida = None, 0, False
+        with metricas.cronometrar("api_requisicao_segundos", endpoint=endpoint), self.semaforo:
+            espera = self.balde.adquirir()
+            if espera:
+                logger.info("Requisição a %s aguardou %.2fs pelo limite de taxa da API.", endpoint, espera)
+            resposta = self.sessao.get(f'{self.base_url}/{endpoint}', params=params, timeout=timeout,
+                                       headers=condicionais, stream=consumidor is not None)
+            status = resposta.status_code
+            if status == 304 and copia is not None:
+                resposta.close()
+                try:
+                    if consumidor is not None:
+                        resultado = consumidor(self.cache_http.blocos(copia))
+                    resposta = self.cache_http.resposta(copia, resposta, com_corpo=consumidor is None)
+                except FileNotFoundError:
+                    copia_removida = True
+            elif consumidor is not None and status == 200:
+                gravador = self.cache_http.gravador(endpoint, params, resposta.headers) if self.cache_http else None
+
+                def blocos():
+                    nonlocal tamanho
+                    for bloco in resposta.iter_content(TAMANHO_BLOCO):
+                        tamanho += len(bloco)
+                        if gravador is not None:
+                            gravador.escrever(bloco)
+                        yield bloco
+                try:
+                    corpo = blocos()
+                    resultado = consumidor(corpo)
+                    for _ in corpo:
+                        pass  # Lê o que o consumidor deixou, para a cópia local ficar completa.
+                    if gravador is not None:
+                        gravador.concluir()
+                except BaseException:
+                    if gravador is not None:
+                        gravador.descartar()
+                    raise
+                finally:
+                    resposta.close()
+            else:
+                tamanho = len(resposta.content)
+                if status == 200 and self.cache_http:
+                    self.cache_http.salvar(endpoint, params, resposta.headers, resposta.content)
+        metricas.incrementar("api_respostas_total", endpoint=endpoint, status=status)
+        if copia_removida:
+            # Refeita fora do semáforo, que não é reentrante.
+            logger.warning("Cópia local de %s removida antes de atender o 304; refazendo a requisição sem condicionais.", endpoint)
+            return self._enviar(endpoint, params, consumidor, condicional=False)
+        if status == 304 and copia is not None:
+            metricas.incrementar("api_bytes_economizados_total", copia['tamanho'], endpoint=endpoint, motivo="nao_modificado")
+            logger.info("Resposta de %s não modificada (304); corpo servido da cópia local | %s bytes", endpoint, copia['tamanho'])
+        else:
+            metricas.observar("api_resposta_bytes", tamanho, baldes=BALDES_BYTES, endpoint=endpoint)
+            transferidos = resposta.raw.tell() if hasattr(resposta.raw, 'tell') else tamanho
+            if 0 < transferidos < tamanho:
+                metricas.incrementar("api_bytes_economizados_total", tamanho - transferidos, endpoint=endpoint, motivo="compressao")
+        return resposta if consumidor is None else (resposta, resultado)
+
+
+def _copiar_resultado(par):
+    """Copia o resultado de `consumir` para uma chamada agrupada: a resposta é compartilhada, o DataFrame não."""
+    resposta, resultado = par
+    return resposta, resultado.copy() if isinstance(resultado, pd.DataFrame) else resultado
+
+
+# Cliente compartilhado por todas as funções deste módulo
+cliente = ClienteAPI()
+
+@instrumentar
 def pegar_planilhao(data_base):
     """
     Consulta o endpoint do planilhão para obter dados com base em uma data específica.
@@ -24,22 +280,56 @@ def pegar_planilhao(data_base):
     Returns:
         dict or None: Dados retornados pela API em formato JSON, ou None em caso de erro.
     """
-    logger.info(f"Iniciando consulta ao planilhão para a data base: {data_base}")
+    logger.info("Iniciando consulta ao planilhão para a data base: %s", data_base)
     params = {'data_base': data_base}
     try:
-        r = requests.get('https://laboratoriodefinancas.com/api/v1/planilhao', params=params, headers=headers)
+        r = cliente.get('planilhao', params)
         if r.status_code == 200:
-            dados = r.json()
-            logger.info(f"Consulta ao planilhão bem-sucedida para a data base: {data_base}")
+            with metricas.cronometrar("api_json_segundos", endpoint='planilhao'):
+                dados = r.json()
+            logger.info("Consulta ao planilhão bem-sucedida para a data base: %s", data_base)
             return dados
         else:
-            logger.warning(f"Erro ao consultar o planilhão: {data_base} | Status Code: {r.status_code} | Response: {r.text}")
+            logger.warning("Erro ao consultar o planilhão: %s | Status Code: %s | Response: %s", data_base, r.status_code, r.text)
             return None
     except requests.RequestException as e:
-        logger.error(f"Erro técnico ao consultar o planilhão: {data_base} | {e}")
+        logger.error("Erro técnico ao consultar o planilhão: %s | %s", data_base, e)
+        return None
+
+
+@instrumentar
+def pegar_planilhao_colunas(data_base, colunas=None):
+    """
+    Consulta o planilhão de uma data base lendo a resposta em streaming, direto para um DataFrame.
+
+    Os registros de 'dados' são decodificados à medida que chegam e apenas as colunas pedidas são
+    mantidas, já em arrays tipados; o JSON completo nunca fica em memória.
+
+    Args:
+        data_base (str): Data base para a consulta ao planilhão no formato 'YYYY-MM-DD'.
+        colunas (list, opcional): Colunas mantidas. Padrão: todas.
+
+    Returns:
+        pd.DataFrame or None: Registros do planilhão, ou None em caso de erro.
+    """
+    logger.info("Iniciando consulta ao planilhão (streaming) para a data base: %s", data_base)
+    params = {'data_base': data_base}
+    chave = None if colunas is None else tuple(colunas)
+    try:
+        r, df = cliente.consumir('planilhao', params, lambda blocos: ler_tabela_json(blocos, 'dados', colunas), chave)
+        if r.status_code == 200:
+            logger.info("Consulta ao planilhão bem-sucedida para a data base: %s | Linhas: %s, colunas: %s",
+                        data_base, len(df), len(df.columns))
+            return df
+        else:
+            logger.warning("Erro ao consultar o planilhão: %s | Status Code: %s | Response: %s", data_base, r.status_code, r.text)
+            return None
+    except (requests.RequestException, json.JSONDecodeError, UnicodeDecodeError) as e:
+        logger.error("Erro técnico ao consultar o planilhão: %s | %s", data_base, e)
         return None
 
 
+@instrumentar
 def get_preco_corrigido(ticker, data_ini, data_fim):
     """
     Consulta o endpoint para obter os preços corrigidos de uma ação em um período especificado.
@@ -52,22 +342,24 @@ def get_preco_corrigido(ticker, data_ini, data_fim):
     Returns:
         dict or None: Dados retornados pela API em formato JSON, ou None em caso de erro.
     """
-    logger.info(f"Iniciando consulta de preço corrigido para {ticker} de {data_ini} a {data_fim}.")
+    logger.info("Iniciando consulta de preço corrigido para %s de %s a %s.", ticker, data_ini, data_fim)
     params = {'ticker': ticker, 'data_ini': data_ini, 'data_fim': data_fim}
     try:
-        r = requests.get('https://laboratoriodefinancas.com/api/v1/preco-corrigido', params=params, headers=headers)
+        r = cliente.get('preco-corrigido', params)
         if r.status_code == 200:
-            preco_corrigido = r.json()
-            logger.info(f"Consulta de preço corrigido bem-sucedida para {ticker}.")
+            with metricas.cronometrar("api_json_segundos", endpoint='preco-corrigido'):
+                preco_corrigido = r.json()
+            logger.info("Consulta de preço corrigido bem-sucedida para %s.", ticker)
             return preco_corrigido
         else:
-            logger.warning(f"Falha na consulta de preço corrigido para {ticker} | Status Code: {r.status_code} | Response: {r.text}")
+            logger.warning("Falha na consulta de preço corrigido para %s | Status Code: %s | Response: %s", ticker, r.status_code, r.text)
             return None
     except requests.RequestException as e:
-        logger.error(f"Erro técnico ao consultar preço corrigido para {ticker}: {e}")
+        logger.error("Erro técnico ao consultar preço corrigido para %s: %s", ticker, e)
         return None
 
 
+@instrumentar
 def get_preco_diversos(data_ini, data_fim, ticker):
     """
     Consulta o endpoint para obter os preços diversos de uma ação em um período especificado.
@@ -80,17 +372,18 @@ def get_preco_diversos(data_ini, data_fim, ticker):
     Returns:
         dict or None: Dados retornados pela API em formato JSON, ou None em caso de erro.
     """
-    logger.info(f"Iniciando consulta de preços diversos para {ticker} de {data_ini} a {data_fim}.")
+    logger.info("Iniciando consulta de preços diversos para %s de %s a %s.", ticker, data_ini, data_fim)
     params_ibov = {'ticker': ticker, 'data_ini': data_ini, 'data_fim': data_fim}
     try:
-        r = requests.get('https://laboratoriodefinancas.com/api/v1/preco-diversos', params=params_ibov, headers=headers)
+        r = cliente.get('preco-diversos', params_ibov)
         if r.status_code == 200:
-            response_ibov = r.json()
-            logger.info(f"Consulta de preços diversos bem-sucedida para {ticker}.")
+            with metricas.cronometrar("api_json_segundos", endpoint='preco-diversos'):
+                response_ibov = r.json()
+            logger.info("Consulta de preços diversos bem-sucedida para %s.", ticker)
             return response_ibov
         else:
-            logger.warning(f"Falha na consulta de preços diversos para {ticker} | Status Code: {r.status_code} | Response: {r.text}")
+            logger.warning("Falha na consulta de preços diversos para %s | Status Code: %s | Response: %s", ticker, r.status_code, r.text)
             return None
     except requests.RequestException as e:
-        logger.error(f"Erro técnico ao consultar preços diversos para {ticker}: {e}")
+        logger.error("Erro técnico ao consultar preços diversos para %s: %s", ticker, e)
         return None
@@ -0,0 +1,287 @@
+import json
+import random
+import asyncio
+import aiohttp
+from backend import apis
+from backend.apis import cabecalhos_autorizacao, ClienteAPI
+from backend.config import (
+    API_BASE_URL,
+    API_MODO,
+    API_GRAVACOES_DIR,
+    API_POOL_SIZE,
+    API_MAX_TENTATIVAS,
+    API_BACKOFF,
+    API_BACKOFF_JITTER,
+    API_MAX_CONCORRENCIA,
+    API_TIMEOUT_CONEXAO,
+    API_TIMEOUT_LEITURA,
+)
+from backend.gravacao import MODOS, CABECALHOS_GRAVADOS, ler_gravacao, salvar_gravacao
+from backend.metricas import metricas, instrumentar, BALDES_BYTES
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+
+class ClienteAPIAsync:
+    """
+    Versão assíncrona de `backend.apis.ClienteAPI`, baseada em aiohttp.
+
+    Todas as requisições de um loop de eventos compartilham uma sessão com pool de conexões, de modo
+    que centenas de consultas podem ser multiplexadas em uma única thread. Mantém o comportamento do
+    cliente síncrono: timeouts por endpoint, novas tentativas com espera exponencial e jitter em
+    respostas 429/5xx, agrupamento de requisições iguais em andamento, limite de concorrência, limite
+    de taxa (o balde de fichas é, por padrão, o mesmo do cliente síncrono) e os modos de gravação.
+
+    A sessão é criada no primeiro uso dentro de um loop de eventos e recriada se o cliente for usado
+    em outro loop (por exemplo, em chamadas sucessivas de `asyncio.run`). Use `async with` ou
+    `await fechar()` para encerrá-la.
+
+    Args:
+        base_url (str): URL base da API.
+        headers (dict, opcional): Cabeçalhos enviados em todas as requisições. Padrão: o cabeçalho
+            de autenticação do TOKEN, montado na primeira requisição à rede.
+        modo (str): 'rede', 'gravar' ou 'reproduzir'.
+        pasta_gravacoes (str): Pasta das gravações usada nos modos 'gravar' e 'reproduzir'.
+        pool_size (int): Número máximo de conexões abertas.
+        max_tentativas (int): Número máximo de novas tentativas por requisição.
+        backoff (float): Fator da espera exponencial entre tentativas, em segundos.
+        backoff_jitter (float): Aleatoriedade máxima somada a cada espera, em segundos.
+        max_concorrencia (int): Máximo de requisições simultâneas à API.
+        balde (BaldeFichas, opcional): Limitador de taxa. Padrão: o do cliente síncrono do módulo `apis`.
+        timeout_conexao (float): Timeout de conexão, em segundos.
+        timeouts_leitura (dict): Timeout de leitura, em segundos, por endpoint.
+    """
+
+    STATUS_REPETIR = ClienteAPI.STATUS_REPETIR
+
+    def __init__(self, base_url=API_BASE_URL, headers=None, modo=API_MODO, pasta_gravacoes=API_GRAVACOES_DIR,
+                 pool_size=API_POOL_SIZE, max_tentativas=API_MAX_TENTATIVAS, backoff=API_BACKOFF,
+                 backoff_jitter=API_BACKOFF_JITTER, max_concorrencia=API_MAX_CONCORRENCIA, balde=None,
+                 timeout_conexao=API_TIMEOUT_CONEXAO, timeouts_leitura=None):
+        if modo not in MODOS:
+            raise ValueError(f"Modo da API inválido: {modo}. Use {list(MODOS)}.")
+        self.base_url = base_url.rstrip('/')
+        self.headers = dict(headers) if headers is not None else None
+        self.modo = modo
+        self.pasta_gravacoes = pasta_gravacoes
+        self.pool_size = pool_size
+        self.max_tentativas = max_tentativas
+        self.backoff = backoff
+        self.backoff_jitter = backoff_jitter
+        self.max_concorrencia = max(1, max_concorrencia)
+        self.balde = balde or apis.cliente.balde
+        self.timeout_conexao = timeout_conexao
+        self.timeouts_leitura = dict(timeouts_leitura or API_TIMEOUT_LEITURA)
+        self._sessao = None
+        self._loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excecao):
+        await self.fechar()
+
+    async def fechar(self):
+        """Fecha a sessão e as conexões abertas."""
+        if self._sessao is not None and not self._sessao.closed:
+            await self._sessao.close()
+        self._sessao = None
+
+    def _preparar_loop(self):
+        """Cria a sessão, o semáforo e o registro de requisições em andamento do loop atual."""
+        loop = asyncio.get_running_loop()
+        if self._sessao is None or self._sessao.closed or self._loop is not loop:
+            if self.headers is None and self.modo != 'reproduzir':
+                self.headers = cabecalhos_autorizacao()
+            conector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._sessao = aiohttp.ClientSession(connector=conector, headers=self.headers or {})
+            self._loop = loop
+            self._semaforo = asyncio.Semaphore(self.max_concorrencia)
+            self._em_andamento = {}
+
+    async def get(self, endpoint, params):
+        """
+        Faz uma requisição GET a um endpoint da API.
+
+        Se uma requisição igual já estiver em andamento no mesmo loop, espera por ela e devolve a mesma resposta.
+
+        Args:
+            endpoint (str): Nome do endpoint, por exemplo 'planilhao'.
+            params (dict): Parâmetros da query string.
+
+        Returns:
+            Tuple[int, str]: Código de status e corpo da resposta.
+
+        Raises:
+            aiohttp.ClientError: Em falhas de rede após esgotar as tentativas.
+            asyncio.TimeoutError: Em timeout após esgotar as tentativas.
+            ValueError: Se o TOKEN não estiver definido e a requisição precisar da rede.
+        """
+        params = {str(k): str(v) for k, v in params.items()}
+        if self.modo == 'reproduzir':
+            return self._reproduzir(endpoint, params)
+
+        self._preparar_loop()
+        chave = (endpoint, tuple(sorted(params.items())))
+        futuro = self._em_andamento.get(chave)
+        if futuro is not None:
+            logger.info("Chamada agrupada com outra em andamento: %s", chave)
+            return await asyncio.shield(futuro)
+
+        futuro = self._em_andamento[chave] = asyncio.get_running_loop().create_future()
+        try:
+            resultado = await self._enviar(endpoint, params)
+            futuro.set_result(resultado)
+            return resultado
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except BaseException as e:
+            futuro.set_exception(e)
+            futuro.exception()  # Marca a exceção como lida quando não há ninguém agrupado esperando.
+            raise
+        finally:
+            del self._em_andamento[chave]
+
+    def _reproduzir(self, endpoint, params):
+        """Devolve a resposta gravada (ou 404 quando não há gravação)."""
+        gravacao = ler_gravacao(self.pasta_gravacoes, endpoint, params)
+        if gravacao is None:
+            logger.warning("Gravação ausente para %s %s", endpoint, params)
+            return 404, f"Gravação ausente para {endpoint} {params}"
+        return gravacao['status'], gravacao['corpo']
+
+    def _espera_tentativa(self, tentativa: int, resposta=None) -> float:
+        """Calcula a espera antes da próxima tentativa, respeitando o cabeçalho Retry-After."""
+        if resposta is not None and resposta.headers.get('Retry-After', '').isdigit():
+            return float(resposta.headers['Retry-After'])
+        return self.backoff * (2 ** tentativa) + random.uniform(0, self.backoff_jitter)
+
+    async def _enviar(self, endpoint, params):
+        """Envia a requisição com novas tentativas, respeitando o limite de concorrência e a taxa máxima, e registra as métricas da API."""
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=self.timeout_conexao,
+            sock_read=self.timeouts_leitura.get(endpoint, max(self.timeouts_leitura.values())),
+        )
+        url = f'{self.base_url}/{endpoint}'
+        with metricas.cronometrar("api_requisicao_segundos", endpoint=endpoint):
+            resposta, corpo = await self._tentar(endpoint, url, params, timeout)
+        metricas.incrementar("api_respostas_total", endpoint=endpoint, status=resposta.status)
+        metricas.observar("api_resposta_bytes", len(corpo.encode()), baldes=BALDES_BYTES, endpoint=endpoint)
+
+        if self.modo == 'gravar' and resposta.status == 200:
+            try:
+                cabecalhos = {k: resposta.headers[k] for k in CABECALHOS_GRAVADOS if k in resposta.headers}
+                salvar_gravacao(self.pasta_gravacoes, endpoint, params, resposta.status, cabecalhos, corpo)
+            except Exception as e:
+                logger.warning("Erro ao gravar a resposta de %s %s | %s", endpoint, params, e)
+        return resposta.status, corpo
+
+    async def _tentar(self, endpoint, url, params, timeout):
+        """Faz as tentativas da requisição e devolve a última resposta com o seu corpo."""
+        for tentativa in range(self.max_tentativas + 1):
+            ultima = tentativa == self.max_tentativas
+            try:
+                async with self._semaforo:
+                    espera = self.balde.reservar()
+                    if espera:
+                        logger.info("Requisição a %s aguardou %.2fs pelo limite de taxa da API.", endpoint, espera)
+                        await asyncio.sleep(espera)
+                    async with self._sessao.get(url, params=params, timeout=timeout) as resposta:
+                        corpo = await resposta.text()
+                        if resposta.status not in self.STATUS_REPETIR or ultima:
+                            break
+                        espera = self._espera_tentativa(tentativa, resposta)
+                logger.warning("Status %s em %s; nova tentativa em %.2fs.", resposta.status, endpoint, espera)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if ultima:
+                    raise
+                espera = self._espera_tentativa(tentativa)
+                logger.warning("Falha de rede em %s (%r); nova tentativa em %.2fs.", endpoint, e, espera)
+            await asyncio.sleep(espera)
+        return resposta, corpo
+
+
+# Cliente assíncrono compartilhado por todas as funções deste módulo
+cliente = ClienteAPIAsync()
+
+
+async def _consultar(endpoint: str, params: dict, descricao: str, cliente_api: ClienteAPIAsync = None):
+    """
+    Consulta um endpoint e interpreta a resposta como as funções síncronas de `backend.apis`.
+
+    Args:
+        endpoint (str): Nome do endpoint.
+        params (dict): Parâmetros da query string.
+        descricao (str): Descrição da consulta usada nos logs.
+        cliente_api (ClienteAPIAsync, opcional): Cliente a usar. Padrão: o cliente do módulo.
+
+    Returns:
+        dict or None: Dados retornados pela API em formato JSON, ou None em caso de erro.
+    """
+    try:
+        status, corpo = await (cliente_api or cliente).get(endpoint, params)
+        if status == 200:
+            dados = json.loads(corpo)
+            logger.info("Consulta de %s bem-sucedida.", descricao)
+            return dados
+        logger.warning("Falha na consulta de %s | Status Code: %s | Response: %s", descricao, status, corpo)
+        return None
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error("Erro técnico ao consultar %s: %r", descricao, e)
+        return None
+
+
+@instrumentar
+async def pegar_planilhao(data_base, cliente_api: ClienteAPIAsync = None):
+    """
+    Versão assíncrona de `backend.apis.pegar_planilhao`.
+
+    Args:
+        data_base (str): Data base para a consulta ao planilhão no formato 'YYYY-MM-DD'.
+        cliente_api (ClienteAPIAsync, opcional): Cliente a usar. Padrão: o cliente do módulo.
+
+    Returns:
+        dict or None: Dados retornados pela API em formato JSON, ou None em caso de erro.
+    """
+    logger.info("Iniciando consulta assíncrona ao planilhão para a data base: %s", data_base)
+    return await _consultar('planilhao', {'data_base': data_base}, f"planilhão para a data base {data_base}", cliente_api)
+
+
+@instrumentar
+async def get_preco_corrigido(ticker, data_ini, data_fim, cliente_api: ClienteAPIAsync = None):
+    """
+    Versão assíncrona de `backend.apis.get_preco_corrigido`.
+
+    Args:
+        ticker (str): Ticker da ação a ser consultada.
+        data_ini (str): Data inicial do período no formato 'YYYY-MM-DD'.
+        data_fim (str): Data final do período no formato 'YYYY-MM-DD'.
+        cliente_api (ClienteAPIAsync, opcional): Cliente a usar. Padrão: o cliente do módulo.
+
+    Returns:
+        dict or None: Dados retornados pela API em formato JSON, ou None em caso de erro.
+    """
+    logger.info("Iniciando consulta assíncrona de preço corrigido para %s de %s a %s.", ticker, data_ini, data_fim)
+    params = {'ticker': ticker, 'data_ini': data_ini, 'data_fim': data_fim}
+    return await _consultar('preco-corrigido', params, f"preço corrigido para {ticker}", cliente_api)
+
+
+@instrumentar
+async def get_preco_diversos(data_ini, data_fim, ticker, cliente_api: ClienteAPIAsync = None):
+    """
+    Versão assíncrona de `backend.apis.get_preco_diversos`.
+
+    Args:
+        data_ini (str): Data inicial do período no formato 'YYYY-MM-DD'.
+        data_fim (str): Data final do período no formato 'YYYY-MM-DD'.
+        ticker (str): Ticker da ação a ser consultada.
+        cliente_api (ClienteAPIAsync, opcional): Cliente a usar. Padrão: o cliente do módulo.
+
+    Returns:
+        dict or None: Dados retornados pela API em formato JSON, ou None em caso de erro.
+    """
+    logger.info("Iniciando consulta assíncrona de preços diversos para %s de %s a %s.", ticker, data_ini, data_fim)
+    params = {'ticker': ticker, 'data_ini': data_ini, 'data_fim': data_fim}
+    return await _consultar('preco-diversos', params, f"preços diversos para {ticker}", cliente_api)
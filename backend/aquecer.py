@@ -0,0 +1,283 @@
+"""
+Aquece os caches do backend sem a interface, para agendar à noite (cron, agendador de tarefas etc.).
+
+Para cada data do período: grava o snapshot do planilhão e o índice de ranking no cache em disco,
+calcula a carteira de cada par de indicadores e, ao final, guarda no histórico local os preços de
+todos os tickers selecionados e do IBOV e acrescenta as datas ao painel do planilhão. O trabalho roda em paralelo e o progresso é gravado em um
+arquivo de checkpoint: se a execução for interrompida, a próxima continua de onde parou.
+
+Uso (a partir da raiz do projeto):
+    python -m backend.aquecer --data-ini 2024-01-01 --data-fim 2024-12-31
+    python -m backend.aquecer --data-ini 2020-01-01 --data-fim 2024-12-31 --frequencia mensal --nums 10 20
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from itertools import product
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from backend import views
+from backend.backtest import gerar_datas_rebalanceamento
+from backend.config import CACHE_DIR, PRECO_MAX_WORKERS
+from backend.ranking import INDICADORES_RENTABILIDADE, INDICADORES_DESCONTO
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+CHECKPOINT_PADRAO = os.path.join(CACHE_DIR, "aquecimento.json")
+
+FREQUENCIAS = ('diaria', 'mensal', 'trimestral')
+
+
+def gerar_datas(data_ini, data_fim, frequencia: str = 'diaria'):
+    """
+    Gera as datas base a aquecer, sempre anteriores a hoje.
+
+    Args:
+        data_ini (date | str): Início do período.
+        data_fim (date | str): Fim do período.
+        frequencia (str, opcional): 'diaria' (todos os dias úteis), 'mensal' ou 'trimestral'.
+
+    Returns:
+        pd.DatetimeIndex: Datas em ordem crescente.
+
+    Raises:
+        ValueError: Se a frequência não for suportada.
+    """
+    if frequencia not in FREQUENCIAS:
+        raise ValueError(f"Frequência inválida: {frequencia}. Use {list(FREQUENCIAS)}.")
+    if frequencia != 'diaria':
+        return gerar_datas_rebalanceamento(data_ini, data_fim, frequencia)
+    datas = pd.bdate_range(pd.Timestamp(data_ini), pd.Timestamp(data_fim))
+    return datas[datas < pd.Timestamp('today').normalize()]
+
+
+class Checkpoint:
+    """
+    Progresso do aquecimento gravado em JSON, para retomar uma execução interrompida.
+
+    O checkpoint só é reaproveitado se os parâmetros forem os mesmos da execução anterior.
+
+    Args:
+        caminho (str): Arquivo do checkpoint.
+        parametros (dict): Parâmetros da execução (período, frequência, quantidades de ações).
+        recomecar (bool, opcional): Ignora o progresso gravado. Padrão: False.
+    """
+
+    def __init__(self, caminho: str, parametros: dict, recomecar: bool = False):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        estado = None
+        if not recomecar and os.path.exists(caminho):
+            try:
+                with open(caminho, encoding="utf-8") as arquivo:
+                    estado = json.load(arquivo)
+            except Exception as e:
+                logger.warning("Checkpoint de aquecimento ilegível, recomeçando | %s", e)
+            if estado is not None and estado.get("parametros") != parametros:
+                logger.info("Checkpoint de aquecimento com outros parâmetros; recomeçando.")
+                estado = None
+        self.estado = estado or {"parametros": parametros, "planilhao": {}, "precos": [], "ibov": False}
+
+    def registrar(self, fase: str, chave=None, valor=None):
+        """
+        Registra um item concluído e grava o checkpoint (escrita atômica).
+
+        Args:
+            fase (str): 'planilhao', 'precos' ou 'ibov'.
+            chave (str, opcional): Data (planilhão) ou ticker (preços).
+            valor (object, opcional): Tickers selecionados na data (planilhão).
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if fase == "planilhao":
+                self.estado["planilhao"][chave] = valor
+            elif fase == "precos":
+                self.estado["precos"].append(chave)
+            else:
+                self.estado["ibov"] = True
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            temporario = f"{self.caminho}.{os.getpid()}.tmp"
+            with open(temporario, "w", encoding="utf-8") as arquivo:
+                json.dump(self.estado, arquivo)
+            os.replace(temporario, self.caminho)
+
+
+class Progresso:
+    """Imprime o andamento de uma fase: itens concluídos, falhas, tempo decorrido e estimativa restante."""
+
+    def __init__(self, fase: str, total: int):
+        self.fase = fase
+        self.total = total
+        self.feitos = 0
+        self.falhas = 0
+        self.inicio = time.monotonic()
+        self._lock = threading.Lock()
+
+    def avancar(self, descricao: str, ok: bool = True):
+        with self._lock:
+            self.feitos += 1
+            self.falhas += not ok
+            decorrido = time.monotonic() - self.inicio
+            restante = decorrido / self.feitos * (self.total - self.feitos)
+            print(f"[{self.fase}] {self.feitos}/{self.total} {descricao}{'' if ok else ' (FALHOU)'}"
+                  f" | {decorrido:.0f}s decorridos, ~{restante:.0f}s restantes", flush=True)
+
+
+def aquecer_data(data, combinacoes):
+    """
+    Grava o planilhão e o índice de ranking de uma data e calcula as carteiras de todas as combinações.
+
+    Args:
+        data (pd.Timestamp): Data base.
+        combinacoes (list): Tuplas (indicador_rent, indicador_desc, num).
+
+    Returns:
+        list or None: Tickers selecionados em alguma das carteiras, ou None se não houver planilhão na data.
+    """
+    df = views.pegar_df_planilhao(data.date())
+    if df.empty:
+        return None
+    views.pegar_indice_ranking(data.date(), df)
+    tickers = {}
+    for rent, desc, num in combinacoes:
+        _, acoes = views.carteira(data.date(), rent, desc, num)
+        tickers.update(dict.fromkeys(acoes))
+    return list(tickers)
+
+
+def aquecer_precos(historico, ticker: str, data_ini: str, data_fim: str):
+    """
+    Guarda no histórico local a série de um ticker no período (apenas as lacunas vão à API).
+
+    Args:
+        historico (HistoricoPrecos): Histórico de preços a aquecer.
+        ticker (str): Ticker da ação ou do índice.
+        data_ini (str): Início do período.
+        data_fim (str): Fim do período.
+
+    Returns:
+        bool or None: True se a série tem dados no período, ou None se a API não retornou nada.
+    """
+    return None if historico.obter(ticker, data_ini, data_fim).empty else True
+
+
+def executar_fase(fase: str, itens, tarefa, checkpoint: Checkpoint, max_workers: int):
+    """
+    Executa `tarefa(item)` em paralelo para cada item, registrando no checkpoint os que terminarem bem.
+
+    Args:
+        fase (str): Nome da fase, usado no progresso e no checkpoint.
+        itens (list): Lista de tuplas (chave, item) pendentes.
+        tarefa (Callable): Função aplicada a cada item; o retorno é guardado no checkpoint. Itens que
+            retornam None (sem dados) não são registrados e serão tentados de novo na próxima execução.
+        checkpoint (Checkpoint): Checkpoint da execução.
+        max_workers (int): Tarefas simultâneas.
+
+    Returns:
+        int: Quantidade de itens que falharam.
+    """
+    progresso = Progresso(fase, len(itens))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {executor.submit(tarefa, item): chave for chave, item in itens}
+        for futuro in as_completed(futuros):
+            chave = futuros[futuro]
+            try:
+                resultado = futuro.result()
+                if resultado is None:
+                    progresso.avancar(f"{chave} (sem dados)")
+                    continue
+                checkpoint.registrar(fase, chave, resultado)
+                progresso.avancar(chave)
+            except Exception as e:
+                logger.error("Falha no aquecimento (%s) para %s: %s", fase, chave, e)
+                progresso.avancar(chave, ok=False)
+    return progresso.falhas
+
+
+def aquecer(data_ini, data_fim, frequencia: str = 'diaria', nums=(10, 20, 30), max_workers: int = None,
+            caminho_checkpoint: str = CHECKPOINT_PADRAO, recomecar: bool = False) -> int:
+    """
+    Aquece os caches para um período: planilhões, índices de ranking, carteiras, preços e o painel do planilhão.
+
+    Args:
+        data_ini (date | str): Início do período.
+        data_fim (date | str): Fim do período.
+        frequencia (str, opcional): 'diaria', 'mensal' ou 'trimestral'. Padrão: 'diaria'.
+        nums (iterable, opcional): Quantidades de ações das carteiras. Padrão: (10, 20, 30).
+        max_workers (int, opcional): Tarefas simultâneas. Padrão: PRECO_MAX_WORKERS.
+        caminho_checkpoint (str, opcional): Arquivo do checkpoint. Padrão: <CACHE_DIR>/aquecimento.json.
+        recomecar (bool, opcional): Ignora o progresso de uma execução anterior. Padrão: False.
+
+    Returns:
+        int: Quantidade de itens que falharam (0 se tudo foi aquecido).
+    """
+    max_workers = max(1, max_workers or PRECO_MAX_WORKERS)
+    nums = sorted(set(nums))
+    datas = gerar_datas(data_ini, data_fim, frequencia)
+    parametros = {"data_ini": str(pd.Timestamp(data_ini).date()), "data_fim": str(pd.Timestamp(data_fim).date()),
+                  "frequencia": frequencia, "nums": nums}
+    checkpoint = Checkpoint(caminho_checkpoint, parametros, recomecar)
+    combinacoes = list(product(INDICADORES_RENTABILIDADE, INDICADORES_DESCONTO, nums))
+    logger.info("Aquecimento iniciado: %s datas, %s carteiras por data | %s", len(datas), len(combinacoes), parametros)
+
+    # 1. Planilhão, índice de ranking e carteiras de cada data.
+    concluidas = checkpoint.estado["planilhao"]
+    pendentes = [(str(data.date()), data) for data in datas if str(data.date()) not in concluidas]
+    print(f"Planilhão e carteiras: {len(pendentes)} datas pendentes de {len(datas)}", flush=True)
+    falhas = executar_fase("planilhao", pendentes, lambda data: aquecer_data(data, combinacoes), checkpoint, max_workers)
+
+    # 2. Preços de todos os tickers que entraram em alguma carteira, para o período inteiro.
+    tickers = list(dict.fromkeys(t for acoes in checkpoint.estado["planilhao"].values() for t in acoes))
+    feitos = set(checkpoint.estado["precos"])
+    pendentes = [(ticker, ticker) for ticker in tickers if ticker not in feitos]
+    print(f"Preços corrigidos: {len(pendentes)} tickers pendentes de {len(tickers)}", flush=True)
+    falhas += executar_fase(
+        "precos", pendentes,
+        lambda ticker: aquecer_precos(views.historico_preco_corrigido, ticker, parametros["data_ini"], parametros["data_fim"]),
+        checkpoint, max_workers,
+    )
+
+    # 3. IBOV do período inteiro.
+    if not checkpoint.estado["ibov"]:
+        falhas += executar_fase(
+            "ibov", [("ibov", "ibov")],
+            lambda ticker: aquecer_precos(views.historico_preco_diversos, ticker, parametros["data_ini"], parametros["data_fim"]),
+            checkpoint, 1,
+        )
+
+    # 4. Painel do planilhão: as datas ausentes são lidas dos snapshots gravados na fase 1.
+    print(f"Painel do planilhão: {len(views.painel_planilhao.faltantes(datas))} datas pendentes de {len(datas)}", flush=True)
+    try:
+        views.painel_planilhao.ingerir(datas, max_workers)
+    except Exception as e:
+        logger.error("Falha no aquecimento (painel) do planilhão: %s", e)
+        falhas += 1
+
+    logger.info("Aquecimento concluído | Falhas: %s", falhas)
+    print(f"Aquecimento concluído com {falhas} falha(s).", flush=True)
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-ini", required=True, help="Início do período (YYYY-MM-DD).")
+    parser.add_argument("--data-fim", default=str(pd.Timestamp('today').date()), help="Fim do período. Padrão: hoje.")
+    parser.add_argument("--frequencia", choices=FREQUENCIAS, default="diaria", help="Datas base a aquecer.")
+    parser.add_argument("--nums", type=int, nargs="+", default=[10, 20, 30], help="Quantidades de ações das carteiras.")
+    parser.add_argument("--workers", type=int, default=PRECO_MAX_WORKERS, help="Tarefas simultâneas.")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PADRAO, help="Arquivo do checkpoint.")
+    parser.add_argument("--recomecar", action="store_true", help="Ignora o progresso de uma execução anterior.")
+    args = parser.parse_args()
+    falhas = aquecer(args.data_ini, args.data_fim, args.frequencia, args.nums, args.workers, args.checkpoint,
+                     args.recomecar)
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
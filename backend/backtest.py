@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+from backend.retornos import retornos_diarios
+from backend.views import carteira, pegar_matriz_preco_corrigido
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Pregões por ano, usados para anualizar retornos e volatilidade
+DIAS_UTEIS_ANO = 252
+
+# Frequências de rebalanceamento aceitas e o primeiro dia útil de cada período
+FREQUENCIAS = {
+    'mensal': 'BMS',
+    'trimestral': 'BQS',
+}
+
+
+def gerar_datas_rebalanceamento(data_ini, data_fim, frequencia: str = 'mensal'):
+    """
+    Gera as datas de rebalanceamento entre duas datas.
+
+    A primeira data é `data_ini` (ou o próximo dia útil); as seguintes são o primeiro dia útil
+    de cada mês ou trimestre. Datas a partir de hoje são descartadas, pois ainda não têm planilhão.
+
+    Args:
+        data_ini (date | str): Início do backtest.
+        data_fim (date | str): Fim do backtest.
+        frequencia (str, opcional): 'mensal' ou 'trimestral'. Padrão: 'mensal'.
+
+    Returns:
+        pd.DatetimeIndex: Datas de rebalanceamento em ordem crescente.
+
+    Raises:
+        ValueError: Se a frequência não for suportada.
+    """
+    if frequencia not in FREQUENCIAS:
+        raise ValueError(f"Frequência de rebalanceamento inválida: {frequencia}. Use {list(FREQUENCIAS)}.")
+    inicio = pd.offsets.BDay().rollforward(pd.Timestamp(data_ini))
+    datas = pd.date_range(inicio, pd.Timestamp(data_fim), freq=FREQUENCIAS[frequencia])
+    datas = datas[datas > inicio].insert(0, inicio)
+    return datas[datas < pd.Timestamp('today').normalize()]
+
+
+def calcular_backtest(matriz_precos: pd.DataFrame, carteiras: dict):
+    """
+    Calcula a trajetória de retornos de uma carteira rebalanceada a partir da matriz de preços.
+
+    Entre dois rebalanceamentos a carteira é igualmente ponderada entre os tickers com cotação no dia,
+    como no gráfico de retorno acumulado. A composição escolhida em uma data passa a valer no pregão
+    seguinte. Todo o cálculo é feito sobre matrizes, sem laço por ticker.
+
+    Args:
+        matriz_precos (pd.DataFrame): Fechamentos datas x tickers.
+        carteiras (dict): Mapa {data de rebalanceamento: lista de tickers}.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]:
+            - Retornos diários e acumulados da carteira, indexados por data.
+            - Uma linha por rebalanceamento com as ações, o retorno do período e o turnover.
+    """
+    datas_rebal = pd.DatetimeIndex(sorted(carteiras))
+    tickers = matriz_precos.columns
+
+    # Pesos-alvo de cada rebalanceamento (rebalanceamentos x tickers), igualmente ponderados.
+    pesos = np.zeros((len(datas_rebal), len(tickers)))
+    for i, data in enumerate(datas_rebal):
+        selecionadas = tickers.get_indexer(carteiras[data])
+        selecionadas = selecionadas[selecionadas >= 0]
+        if len(selecionadas):
+            pesos[i, selecionadas] = 1.0 / len(selecionadas)
+
+    # Turnover: metade da variação absoluta dos pesos; o primeiro rebalanceamento compra a carteira inteira.
+    turnover = 0.5 * np.abs(np.diff(pesos, axis=0)).sum(axis=1)
+    turnover = np.concatenate([[pesos[0].sum() if len(pesos) else 0.0], turnover])
+
+    # Para cada dia, o rebalanceamento vigente é o último estritamente anterior a ele.
+    datas = matriz_precos.index
+    periodo = np.searchsorted(datas_rebal.values, datas.values, side='left') - 1
+    validos = periodo >= 0
+
+    retornos = retornos_diarios(matriz_precos.to_numpy())[validos]
+    periodo = periodo[validos]
+    em_carteira = pesos[periodo] > 0
+    retornos = np.where(em_carteira & ~np.isnan(retornos), retornos, np.nan)
+    n_ativos = (~np.isnan(retornos)).sum(axis=1)
+    retorno_diario = np.where(n_ativos > 0, np.nansum(retornos, axis=1) / np.maximum(n_ativos, 1), 0.0)
+
+    df_diario = pd.DataFrame({'retorno_diario': retorno_diario}, index=datas[validos])
+    df_diario['retorno_acumulado'] = np.cumprod(1 + retorno_diario) - 1
+    df_diario.index.name = 'data'
+
+    # Retorno composto de cada período de rebalanceamento.
+    fator = pd.Series(1 + retorno_diario).groupby(periodo).prod()
+    retorno_periodo = np.full(len(datas_rebal), np.nan)
+    retorno_periodo[fator.index.to_numpy()] = fator.to_numpy() - 1
+
+    df_periodos = pd.DataFrame({
+        'data_rebalanceamento': datas_rebal,
+        'acoes': [list(carteiras[data]) for data in datas_rebal],
+        'retorno_periodo': retorno_periodo,
+        'turnover': turnover,
+    })
+    return df_diario, df_periodos
+
+
+def resumir_backtest(df_diario: pd.DataFrame, df_periodos: pd.DataFrame) -> dict:
+    """
+    Resume o desempenho de um backtest em métricas comparáveis entre estratégias.
+
+    Args:
+        df_diario (pd.DataFrame): Retornos diários e acumulados (saída de `calcular_backtest`).
+        df_periodos (pd.DataFrame): Resumo por rebalanceamento (saída de `calcular_backtest`).
+
+    Returns:
+        dict: Retorno total e anualizado, volatilidade anualizada, índice de Sharpe (sem taxa livre de risco),
+            drawdown máximo e turnover médio.
+    """
+    retorno = df_diario['retorno_diario'].to_numpy()
+    if len(retorno) == 0:
+        return {'retorno_total': np.nan, 'retorno_anual': np.nan, 'volatilidade_anual': np.nan,
+                'sharpe': np.nan, 'drawdown_maximo': np.nan, 'turnover_medio': np.nan}
+    riqueza = np.cumprod(1 + retorno)
+    retorno_total = riqueza[-1] - 1
+    retorno_anual = riqueza[-1] ** (DIAS_UTEIS_ANO / len(retorno)) - 1
+    volatilidade = retorno.std(ddof=1) * np.sqrt(DIAS_UTEIS_ANO) if len(retorno) > 1 else np.nan
+    drawdown = riqueza / np.maximum.accumulate(riqueza) - 1
+    return {
+        'retorno_total': retorno_total,
+        'retorno_anual': retorno_anual,
+        'volatilidade_anual': volatilidade,
+        'sharpe': retorno_anual / volatilidade if volatilidade else np.nan,
+        'drawdown_maximo': drawdown.min(),
+        'turnover_medio': df_periodos['turnover'].mean(),
+    }
+
+
+def backtest_carteira(data_ini, data_fim, indicador_rent, indicador_desc, num, frequencia: str = 'mensal'):
+    """
+    Executa o backtest da estratégia `carteira` com rebalanceamentos periódicos.
+
+    Em cada data de rebalanceamento a carteira é recalculada com os mesmos indicadores; datas sem
+    planilhão (feriados, por exemplo) mantêm a composição anterior. Os preços de todos os tickers que
+    passaram pela carteira são lidos uma única vez, para o período inteiro, do painel de preços em disco.
+
+    Args:
+        data_ini (date | str): Início do backtest.
+        data_fim (date | str): Fim do backtest.
+        indicador_rent (str): Indicador de rentabilidade para ranqueamento.
+        indicador_desc (str): Indicador de desconto para ranqueamento.
+        num (int): Número de ações em cada carteira.
+        frequencia (str, opcional): 'mensal' ou 'trimestral'. Padrão: 'mensal'.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Retornos diários/acumulados e o resumo por período
+            (veja `calcular_backtest`).
+
+    Raises:
+        ValueError: Se nenhuma carteira puder ser gerada no período.
+    """
+    logger.info("Iniciando backtest de %s a %s | %s, %s, num: %s, %s", data_ini, data_fim, indicador_rent, indicador_desc, num, frequencia)
+    try:
+        carteiras = {}
+        for data in gerar_datas_rebalanceamento(data_ini, data_fim, frequencia):
+            try:
+                _, acoes = carteira(data.date(), indicador_rent, indicador_desc, num)
+                carteiras[data] = acoes
+            except ValueError as e:
+                logger.warning("Rebalanceamento ignorado em %s: %s", data.date(), e)
+
+        if not carteiras:
+            raise ValueError("Nenhuma carteira foi gerada no período do backtest.")
+
+        tickers = list(dict.fromkeys(t for acoes in carteiras.values() for t in acoes))
+        matriz_precos = pegar_matriz_preco_corrigido(min(carteiras).date(), data_fim, tickers)
+        df_diario, df_periodos = calcular_backtest(matriz_precos, carteiras)
+        logger.info("Backtest concluído | Rebalanceamentos: %s, Retorno acumulado: %.4f", len(df_periodos),
+                    df_diario['retorno_acumulado'].iloc[-1] if not df_diario.empty else float('nan'))
+        return df_diario, df_periodos
+    except Exception as e:
+        logger.error("Erro ao executar o backtest: %s", e)
+        raise
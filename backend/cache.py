@@ -0,0 +1,244 @@
+import os
+import time
+import threading
+from datetime import date
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from backend.config import (
+    CACHE_DIR,
+    PLANILHAO_DIAS_RECENTES,
+    PLANILHAO_CACHE_TTL,
+    PLANILHAO_CACHE_MAX_MB,
+)
+from backend.metricas import metricas
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Diretório onde ficam os snapshots do planilhão (um arquivo Parquet por data base)
+PLANILHAO_DIR = os.path.join(CACHE_DIR, "planilhao")
+
+# Evita que duas threads apliquem o limite de tamanho ao mesmo tempo
+_lock_limite = threading.Lock()
+
+
+def _normalizar_data(data_base) -> str:
+    """
+    Converte a data base para o formato 'YYYY-MM-DD' usado como chave do cache.
+
+    Args:
+        data_base (date | str): Data base do planilhão.
+
+    Returns:
+        str: Data no formato 'YYYY-MM-DD'.
+    """
+    return pd.Timestamp(data_base).strftime("%Y-%m-%d")
+
+
+def _caminho_planilhao(data_base, parcial: bool = False) -> str:
+    """
+    Monta o caminho do arquivo Parquet de uma data base.
+
+    Args:
+        data_base (date | str): Data base do planilhão.
+        parcial (bool, opcional): Se True, o caminho do snapshot com apenas parte das colunas.
+
+    Returns:
+        str: Caminho absoluto do arquivo no cache.
+    """
+    return os.path.join(PLANILHAO_DIR, f"{_normalizar_data(data_base)}{'.parcial' if parcial else ''}.parquet")
+
+
+def _caminho_indice(data_base) -> str:
+    """
+    Monta o caminho do índice de ranking gravado ao lado do snapshot de uma data base.
+
+    Args:
+        data_base (date | str): Data base do planilhão.
+
+    Returns:
+        str: Caminho absoluto do arquivo do índice no cache.
+    """
+    return os.path.join(PLANILHAO_DIR, f"{_normalizar_data(data_base)}.ranking.npz")
+
+
+def _expirado(data_base, caminho: str) -> bool:
+    """
+    Verifica se um snapshot em cache expirou.
+
+    Datas passadas (mais antigas que PLANILHAO_DIAS_RECENTES) não mudam mais e nunca expiram.
+    Datas recentes expiram PLANILHAO_CACHE_TTL segundos após a gravação.
+
+    Args:
+        data_base (date | str): Data base do snapshot.
+        caminho (str): Caminho do arquivo no cache.
+
+    Returns:
+        bool: True se o snapshot precisa ser buscado novamente.
+    """
+    dias = (date.today() - pd.Timestamp(data_base).date()).days
+    if dias > PLANILHAO_DIAS_RECENTES:
+        return False
+    idade = time.time() - os.path.getmtime(caminho)  # mtime guarda o momento da gravação.
+    return idade > PLANILHAO_CACHE_TTL
+
+
+def ler_planilhao_cache(data_base, colunas=None):
+    """
+    Lê o snapshot processado do planilhão a partir do cache em disco.
+
+    O snapshot completo atende qualquer pedido; com `colunas`, também serve o snapshot parcial
+    (gravado a partir de uma consulta projetada), desde que tenha todas elas. Só as colunas pedidas
+    (e 'empresa') são lidas do arquivo.
+
+    Args:
+        data_base (date | str): Data base do planilhão.
+        colunas (list, opcional): Colunas necessárias. Padrão: todas.
+
+    Returns:
+        pd.DataFrame or None: Snapshot em cache, ou None se ausente, expirado ou ilegível.
+    """
+    candidatos = [_caminho_planilhao(data_base)] + ([_caminho_planilhao(data_base, parcial=True)] if colunas else [])
+    for caminho in candidatos:
+        if not os.path.exists(caminho):
+            continue
+        try:
+            if _expirado(data_base, caminho):
+                logger.info("Cache do planilhão expirado para a data base: %s | %s", data_base, os.path.basename(caminho))
+                continue
+            leitura = None
+            if colunas:
+                gravadas = pq.read_schema(caminho).names
+                if not set(colunas) <= set(gravadas):
+                    continue
+                leitura = [c for c in gravadas if c in colunas or c == 'empresa']
+            df = pd.read_parquet(caminho, columns=leitura)
+            # Atualiza apenas o atime, usado como critério de descarte (LRU); o mtime segue marcando a gravação.
+            os.utime(caminho, (time.time(), os.path.getmtime(caminho)))
+            logger.info("Planilhão lido do cache para a data base: %s | Linhas: %s", data_base, len(df))
+            metricas.incrementar("cache_consultas_total", cache="planilhao_disco", resultado="acerto")
+            return df
+        except Exception as e:
+            logger.warning("Erro ao ler o cache do planilhão para a data base: %s | %s", data_base, e)
+    logger.info("Cache do planilhão ausente para a data base: %s", data_base)
+    metricas.incrementar("cache_consultas_total", cache="planilhao_disco", resultado="falta")
+    return None
+
+
+def salvar_planilhao_cache(data_base, df: pd.DataFrame, parcial: bool = False):
+    """
+    Grava o snapshot processado do planilhão no cache em disco e aplica o limite de tamanho.
+
+    Args:
+        data_base (date | str): Data base do planilhão.
+        df (pd.DataFrame): Planilhão já processado.
+        parcial (bool, opcional): Se True, `df` tem apenas parte das colunas e é gravado à parte, sem
+            substituir o snapshot completo. Um snapshot completo descarta o parcial da mesma data.
+
+    Returns:
+        None
+    """
+    if df is None or df.empty:
+        logger.info("Planilhão vazio não será gravado no cache para a data base: %s", data_base)
+        return
+    caminho = _caminho_planilhao(data_base, parcial)
+    try:
+        os.makedirs(PLANILHAO_DIR, exist_ok=True)
+        # Grava em arquivo temporário e renomeia, para que leitores nunca vejam um arquivo pela metade.
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(temporario)
+        os.replace(temporario, caminho)
+        if not parcial:
+            try:
+                os.remove(_caminho_planilhao(data_base, parcial=True))  # Superado pelo snapshot completo.
+            except FileNotFoundError:
+                pass
+        logger.info("Planilhão gravado no cache para a data base: %s%s", data_base, " (parcial)" if parcial else "")
+        aplicar_limite_cache()
+    except Exception as e:
+        logger.warning("Erro ao gravar o cache do planilhão para a data base: %s | %s", data_base, e)
+
+
+def ler_indice_ranking(data_base):
+    """
+    Lê o índice de ranking de uma data base, desde que seja tão novo quanto o snapshot em cache.
+
+    Args:
+        data_base (date | str): Data base do planilhão.
+
+    Returns:
+        dict or None: Índice {indicador: posições ordenadas}, ou None se ausente ou desatualizado.
+    """
+    caminho = _caminho_indice(data_base)
+    # O índice vale para o snapshot completo e para o parcial: as linhas são as mesmas.
+    snapshots = [c for c in (_caminho_planilhao(data_base), _caminho_planilhao(data_base, parcial=True)) if os.path.exists(c)]
+    try:
+        if not snapshots or not os.path.exists(caminho) or os.path.getmtime(caminho) < max(map(os.path.getmtime, snapshots)):
+            return None
+        with np.load(caminho) as arquivo:
+            return {nome: arquivo[nome] for nome in arquivo.files}
+    except Exception as e:
+        logger.warning("Erro ao ler o índice de ranking para a data base: %s | %s", data_base, e)
+        return None
+
+
+def salvar_indice_ranking(data_base, indice: dict):
+    """
+    Grava o índice de ranking de uma data base ao lado do snapshot do planilhão.
+
+    Args:
+        data_base (date | str): Data base do planilhão.
+        indice (dict): Índice {indicador: posições ordenadas}.
+
+    Returns:
+        None
+    """
+    caminho = _caminho_indice(data_base)
+    try:
+        os.makedirs(PLANILHAO_DIR, exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "wb") as arquivo:
+            np.savez(arquivo, **indice)
+        os.replace(temporario, caminho)
+        logger.info("Índice de ranking gravado no cache para a data base: %s", data_base)
+    except Exception as e:
+        logger.warning("Erro ao gravar o índice de ranking para a data base: %s | %s", data_base, e)
+
+
+def aplicar_limite_cache(max_mb: float = None):
+    """
+    Remove os snapshots (e seus índices) menos usados recentemente até o cache caber no limite de tamanho.
+
+    Args:
+        max_mb (float, opcional): Limite em MB. Padrão: PLANILHAO_CACHE_MAX_MB.
+
+    Returns:
+        None
+    """
+    max_bytes = (max_mb if max_mb is not None else PLANILHAO_CACHE_MAX_MB) * 1024 * 1024
+    with _lock_limite:
+        if not os.path.isdir(PLANILHAO_DIR):
+            return
+        # Agrupa o snapshot e os arquivos gravados ao lado dele (como o índice de ranking) pela data.
+        grupos = {}
+        for nome in os.listdir(PLANILHAO_DIR):
+            if nome.endswith(".tmp"):
+                continue
+            caminho = os.path.join(PLANILHAO_DIR, nome)
+            estado = os.stat(caminho)
+            acesso, tamanho, caminhos = grupos.get(nome.split(".")[0], (0.0, 0, []))
+            grupos[nome.split(".")[0]] = (max(acesso, estado.st_atime), tamanho + estado.st_size, caminhos + [caminho])
+
+        total = sum(tamanho for _, tamanho, _ in grupos.values())
+        # Descarta do acesso mais antigo para o mais recente.
+        for _, tamanho, caminhos in sorted(grupos.values()):
+            if total <= max_bytes:
+                break
+            for caminho in caminhos:
+                try:
+                    os.remove(caminho)
+                except FileNotFoundError:
+                    pass
+            total -= tamanho
+            logger.info("Snapshot removido do cache por limite de tamanho: %s", caminhos[0])
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+from backend.config import CACHE_DIR, API_CACHE_HTTP_MAX_MB
+from backend.gravacao import chave_gravacao
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Diretório das cópias locais das respostas com validadores (uma subpasta por endpoint)
+HTTP_DIR = os.path.join(CACHE_DIR, "http")
+
+# Validadores enviados de volta à API e cabeçalhos guardados com cada cópia
+CABECALHOS_GUARDADOS = ('ETag', 'Last-Modified', 'Content-Type')
+
+# Tamanho dos blocos lidos de uma cópia local
+TAMANHO_BLOCO = 64 * 1024
+
+
+class _Gravador:
+    """Grava, bloco a bloco, o corpo de uma resposta em um arquivo temporário da cópia local."""
+
+    def __init__(self, cache, caminho: str, meta: dict):
+        self.cache = cache
+        self.caminho = caminho
+        self.meta = meta
+        self.temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self.arquivo = open(self.temporario, "wb")
+        self.arquivo.write(json.dumps(meta, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def escrever(self, bloco: bytes):
+        self.arquivo.write(bloco)
+
+    def concluir(self):
+        """Publica a cópia (escrita atômica) e aplica o limite de tamanho do cache."""
+        self.arquivo.close()
+        os.replace(self.temporario, self.caminho)
+        self.cache.aplicar_limite()
+
+    def descartar(self):
+        self.arquivo.close()
+        try:
+            os.remove(self.temporario)
+        except FileNotFoundError:
+            pass
+
+
+class CacheValidadores:
+    """
+    Cópias locais das respostas da API que trazem validadores (ETag ou Last-Modified).
+
+    Antes de cada requisição o cliente consulta a cópia e envia os validadores como cabeçalhos
+    condicionais (If-None-Match / If-Modified-Since). Se a API responder 304, nada além dos
+    cabeçalhos trafega e o corpo vem da cópia local. Cada cópia é um único arquivo: uma linha JSON
+    com os validadores, seguida do corpo já descomprimido, então leitores nunca veem
+    validadores de uma versão com o corpo de outra.
+
+    Args:
+        pasta (str, opcional): Pasta das cópias. Padrão: HTTP_DIR.
+        max_mb (float, opcional): Tamanho máximo das cópias, com descarte das menos usadas.
+            Padrão: API_CACHE_HTTP_MAX_MB.
+    """
+
+    def __init__(self, pasta: str = None, max_mb: float = None):
+        self.pasta = pasta or HTTP_DIR
+        self.max_bytes = (max_mb if max_mb is not None else API_CACHE_HTTP_MAX_MB) * 1024 * 1024
+        self._lock_limite = threading.Lock()
+
+    def _caminho(self, endpoint: str, params: dict) -> str:
+        return os.path.join(self.pasta, os.path.splitext(chave_gravacao(endpoint, params))[0] + ".http")
+
+    def ler(self, endpoint: str, params: dict):
+        """
+        Lê os validadores da cópia local de uma consulta.
+
+        Args:
+            endpoint (str): Nome do endpoint.
+            params (dict): Parâmetros da query string.
+
+        Returns:
+            dict or None: {'caminho', 'inicio', 'tamanho', 'cabecalhos'}, ou None se não houver cópia.
+        """
+        caminho = self._caminho(endpoint, params)
+        try:
+            with open(caminho, "rb") as arquivo:
+                meta = json.loads(arquivo.readline())
+                meta['inicio'] = arquivo.tell()
+                meta['tamanho'] = os.fstat(arquivo.fileno()).st_size - meta['inicio']
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Cópia local ilegível para %s %s | %s", endpoint, params, e)
+            return None
+        meta['caminho'] = caminho
+        return meta
+
+    @staticmethod
+    def cabecalhos_condicionais(meta: dict) -> dict:
+        """Monta os cabeçalhos If-None-Match / If-Modified-Since a partir dos validadores guardados."""
+        cabecalhos = {}
+        if meta['cabecalhos'].get('ETag'):
+            cabecalhos['If-None-Match'] = meta['cabecalhos']['ETag']
+        if meta['cabecalhos'].get('Last-Modified'):
+            cabecalhos['If-Modified-Since'] = meta['cabecalhos']['Last-Modified']
+        return cabecalhos
+
+    def blocos(self, meta: dict):
+        """
+        Lê o corpo da cópia local em blocos (para consumidores em streaming).
+
+        Args:
+            meta (dict): Cópia retornada por `ler`.
+
+        Yields:
+            bytes: Blocos do corpo.
+        """
+        self._marcar_uso(meta['caminho'])
+        with open(meta['caminho'], "rb") as arquivo:
+            arquivo.seek(meta['inicio'])
+            while bloco := arquivo.read(TAMANHO_BLOCO):
+                yield bloco
+
+    def resposta(self, meta: dict, original: requests.Response, com_corpo: bool = True) -> requests.Response:
+        """
+        Monta uma resposta 200 equivalente à guardada, a partir de uma resposta 304.
+
+        Args:
+            meta (dict): Cópia retornada por `ler`.
+            original (requests.Response): Resposta 304 recebida da API.
+            com_corpo (bool, opcional): Se False, o corpo não é carregado (quem chama o lê por `blocos`).
+
+        Returns:
+            requests.Response: Resposta com status 200, os cabeçalhos guardados e o corpo da cópia.
+        """
+        resposta = requests.Response()
+        resposta.status_code, resposta.reason = 200, 'OK'
+        resposta.url, resposta.request = original.url, original.request
+        resposta.headers = CaseInsensitiveDict({**meta['cabecalhos'], **original.headers})
+        resposta.headers.pop('Content-Encoding', None)  # O corpo guardado já está descomprimido.
+        resposta.encoding = 'utf-8'
+        resposta.elapsed = original.elapsed
+        resposta._content = b''.join(self.blocos(meta)) if com_corpo else b''
+        resposta._content_consumed = True
+        return resposta
+
+    def gravador(self, endpoint: str, params: dict, cabecalhos) -> _Gravador:
+        """
+        Prepara a gravação da cópia local de uma resposta 200, se ela trouxer validadores.
+
+        Args:
+            endpoint (str): Nome do endpoint.
+            params (dict): Parâmetros da query string.
+            cabecalhos (Mapping): Cabeçalhos da resposta.
+
+        Returns:
+            _Gravador or None: Gravador da cópia, ou None se a resposta não tiver ETag nem Last-Modified.
+        """
+        if not (cabecalhos.get('ETag') or cabecalhos.get('Last-Modified')):
+            return None
+        meta = {
+            'endpoint': endpoint,
+            'cabecalhos': {k: cabecalhos[k] for k in CABECALHOS_GUARDADOS if k in cabecalhos},
+        }
+        try:
+            return _Gravador(self, self._caminho(endpoint, params), meta)
+        except OSError as e:
+            logger.warning("Não foi possível gravar a cópia local de %s %s | %s", endpoint, params, e)
+            return None
+
+    def salvar(self, endpoint: str, params: dict, cabecalhos, corpo: bytes):
+        """Grava a cópia local de uma resposta 200 já lida (se ela trouxer validadores)."""
+        gravador = self.gravador(endpoint, params, cabecalhos)
+        if gravador is None:
+            return
+        try:
+            gravador.escrever(corpo)
+            gravador.concluir()
+        except OSError as e:
+            gravador.descartar()
+            logger.warning("Não foi possível gravar a cópia local de %s %s | %s", endpoint, params, e)
+
+    @staticmethod
+    def _marcar_uso(caminho: str):
+        """Atualiza apenas o atime, usado como critério de descarte (LRU)."""
+        try:
+            os.utime(caminho, (time.time(), os.path.getmtime(caminho)))
+        except OSError:
+            pass
+
+    def aplicar_limite(self):
+        """Remove as cópias menos usadas recentemente até o cache caber no limite de tamanho."""
+        with self._lock_limite:
+            copias = []
+            for raiz, _, nomes in os.walk(self.pasta):
+                for nome in nomes:
+                    if nome.endswith(".http"):
+                        estado = os.stat(os.path.join(raiz, nome))
+                        copias.append((estado.st_atime, estado.st_size, os.path.join(raiz, nome)))
+            total = sum(tamanho for _, tamanho, _ in copias)
+            for _, tamanho, caminho in sorted(copias):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(caminho)
+                except FileNotFoundError:
+                    pass
+                total -= tamanho
+                logger.info("Cópia local removida por limite de tamanho: %s", caminho)
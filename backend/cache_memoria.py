@@ -0,0 +1,242 @@
+import sys
+import time
+import inspect
+import threading
+import functools
+from collections import OrderedDict
+from datetime import date
+import numpy as np
+import pandas as pd
+from backend.config import CACHE_MEMORIA_MAX_MB
+from backend.metricas import metricas
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+
+def _normalizar(valor):
+    """
+    Converte um argumento em um valor imutável e estável para compor a chave do cache.
+
+    Datas viram 'YYYY-MM-DD' (date, datetime, Timestamp e strings equivalentes geram a mesma chave)
+    e listas viram tuplas. Funções em cache recebem os parâmetros da consulta (datas, tickers), não
+    DataFrames: a chave nunca depende do tamanho dos dados.
+
+    Args:
+        valor: Argumento da função em cache.
+
+    Returns:
+        Valor que pode ser usado como chave de dicionário.
+    """
+    if isinstance(valor, (date, pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(valor).strftime('%Y-%m-%d')
+    if isinstance(valor, (list, tuple, np.ndarray, pd.Index, pd.Series)):
+        return tuple(_normalizar(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _normalizar(v)) for k, v in valor.items()))
+    return valor
+
+
+def _tamanho(valor) -> int:
+    """
+    Estima a memória ocupada por um resultado, em bytes.
+
+    Args:
+        valor: Resultado guardado no cache.
+
+    Returns:
+        int: Tamanho aproximado em bytes.
+    """
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(_tamanho(v) for v in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(_tamanho(v) for v in valor.values())
+    return sys.getsizeof(valor)
+
+
+def _copiar(valor):
+    """
+    Copia um resultado antes de entregá-lo, para que quem chamou possa alterá-lo sem afetar o cache.
+
+    Args:
+        valor: Resultado guardado no cache.
+
+    Returns:
+        Cópia de DataFrames, arrays, listas e dicionários (recursivamente); demais valores como estão.
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series, np.ndarray)):
+        return valor.copy()
+    if isinstance(valor, list):
+        return [_copiar(v) for v in valor]
+    if isinstance(valor, tuple):
+        return tuple(_copiar(v) for v in valor)
+    if isinstance(valor, dict):
+        return {k: _copiar(v) for k, v in valor.items()}
+    return valor
+
+
+def _vazio(valor) -> bool:
+    """Indica se o resultado é um DataFrame vazio (que pode ser uma falha temporária da API)."""
+    return isinstance(valor, pd.DataFrame) and valor.empty
+
+
+class CacheMemoria:
+    """
+    Cache em memória compartilhado por todas as sessões do app (o processo do Streamlit é único).
+
+    Cada entrada tem sua validade (TTL) e o conjunto respeita um limite global de memória: ao
+    ultrapassá-lo, as entradas usadas há mais tempo são descartadas (LRU).
+
+    Args:
+        max_mb (float): Limite de memória do cache, em MB.
+    """
+
+    def __init__(self, max_mb: float = CACHE_MEMORIA_MAX_MB):
+        self.max_bytes = max_mb * 1024 * 1024
+        self._entradas = OrderedDict()  # chave -> (valor, expira_em, tamanho)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave):
+        """
+        Busca um valor válido no cache e o marca como usado recentemente.
+
+        Args:
+            chave (tuple): Chave da entrada (o primeiro elemento é o nome da função).
+
+        Returns:
+            Tuple[bool, object]: (True, valor) se encontrado e válido; (False, None) caso contrário.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[1] < time.monotonic():
+                self._remover(chave)
+                entrada = None
+            if entrada is None:
+                self.faltas += 1
+            else:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+        metricas.incrementar("cache_consultas_total", cache="memoria", funcao=chave[0],
+                             resultado="falta" if entrada is None else "acerto")
+        return (False, None) if entrada is None else (True, entrada[0])
+
+    def guardar(self, chave, valor, ttl: float):
+        """
+        Guarda um valor e descarta as entradas menos usadas até o cache caber no limite.
+
+        Args:
+            chave (tuple): Chave da entrada (o primeiro elemento é o nome da função).
+            valor: Valor a guardar.
+            ttl (float): Validade da entrada, em segundos.
+
+        Returns:
+            None
+        """
+        tamanho = _tamanho(valor)
+        if tamanho > self.max_bytes:
+            logger.info("Resultado de %s maior que o limite do cache em memória; não será guardado.", chave[0])
+            return
+        with self._lock:
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = (valor, time.monotonic() + ttl, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                antiga = next(iter(self._entradas))
+                self._remover(antiga)
+                logger.info("Entrada de %s removida do cache em memória por limite de tamanho.", antiga[0])
+
+    def _remover(self, chave):
+        """Remove uma entrada (o lock já deve estar adquirido)."""
+        _, _, tamanho = self._entradas.pop(chave)
+        self._bytes -= tamanho
+
+    def invalidar(self, nome_funcao: str = None) -> int:
+        """
+        Remove as entradas de uma função, ou todas.
+
+        Args:
+            nome_funcao (str, opcional): Nome da função cujas entradas serão removidas. Padrão: todas.
+
+        Returns:
+            int: Quantidade de entradas removidas.
+        """
+        with self._lock:
+            chaves = [c for c in self._entradas if nome_funcao is None or c[0] == nome_funcao]
+            for chave in chaves:
+                self._remover(chave)
+        logger.info("Cache em memória invalidado (%s) | Entradas removidas: %s", nome_funcao or 'todas as funções', len(chaves))
+        return len(chaves)
+
+    def estatisticas(self) -> dict:
+        """
+        Resume o estado do cache.
+
+        Returns:
+            dict: Entradas por função, memória usada e limite (MB), acertos e faltas.
+        """
+        with self._lock:
+            por_funcao = {}
+            for chave in self._entradas:
+                por_funcao[chave[0]] = por_funcao.get(chave[0], 0) + 1
+            return {
+                'entradas': por_funcao,
+                'memoria_mb': self._bytes / 1024 / 1024,
+                'limite_mb': self.max_bytes / 1024 / 1024,
+                'acertos': self.acertos,
+                'faltas': self.faltas,
+            }
+
+
+# Cache compartilhado por todas as funções decoradas com `cache_resultado`
+cache_memoria = CacheMemoria()
+metricas.registrar_coletor(lambda: [
+    ("cache_memoria_bytes", {}, cache_memoria._bytes),
+    ("cache_memoria_entradas", {}, len(cache_memoria._entradas)),
+])
+
+
+def cache_resultado(ttl: float):
+    """
+    Decorador que guarda o resultado de uma função no cache em memória, pela combinação de argumentos.
+
+    Chamadas equivalentes (argumentos posicionais ou nomeados, datas como date ou string) usam a
+    mesma entrada. Quem chama sempre recebe uma cópia, então pode alterar o resultado à vontade.
+    Exceções e DataFrames vazios não são guardados.
+
+    Args:
+        ttl (float): Validade das entradas desta função, em segundos.
+
+    Returns:
+        Callable: Decorador da função.
+    """
+    def decorador(funcao):
+        assinatura = inspect.signature(funcao)
+        nome = funcao.__qualname__
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            chave = (nome,) + tuple(_normalizar(v) for v in argumentos.arguments.values())
+            encontrado, valor = cache_memoria.obter(chave)
+            if encontrado:
+                logger.info("Resultado de %s lido do cache em memória.", nome)
+                return _copiar(valor)
+            valor = funcao(*args, **kwargs)
+            if not _vazio(valor) and not (isinstance(valor, tuple) and any(_vazio(v) for v in valor)):
+                cache_memoria.guardar(chave, _copiar(valor), ttl)
+            return valor
+
+        envoltorio.invalidar = lambda: cache_memoria.invalidar(nome)
+        return envoltorio
+    return decorador
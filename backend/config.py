@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from dotenv import load_dotenv
 
 # Diretório base do projeto
 BASE_DIR = Path(__file__).parent.parent.resolve()
@@ -14,11 +15,71 @@ LOG_DIR = str(BASE_DIR / "logs")
 # Criação da pasta de logs (caso não exista)
 os.makedirs(LOG_DIR, exist_ok=True)
 
-# Configuração do logging
-import logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    filename=f"{LOG_DIR}/app.log",
-    filemode="a"
-)
+# Carregar as variáveis do arquivo .env
+load_dotenv()
+
+# Logs: arquivo JSON (uma linha por registro) escrito por uma thread em segundo plano, com rotação.
+# LOG_ROTACAO: 'tamanho' (LOG_MAX_MB por arquivo) ou 'diaria' (um arquivo por dia); LOG_ARQUIVOS antigos são mantidos.
+# LOG_NIVEIS ajusta o nível por módulo, por exemplo "backend.apis=DEBUG,frontend=WARNING".
+LOG_NIVEL = os.getenv("LOG_NIVEL", "INFO")
+LOG_NIVEIS = os.getenv("LOG_NIVEIS", "")
+LOG_FORMATO = os.getenv("LOG_FORMATO", "json")  # 'json' ou 'texto'
+LOG_ROTACAO = os.getenv("LOG_ROTACAO", "tamanho")
+LOG_MAX_MB = float(os.getenv("LOG_MAX_MB", "10"))
+LOG_ARQUIVOS = int(os.getenv("LOG_ARQUIVOS", "5"))
+
+# Diretório do cache persistente em disco
+CACHE_DIR = os.getenv("CACHE_DIR", str(BASE_DIR / "cache"))
+
+# Cache do planilhão: datas mais antigas que PLANILHAO_DIAS_RECENTES nunca expiram,
+# as recentes expiram após PLANILHAO_CACHE_TTL segundos.
+PLANILHAO_DIAS_RECENTES = int(os.getenv("PLANILHAO_DIAS_RECENTES", "7"))
+PLANILHAO_CACHE_TTL = int(os.getenv("PLANILHAO_CACHE_TTL", "3600"))
+# Tamanho máximo do cache do planilhão em disco (MB), com descarte dos menos usados.
+PLANILHAO_CACHE_MAX_MB = float(os.getenv("PLANILHAO_CACHE_MAX_MB", "500"))
+
+# Cache em memória dos resultados de `backend.views`, compartilhado por todas as sessões do app.
+# Limite global (MB), com descarte dos menos usados, e validade (s) por função.
+CACHE_MEMORIA_MAX_MB = float(os.getenv("CACHE_MEMORIA_MAX_MB", "256"))
+CACHE_MEMORIA_TTL = {
+    "planilhao": float(os.getenv("CACHE_MEMORIA_TTL_PLANILHAO", "3600")),
+    "carteira": float(os.getenv("CACHE_MEMORIA_TTL_CARTEIRA", "3600")),
+    "precos": float(os.getenv("CACHE_MEMORIA_TTL_PRECOS", "900")),
+}
+# Token que libera as ações de administração no app (acesse com ?admin=<token>); vazio desativa.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Gráficos de retorno: linhas com mais de GRAFICO_LIMITE_WEBGL pontos usam WebGL e são reduzidas
+# (LTTB) a GRAFICO_PONTOS_ALVO pontos, mais ou menos a largura do gráfico em pixels.
+GRAFICO_LIMITE_WEBGL = int(os.getenv("GRAFICO_LIMITE_WEBGL", "1500"))
+GRAFICO_PONTOS_ALVO = int(os.getenv("GRAFICO_PONTOS_ALVO", "1000"))
+
+# Cliente HTTP da API do Laboratório de Finanças
+API_BASE_URL = os.getenv("API_BASE_URL", "https://laboratoriodefinancas.com/api/v1")
+# Transporte: 'rede' (padrão), 'gravar' (grava as respostas em disco) ou 'reproduzir' (usa só as gravações)
+API_MODO = os.getenv("API_MODO", "rede")
+API_GRAVACOES_DIR = os.getenv("API_GRAVACOES_DIR", str(BASE_DIR / "gravacoes"))
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "20"))  # Conexões mantidas abertas (keep-alive)
+API_MAX_TENTATIVAS = int(os.getenv("API_MAX_TENTATIVAS", "3"))  # Novas tentativas em 429/5xx
+API_BACKOFF = float(os.getenv("API_BACKOFF", "0.5"))  # Fator de espera exponencial entre tentativas (s)
+API_BACKOFF_JITTER = float(os.getenv("API_BACKOFF_JITTER", "0.5"))  # Aleatoriedade somada à espera (s)
+API_MAX_CONCORRENCIA = int(os.getenv("API_MAX_CONCORRENCIA", "10"))  # Requisições simultâneas no processo
+API_TAXA_MAXIMA = float(os.getenv("API_TAXA_MAXIMA", "0"))  # Requisições por segundo (0 = sem limite)
+API_RAJADA = int(os.getenv("API_RAJADA", "10"))  # Requisições permitidas em rajada acima da taxa
+API_TIMEOUT_CONEXAO = float(os.getenv("API_TIMEOUT_CONEXAO", "5"))  # Timeout de conexão (s)
+# Timeout de leitura (s) por endpoint; o planilhão é bem maior que as séries de preço.
+API_TIMEOUT_LEITURA = {
+    "planilhao": float(os.getenv("API_TIMEOUT_LEITURA_PLANILHAO", "60")),
+    "preco-corrigido": float(os.getenv("API_TIMEOUT_LEITURA_PRECO_CORRIGIDO", "20")),
+    "preco-diversos": float(os.getenv("API_TIMEOUT_LEITURA_PRECO_DIVERSOS", "20")),
+}
+# Cópias locais das respostas com ETag/Last-Modified, revalidadas com requisições condicionais (304).
+# '0' desativa; o limite (MB) descarta as cópias menos usadas.
+API_CACHE_HTTP = os.getenv("API_CACHE_HTTP", "1") != "0"
+API_CACHE_HTTP_MAX_MB = float(os.getenv("API_CACHE_HTTP_MAX_MB", "200"))
+
+# Número máximo de tickers consultados em paralelo ao buscar preços (1 = sequencial)
+PRECO_MAX_WORKERS = int(os.getenv("PRECO_MAX_WORKERS", "8"))
+
+# Threads usadas no ranqueamento da varredura de estratégias (padrão: número de CPUs)
+VARREDURA_MAX_WORKERS = int(os.getenv("VARREDURA_MAX_WORKERS", str(os.cpu_count() or 1)))
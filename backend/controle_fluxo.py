@@ -0,0 +1,106 @@
+import time
+import threading
+from concurrent.futures import Future
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+
+class ChamadaUnica:
+    """
+    Agrupa chamadas simultâneas com a mesma chave em uma única execução (single-flight).
+
+    A primeira chamada de uma chave executa a função; as que chegam enquanto ela está em andamento
+    esperam e recebem o mesmo resultado (ou a mesma exceção). Terminada a execução, a chave é
+    liberada e a próxima chamada executa de novo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+        self.agrupadas = 0
+
+    def executar(self, chave, funcao, copiar=None):
+        """
+        Executa `funcao` ou espera a execução já em andamento para a mesma chave.
+
+        Args:
+            chave (hashable): Identifica chamadas equivalentes.
+            funcao (Callable): Função sem argumentos que produz o resultado.
+            copiar (Callable, opcional): Função que copia o resultado; cada chamada agrupada recebe a sua
+                cópia, para que alterações de uma não apareçam nas outras. Padrão: o mesmo objeto para todas.
+
+        Returns:
+            object: Resultado de `funcao` (ou uma cópia, nas chamadas agrupadas com `copiar`).
+
+        Raises:
+            Exception: A exceção levantada por `funcao`, repassada a todas as chamadas agrupadas.
+        """
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = self._em_andamento[chave] = Future()
+            else:
+                self.agrupadas += 1
+        if not lider:
+            logger.info("Chamada agrupada com outra em andamento: %s", chave)
+            return futuro.result() if copiar is None else copiar(futuro.result())
+
+        try:
+            futuro.set_result(funcao())
+        except BaseException as e:
+            futuro.set_exception(e)
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
+        return futuro.result()
+
+
+class BaldeFichas:
+    """
+    Limitador de taxa por balde de fichas (token bucket), compartilhado pelas threads do processo.
+
+    O balde recebe `taxa` fichas por segundo até a `capacidade`, que define a rajada permitida.
+    Cada chamada consome uma ficha; sem fichas, a chamada reserva a próxima e espera por ela, de
+    modo que as esperas são atendidas em ordem de chegada.
+
+    Args:
+        taxa (float): Fichas por segundo (requisições por segundo). 0 desativa o limite.
+        capacidade (int): Máximo de fichas acumuladas (tamanho da rajada).
+    """
+
+    def __init__(self, taxa: float, capacidade: int):
+        self.taxa = taxa
+        self.capacidade = max(1, capacidade)
+        self._fichas = float(self.capacidade)
+        self._atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self) -> float:
+        """
+        Consome uma ficha sem esperar (usado por quem espera de outra forma, como o cliente assíncrono).
+
+        Returns:
+            float: Tempo, em segundos, que deve ser esperado antes de usar a ficha.
+        """
+        if self.taxa <= 0:
+            return 0.0
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.capacidade, self._fichas + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            self._fichas -= 1
+            return -self._fichas / self.taxa if self._fichas < 0 else 0.0
+
+    def adquirir(self) -> float:
+        """
+        Consome uma ficha, esperando se necessário.
+
+        Returns:
+            float: Tempo esperado, em segundos.
+        """
+        espera = self.reservar()
+        if espera:
+            time.sleep(espera)
+        return espera
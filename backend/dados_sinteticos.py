@@ -0,0 +1,113 @@
+import string
+import numpy as np
+import pandas as pd
+
+# Indicadores usados pela estratégia e colunas extras que completam a largura típica do planilhão
+INDICADORES = ["roc", "roe", "roic", "earning_yield", "dividend_yield", "p_vp"]
+COLUNAS_EXTRAS = [
+    "preco", "valor_mercado", "valor_firma", "ebit", "ebitda", "lucro_liquido", "patrimonio_liquido",
+    "receita_liquida", "divida_bruta", "divida_liquida", "margem_bruta", "margem_ebit", "margem_liquida",
+    "p_l", "ev_ebit", "ev_ebitda", "liquidez_corrente", "giro_ativos", "cagr_receita", "cagr_lucro",
+]
+SETORES = [
+    "Bens Industriais", "Comunicações", "Consumo Cíclico", "Consumo não Cíclico", "Financeiro",
+    "Materiais Básicos", "Petróleo, Gás e Biocombustíveis", "Saúde", "Tecnologia da Informação", "Utilidade Pública",
+]
+CLASSES_ACOES = ["3", "4", "5", "6", "11"]
+
+
+def gerar_tickers(n: int, seed: int = 0):
+    """
+    Gera tickers no formato da B3, com algumas empresas listadas em mais de uma classe de ação.
+
+    Args:
+        n (int): Quantidade de tickers.
+        seed (int, opcional): Semente do gerador aleatório.
+
+    Returns:
+        list: Lista de `n` tickers únicos, por exemplo ['ABCD3', 'ABCD4', 'EFGH3'].
+    """
+    rng = np.random.default_rng(seed)
+    letras = np.array(list(string.ascii_uppercase))
+    tickers, vistos = [], set()
+    while len(tickers) < n:
+        empresa = "".join(rng.choice(letras, 4))
+        if empresa in vistos:
+            continue
+        vistos.add(empresa)
+        # Cerca de 30% das empresas têm mais de uma classe de ação.
+        n_classes = rng.choice([1, 2, 3], p=[0.7, 0.22, 0.08])
+        for classe in rng.choice(CLASSES_ACOES, n_classes, replace=False):
+            tickers.append(f"{empresa}{classe}")
+    return tickers[:n]
+
+
+def gerar_planilhao(n_linhas: int = 1000, data_base="2024-01-02", seed: int = 0) -> dict:
+    """
+    Gera um payload sintético no formato do endpoint `planilhao`.
+
+    Args:
+        n_linhas (int, opcional): Quantidade de tickers. Padrão: 1000.
+        data_base (date | str, opcional): Data base informada nas linhas.
+        seed (int, opcional): Semente do gerador aleatório.
+
+    Returns:
+        dict: Payload no formato {'dados': [ {...}, ... ]}.
+    """
+    rng = np.random.default_rng(seed)
+    tickers = gerar_tickers(n_linhas, seed)
+    df = pd.DataFrame({"ticker": tickers})
+    df["setor"] = rng.choice(SETORES, n_linhas)
+    df["data_base"] = pd.Timestamp(data_base).strftime("%Y-%m-%d")
+    df["roc"] = rng.normal(0.12, 0.15, n_linhas)
+    df["roe"] = rng.normal(0.10, 0.20, n_linhas)
+    df["roic"] = rng.normal(0.09, 0.12, n_linhas)
+    df["earning_yield"] = rng.normal(0.08, 0.10, n_linhas)
+    df["dividend_yield"] = rng.exponential(0.05, n_linhas)
+    df["p_vp"] = rng.lognormal(0.3, 0.7, n_linhas)
+    # Volume inteiro em faixa estreita para produzir empates, com alguns valores ausentes.
+    volume = rng.integers(0, 50, n_linhas).astype(float) * 1e5
+    volume[rng.random(n_linhas) < 0.02] = np.nan
+    df["volume"] = volume
+    for coluna in COLUNAS_EXTRAS:
+        df[coluna] = rng.normal(0, 1e6, n_linhas)
+    # Indicadores ausentes ocorrem no planilhão real (empresas sem balanço recente).
+    for coluna in INDICADORES:
+        df.loc[rng.random(n_linhas) < 0.03, coluna] = np.nan
+    registros = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    return {"dados": registros}
+
+
+def gerar_precos(ticker: str, data_ini, data_fim, preco_inicial: float = None, seed: int = None) -> dict:
+    """
+    Gera um payload sintético no formato dos endpoints `preco-corrigido` e `preco-diversos`.
+
+    Os preços seguem um passeio aleatório geométrico em dias úteis, determinístico por ticker.
+
+    Args:
+        ticker (str): Ticker da série.
+        data_ini (date | str): Data inicial.
+        data_fim (date | str): Data final.
+        preco_inicial (float, opcional): Preço no primeiro dia. Padrão: sorteado a partir do ticker.
+        seed (int, opcional): Semente do gerador. Padrão: derivada do ticker.
+
+    Returns:
+        dict: Payload no formato {'dados': [{'data': 'YYYY-MM-DD', 'fechamento': float}, ...]}.
+    """
+    if seed is None:
+        seed = sum(ord(c) * (i + 1) for i, c in enumerate(ticker))
+    # A série é sempre gerada a partir de uma origem fixa, para que períodos sobrepostos coincidam.
+    dias = np.arange(np.datetime64("2000-01-03"), np.datetime64(pd.Timestamp(data_fim).date()) + 1)
+    datas = dias[np.is_busday(dias)]
+    rng = np.random.default_rng(seed)
+    inicial = preco_inicial or float(rng.uniform(5, 100))
+    retornos = rng.normal(0.0003, 0.02, len(datas))
+    precos = inicial * np.exp(np.cumsum(retornos))
+    mascara = datas >= np.datetime64(pd.Timestamp(data_ini).date())
+    textos = np.datetime_as_string(datas[mascara], unit="D")
+    return {
+        "dados": [
+            {"data": d, "fechamento": p}
+            for d, p in zip(textos.tolist(), np.round(precos[mascara], 4).tolist())
+        ]
+    }
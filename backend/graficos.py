@@ -0,0 +1,120 @@
+import time
+import logging
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from backend.config import GRAFICO_LIMITE_WEBGL, GRAFICO_PONTOS_ALVO
+from backend.metricas import metricas, BALDES_BYTES
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Estimativa do JSON de uma figura: layout e template, mais cada ponto (data ISO e valor)
+BYTES_FIGURA = 6600
+BYTES_POR_PONTO = 36
+
+
+def lttb(x, y, n_alvo: int) -> np.ndarray:
+    """
+    Reduz uma série ao número de pontos desejado preservando sua forma (Largest-Triangle-Three-Buckets).
+
+    O primeiro e o último ponto são mantidos; os demais são divididos em `n_alvo - 2` faixas e, de cada
+    faixa, fica o ponto que forma o maior triângulo com o ponto escolhido na faixa anterior e a média
+    da faixa seguinte. Picos e vales, que definem o desenho da curva, são preservados.
+
+    Args:
+        x (array-like): Eixo x, numérico ou datetime64, em ordem crescente.
+        y (array-like): Valores da série (valores ausentes nunca são escolhidos, salvo se a faixa toda for ausente).
+        n_alvo (int): Quantidade de pontos desejada.
+
+    Returns:
+        np.ndarray: Posições dos pontos escolhidos, em ordem crescente.
+    """
+    n = len(y)
+    if n_alvo >= n or n_alvo < 3:
+        return np.arange(n)
+    x = np.asarray(x)
+    x = (x.astype('datetime64[ns]').astype(np.int64) if x.dtype.kind == 'M' else x).astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    bordas = np.linspace(1, n - 1, n_alvo - 1).astype(np.int64)  # n_alvo - 2 faixas entre o primeiro e o último
+    indices = np.empty(n_alvo, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(n_alvo - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        seguinte = slice(bordas[i + 1], bordas[i + 2]) if i + 2 < len(bordas) else slice(n - 1, n)
+        trecho = y[seguinte]
+        media_x = x[seguinte].mean()
+        media_y = np.nanmean(trecho) if not np.isnan(trecho).all() else y[anterior]
+        area = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                      - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        area = np.where(np.isnan(area), -1.0, area)
+        anterior = inicio + int(np.argmax(area))
+        indices[i + 1] = anterior
+    return indices
+
+
+def linha_retorno(x, y, nome: str, cor: str, janela=None, pontos_alvo: int = None, limite_webgl: int = None):
+    """
+    Monta o trace de uma linha de retorno, adaptado ao tamanho da série.
+
+    Dentro da janela pedida, séries acima de `limite_webgl` pontos viram `go.Scattergl` (WebGL) e são
+    reduzidas com LTTB a `pontos_alvo` pontos; séries menores, como uma janela de zoom curta, são
+    enviadas em resolução total com `go.Scatter` (SVG).
+
+    Args:
+        x (array-like): Datas da série.
+        y (array-like): Valores da série.
+        nome (str): Nome da linha na legenda.
+        cor (str): Cor da linha.
+        janela (tuple, opcional): (inicio, fim) do trecho exibido. Padrão: a série inteira.
+        pontos_alvo (int, opcional): Orçamento de pontos por linha. Padrão: GRAFICO_PONTOS_ALVO.
+        limite_webgl (int, opcional): Pontos a partir dos quais a linha é reduzida e usa WebGL.
+            Padrão: GRAFICO_LIMITE_WEBGL.
+
+    Returns:
+        go.Scatter | go.Scattergl: Trace pronto para `fig.add_trace`.
+    """
+    pontos_alvo = pontos_alvo or GRAFICO_PONTOS_ALVO
+    limite_webgl = limite_webgl or GRAFICO_LIMITE_WEBGL
+    x = pd.to_datetime(pd.Series(x)).to_numpy()
+    y = np.asarray(y, dtype=np.float64)
+    if janela is not None:
+        mascara = (x >= np.datetime64(pd.Timestamp(janela[0]))) & (x <= np.datetime64(pd.Timestamp(janela[1])))
+        x, y = x[mascara], y[mascara]
+
+    if len(y) <= limite_webgl:
+        return go.Scatter(x=x, y=y, mode='lines', name=nome, line=dict(color=cor, width=2))
+    indices = lttb(x, y, pontos_alvo)
+    logger.info("Linha '%s' reduzida de %s para %s pontos (LTTB, WebGL).", nome, len(y), len(indices))
+    return go.Scattergl(x=x[indices], y=y[indices], mode='lines', name=nome, line=dict(color=cor, width=2))
+
+
+def exibir_grafico(fig: go.Figure, descricao: str):
+    """
+    Exibe a figura no Streamlit e registra o tamanho do payload enviado ao navegador e o tempo de renderização.
+
+    O payload é estimado pelo número de pontos (serializar a figura só para medi-la dobraria o
+    custo da renderização); com o log em DEBUG, o tamanho exato é medido.
+
+    Args:
+        fig (go.Figure): Figura a exibir.
+        descricao (str): Descrição do gráfico usada no log.
+
+    Returns:
+        None
+    """
+    pontos = sum(len(trace.x) for trace in fig.data if trace.x is not None)
+    if logger.isEnabledFor(logging.DEBUG):
+        payload = len(fig.to_json())
+    else:
+        payload = BYTES_FIGURA + BYTES_POR_PONTO * pontos
+    payload_kb = payload / 1024
+    inicio = time.perf_counter()
+    st.plotly_chart(fig, use_container_width=True)  # Exibe o gráfico no Streamlit.
+    metricas.observar("grafico_render_segundos", time.perf_counter() - inicio, grafico=descricao)
+    metricas.observar("grafico_payload_bytes", payload, baldes=BALDES_BYTES, grafico=descricao)
+    logger.info("Gráfico '%s' renderizado | Pontos: %s, payload: %.1f KB, tempo: %.1f ms",
+                descricao, pontos, payload_kb, (time.perf_counter() - inicio) * 1000)
@@ -0,0 +1,153 @@
+import os
+import json
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qsl
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Modos de transporte aceitos pelo cliente da API
+MODOS = ('rede', 'gravar', 'reproduzir')
+
+# Cabeçalhos da resposta original que valem a pena guardar na gravação
+CABECALHOS_GRAVADOS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def chave_gravacao(endpoint: str, params: dict) -> str:
+    """
+    Monta a chave de uma gravação a partir do endpoint e dos parâmetros da consulta.
+
+    A chave não inclui cabeçalhos, portanto o token nunca faz parte do nome nem do conteúdo do arquivo.
+
+    Args:
+        endpoint (str): Nome do endpoint, por exemplo 'planilhao'.
+        params (dict): Parâmetros da query string.
+
+    Returns:
+        str: Caminho relativo da gravação, no formato '<endpoint>/<hash>.json'.
+    """
+    consulta = '&'.join(f'{k}={v}' for k, v in sorted((str(k), str(v)) for k, v in params.items()))
+    return f"{endpoint}/{hashlib.sha1(consulta.encode()).hexdigest()[:20]}.json"
+
+
+def _endpoint_e_params(url: str):
+    """
+    Extrai o endpoint (último trecho do caminho) e os parâmetros de uma URL da API.
+
+    Args:
+        url (str): URL completa da requisição.
+
+    Returns:
+        Tuple[str, dict]: Endpoint e parâmetros da query string.
+    """
+    partes = urlsplit(url)
+    return partes.path.rstrip('/').rsplit('/', 1)[-1], dict(parse_qsl(partes.query))
+
+
+def ler_gravacao(pasta: str, endpoint: str, params: dict):
+    """
+    Lê a gravação de uma consulta.
+
+    Args:
+        pasta (str): Pasta das gravações.
+        endpoint (str): Nome do endpoint.
+        params (dict): Parâmetros da query string.
+
+    Returns:
+        dict or None: Gravação {'status', 'cabecalhos', 'corpo', ...}, ou None se não existir.
+    """
+    caminho = os.path.join(pasta, chave_gravacao(endpoint, params))
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def salvar_gravacao(pasta: str, endpoint: str, params: dict, status: int, cabecalhos: dict, corpo: str):
+    """
+    Grava a resposta de uma consulta em disco (escrita atômica).
+
+    Args:
+        pasta (str): Pasta das gravações.
+        endpoint (str): Nome do endpoint.
+        params (dict): Parâmetros da query string.
+        status (int): Código de status HTTP.
+        cabecalhos (dict): Cabeçalhos relevantes da resposta.
+        corpo (str): Corpo da resposta já descomprimido.
+
+    Returns:
+        None
+    """
+    caminho = os.path.join(pasta, chave_gravacao(endpoint, params))
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump({'endpoint': endpoint, 'params': params, 'status': status,
+                   'cabecalhos': cabecalhos, 'corpo': corpo}, arquivo, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+class AdaptadorGravacao(BaseAdapter):
+    """
+    Transporte do `requests` que grava as respostas da API em disco ou as reproduz sem acessar a rede.
+
+    No modo 'gravar' a requisição segue pelo adaptador real (com pool e novas tentativas) e as
+    respostas 200 são gravadas. No modo 'reproduzir' a resposta vem da gravação; consultas sem
+    gravação recebem 404, como um endpoint sem dados.
+
+    Args:
+        modo (str): 'gravar' ou 'reproduzir'.
+        pasta (str): Pasta das gravações.
+        adaptador (requests.adapters.BaseAdapter, opcional): Adaptador real, usado no modo 'gravar'.
+    """
+
+    def __init__(self, modo: str, pasta: str, adaptador: BaseAdapter = None):
+        super().__init__()
+        if modo not in ('gravar', 'reproduzir'):
+            raise ValueError(f"Modo de gravação inválido: {modo}. Use 'gravar' ou 'reproduzir'.")
+        if modo == 'gravar' and adaptador is None:
+            raise ValueError("O modo 'gravar' precisa do adaptador real da rede.")
+        self.modo = modo
+        self.pasta = pasta
+        self.adaptador = adaptador
+
+    def send(self, request, **kwargs):
+        endpoint, params = _endpoint_e_params(request.url)
+        if self.modo == 'reproduzir':
+            return self._reproduzir(request, endpoint, params)
+
+        resposta = self.adaptador.send(request, **kwargs)
+        if resposta.status_code == 200:
+            try:
+                cabecalhos = {k: resposta.headers[k] for k in CABECALHOS_GRAVADOS if k in resposta.headers}
+                salvar_gravacao(self.pasta, endpoint, params, resposta.status_code, cabecalhos, resposta.text)
+                logger.info("Resposta gravada: %s %s", endpoint, params)
+            except Exception as e:
+                logger.warning("Erro ao gravar a resposta de %s %s | %s", endpoint, params, e)
+        return resposta
+
+    def _reproduzir(self, request, endpoint: str, params: dict):
+        """Monta a resposta a partir da gravação (ou um 404 quando não há gravação)."""
+        gravacao = ler_gravacao(self.pasta, endpoint, params)
+        resposta = requests.Response()
+        resposta.request = request
+        resposta.url = request.url
+        resposta.encoding = 'utf-8'
+        resposta._content_consumed = True  # O corpo já está em memória, inclusive para leituras em streaming.
+        if gravacao is None:
+            logger.warning("Gravação ausente para %s %s", endpoint, params)
+            resposta.status_code, resposta.reason = 404, 'Not Found'
+            resposta._content = f"Gravação ausente para {endpoint} {params}".encode('utf-8')
+            return resposta
+        resposta.status_code, resposta.reason = gravacao['status'], 'OK'
+        resposta.headers = CaseInsensitiveDict(gravacao.get('cabecalhos', {}))
+        resposta._content = gravacao['corpo'].encode('utf-8')
+        return resposta
+
+    def close(self):
+        if self.adaptador is not None:
+            self.adaptador.close()
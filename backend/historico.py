@@ -0,0 +1,395 @@
+import os
+import re
+import json
+import asyncio
+import threading
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from backend.config import CACHE_DIR
+from backend.metricas import metricas
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Diretório onde ficam as séries históricas locais (uma pasta por endpoint)
+HISTORICO_DIR = os.path.join(CACHE_DIR, "historico")
+
+UM_DIA = timedelta(days=1)
+
+# Distância máxima, em dias corridos, entre uma lacuna e o pregão armazenado para que a consulta seja
+# estendida até ele (cobre fins de semana e feriados sem baixar períodos que ninguém pediu)
+MAX_DIAS_ANCORA = 7
+
+# Diferença relativa a partir da qual um preço já armazenado é considerado em outra base de ajuste
+TOLERANCIA_AJUSTE = 1e-6
+
+
+def _para_data(valor) -> date:
+    """
+    Converte datas em texto, date ou Timestamp para `date`.
+
+    Args:
+        valor (date | str | pd.Timestamp): Data a ser convertida.
+
+    Returns:
+        date: Data convertida.
+    """
+    return pd.Timestamp(valor).date()
+
+
+def calcular_lacunas(intervalos, data_ini: date, data_fim: date):
+    """
+    Calcula os trechos de [data_ini, data_fim] que não estão cobertos pelos intervalos já armazenados.
+
+    Args:
+        intervalos (list): Lista de tuplas (inicio, fim) de datas já cobertas, inclusivas.
+        data_ini (date): Início do período desejado.
+        data_fim (date): Fim do período desejado.
+
+    Returns:
+        list: Lista de tuplas (inicio, fim) que precisam ser buscadas na API.
+    """
+    lacunas = []
+    cursor = data_ini
+    for inicio, fim in sorted(intervalos):
+        if fim < cursor:
+            continue
+        if inicio > data_fim:
+            break
+        if inicio > cursor:
+            lacunas.append((cursor, inicio - UM_DIA))
+        cursor = max(cursor, fim + UM_DIA)
+        if cursor > data_fim:
+            break
+    if cursor <= data_fim:
+        lacunas.append((cursor, data_fim))
+    return lacunas
+
+
+def unir_intervalos(intervalos):
+    """
+    Une intervalos de datas sobrepostos ou adjacentes.
+
+    Args:
+        intervalos (list): Lista de tuplas (inicio, fim) de datas, inclusivas.
+
+    Returns:
+        list: Lista ordenada de intervalos disjuntos.
+    """
+    unidos = []
+    for inicio, fim in sorted(intervalos):
+        if unidos and inicio <= unidos[-1][1] + UM_DIA:
+            unidos[-1] = (unidos[-1][0], max(unidos[-1][1], fim))
+        else:
+            unidos.append((inicio, fim))
+    return unidos
+
+
+class HistoricoPrecos:
+    """
+    Armazena localmente a série histórica de preços de cada ticker e busca na API apenas as lacunas.
+
+    Para cada ticker são mantidos um arquivo Parquet com os preços e um arquivo JSON com os
+    intervalos de datas já cobertos. Uma consulta busca somente os trechos ainda não cobertos,
+    incorpora os dados novos à série e devolve o período pedido. O dia de hoje em diante nunca
+    é marcado como coberto, pois o pregão ainda pode estar em andamento.
+
+    Lacunas vizinhas da série são pedidas junto com o pregão armazenado mais próximo (a âncora); se
+    nenhuma for vizinha, a âncora é pedida em uma consulta de um dia. Se o preço da âncora
+    na resposta diferir do armazenado, a série guardada está em outra base de ajuste (um provento ou
+    desdobramento novo foi aplicado pela API) e ela é buscada de novo por inteiro, para não criar um
+    retorno falso na emenda. Quem guarda cópias derivadas da série (como o painel de preços) é avisado
+    por `ao_reconstruir`, para descartá-las.
+
+    Args:
+        nome (str): Nome da série, usado como subpasta do histórico (por exemplo 'preco-corrigido').
+        consultar (callable): Função `consultar(ticker, data_ini, data_fim)` que retorna o JSON da API ou None.
+        ao_reconstruir (callable, opcional): Função `ao_reconstruir(ticker)` chamada depois que a série de um
+            ticker é substituída por outra base de ajuste.
+    """
+
+    def __init__(self, nome: str, consultar, ao_reconstruir=None):
+        self.nome = nome
+        self.diretorio = os.path.join(HISTORICO_DIR, nome)
+        self.consultar = consultar
+        self.ao_reconstruir = ao_reconstruir
+        self._locks = {}
+        self._lock_locks = threading.Lock()
+
+    def _lock(self, ticker: str) -> threading.Lock:
+        """Retorna o lock do ticker, serializando atualizações concorrentes da mesma série."""
+        with self._lock_locks:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _caminhos(self, ticker: str):
+        """Retorna os caminhos dos arquivos de preços e de cobertura do ticker."""
+        nome = re.sub(r"[^A-Za-z0-9_.-]", "_", ticker)
+        base = os.path.join(self.diretorio, nome)
+        return f"{base}.parquet", f"{base}.json"
+
+    def _ler(self, ticker: str):
+        """
+        Lê a série e os intervalos cobertos de um ticker.
+
+        Returns:
+            Tuple[pd.DataFrame, list]: Série armazenada (vazia se não houver) e intervalos cobertos.
+        """
+        caminho_dados, caminho_cobertura = self._caminhos(ticker)
+        if not (os.path.exists(caminho_dados) and os.path.exists(caminho_cobertura)):
+            return pd.DataFrame(), []
+        try:
+            with open(caminho_cobertura, encoding="utf-8") as arquivo:
+                intervalos = [(_para_data(ini), _para_data(fim)) for ini, fim in json.load(arquivo)["intervalos"]]
+            return pd.read_parquet(caminho_dados), intervalos
+        except Exception as e:
+            logger.warning("Histórico de %s ilegível para %s, será reconstruído | %s", self.nome, ticker, e)
+            return pd.DataFrame(), []
+
+    def _gravar(self, ticker: str, df: pd.DataFrame, intervalos):
+        """Grava a série e os intervalos cobertos de um ticker de forma atômica."""
+        caminho_dados, caminho_cobertura = self._caminhos(ticker)
+        os.makedirs(self.diretorio, exist_ok=True)
+        sufixo = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(caminho_dados + sufixo, index=False)
+        os.replace(caminho_dados + sufixo, caminho_dados)
+        with open(caminho_cobertura + sufixo, "w", encoding="utf-8") as arquivo:
+            json.dump({"intervalos": [(ini.isoformat(), fim.isoformat()) for ini, fim in intervalos]}, arquivo)
+        os.replace(caminho_cobertura + sufixo, caminho_cobertura)
+
+    @staticmethod
+    def _consultas(df: pd.DataFrame, lacunas):
+        """
+        Monta as consultas das lacunas de forma que as respostas tragam ao menos um pregão já
+        armazenado (a âncora), usado para comparar as bases de ajuste.
+
+        Lacunas vizinhas da série (a até MAX_DIAS_ANCORA dias de um pregão armazenado) são estendidas
+        até esse pregão. Se nenhuma for vizinha, o último pregão armazenado é pedido à parte, em uma
+        consulta de um dia (o último já fechado), em vez de baixar todo o período entre a série e a lacuna.
+
+        Args:
+            df (pd.DataFrame): Série armazenada.
+            lacunas (list): Lacunas (inicio, fim) a buscar.
+
+        Returns:
+            list: Períodos (inicio, fim) a consultar: um por lacuna, na mesma ordem, mais a consulta
+                da âncora ao final quando necessária.
+        """
+        if df.empty:
+            return list(lacunas)
+        datas = df['data'].dt.date.to_numpy()  # Ordenadas: a série é gravada em ordem de data.
+        limite = timedelta(days=MAX_DIAS_ANCORA)
+        consultas, ancorada = [], False
+        for inicio, fim in lacunas:
+            posicao = np.searchsorted(datas, inicio)
+            if posicao > 0 and inicio - datas[posicao - 1] <= limite:
+                consultas.append((datas[posicao - 1], fim))
+                ancorada = True
+            elif posicao < len(datas) and datas[posicao] - fim <= limite:
+                consultas.append((inicio, max(fim, datas[posicao])))
+                ancorada = True
+            else:
+                consultas.append((inicio, fim))
+        fechadas = datas[datas < date.today()]  # O pregão de hoje pode estar em andamento e não serve de âncora.
+        if not ancorada and len(fechadas):
+            consultas.append((fechadas[-1], fechadas[-1]))
+        return consultas
+
+    @staticmethod
+    def _base_divergente(df: pd.DataFrame, intervalos, respostas) -> bool:
+        """
+        Indica se algum dia coberto da série armazenada tem, nas respostas, valores diferentes (a API
+        passou a ajustar os preços por um evento posterior à gravação). Dias não cobertos, como o
+        pregão de hoje gravado ainda em andamento, não entram na comparação.
+
+        Args:
+            df (pd.DataFrame): Série armazenada.
+            intervalos (list): Intervalos cobertos pela série armazenada.
+            respostas (list): JSON retornado pela API para cada consulta, ou None.
+
+        Returns:
+            bool: True se a série armazenada precisa ser buscada de novo.
+        """
+        if df.empty or not intervalos:
+            return False
+        coberto = np.zeros(len(df), dtype=bool)
+        for inicio, fim in intervalos:
+            coberto |= ((df['data'] >= pd.Timestamp(inicio)) & (df['data'] <= pd.Timestamp(fim))).to_numpy()
+        df = df[coberto]
+        novos = [pd.DataFrame.from_dict(r['dados']) for r in respostas if r and r.get('dados')]
+        if not novos:
+            return False
+        novos = pd.concat(novos, ignore_index=True)
+        novos['data'] = pd.to_datetime(novos['data'])
+        comuns = df.merge(novos, on='data', suffixes=('_guardado', '_novo'))
+        for coluna in df.columns.drop('data'):
+            if f'{coluna}_novo' not in comuns or not pd.api.types.is_numeric_dtype(df[coluna]):
+                continue
+            guardado = comuns[f'{coluna}_guardado'].to_numpy(dtype=float)
+            novo = comuns[f'{coluna}_novo'].to_numpy(dtype=float)
+            if not np.allclose(guardado, novo, rtol=TOLERANCIA_AJUSTE, atol=0, equal_nan=True):
+                return True
+        return False
+
+    def _reconstruir(self, ticker: str, intervalos, data_ini: date, data_fim: date):
+        """
+        Registra a reconstrução de uma série e devolve os períodos a buscar: os intervalos que estavam
+        armazenados mais o pedido (sem os trechos entre eles, que ninguém pediu). Se alguma busca
+        falhar, a série armazenada é mantida.
+
+        Returns:
+            list: Consultas (inicio, fim).
+        """
+        consultas = unir_intervalos(list(intervalos) + [(data_ini, data_fim)])
+        logger.warning("Histórico de %s para %s em outra base de ajuste; buscando a série inteira (%s a %s, %s consultas)",
+                       self.nome, ticker, consultas[0][0], consultas[-1][1], len(consultas))
+        metricas.incrementar("historico_reconstrucoes_total", serie=self.nome)
+        return consultas
+
+    def _avisar_reconstrucao(self, ticker: str):
+        """Avisa `ao_reconstruir` de que a série do ticker foi substituída; falhas não interrompem a consulta."""
+        if self.ao_reconstruir is None:
+            return
+        try:
+            self.ao_reconstruir(ticker)
+        except Exception as e:
+            logger.warning("Erro ao avisar a reconstrução do histórico de %s para %s | %s", self.nome, ticker, e)
+
+    def _incorporar(self, ticker: str, df: pd.DataFrame, intervalos, lacunas, respostas) -> pd.DataFrame:
+        """
+        Incorpora à série as respostas da API para cada lacuna e grava o resultado.
+
+        O lock do ticker já deve estar adquirido.
+
+        Args:
+            ticker (str): Ticker da série.
+            df (pd.DataFrame): Série armazenada.
+            intervalos (list): Intervalos cobertos pela série armazenada (a lista é atualizada).
+            lacunas (list): Lacunas consultadas, na mesma ordem de `respostas`.
+            respostas (list): JSON retornado pela API para cada lacuna, ou None em caso de falha.
+
+        Returns:
+            pd.DataFrame: Série atualizada.
+        """
+        ontem = date.today() - UM_DIA
+        novos = []
+        for (inicio, fim), dados in zip(lacunas, respostas):
+            if not dados or 'dados' not in dados:
+                continue  # Falha na API: a lacuna continua descoberta e será tentada de novo.
+            df_lacuna = pd.DataFrame.from_dict(dados['dados'])
+            if not df_lacuna.empty:
+                df_lacuna['data'] = pd.to_datetime(df_lacuna['data'])
+                novos.append(df_lacuna)
+            # Só marca como coberto o que já está fechado (até ontem).
+            if inicio <= ontem:
+                intervalos.append((inicio, min(fim, ontem)))
+
+        if novos:
+            df = pd.concat([d for d in [df] + novos if not d.empty], axis=0, ignore_index=True)
+            df = df.drop_duplicates(subset='data', keep='last').sort_values('data').reset_index(drop=True)
+        try:
+            self._gravar(ticker, df, unir_intervalos(intervalos))
+        except Exception as e:
+            logger.warning("Erro ao gravar o histórico de %s para %s | %s", self.nome, ticker, e)
+        return df
+
+    @staticmethod
+    def _recortar(df: pd.DataFrame, data_ini: date, data_fim: date) -> pd.DataFrame:
+        """Devolve apenas o período pedido da série."""
+        if df.empty:
+            return df
+        mascara = (df['data'] >= pd.Timestamp(data_ini)) & (df['data'] <= pd.Timestamp(data_fim))
+        return df[mascara].reset_index(drop=True)
+
+    def obter(self, ticker: str, data_ini, data_fim) -> pd.DataFrame:
+        """
+        Retorna a série do ticker no período pedido, buscando na API apenas os trechos ausentes.
+
+        Args:
+            ticker (str): Ticker da ação ou do índice.
+            data_ini (date | str): Data inicial do período.
+            data_fim (date | str): Data final do período.
+
+        Returns:
+            pd.DataFrame: Preços do período ordenados por data, com a coluna 'data' em datetime64.
+                Vazio se não houver dados armazenados nem retornados pela API.
+        """
+        data_ini, data_fim = _para_data(data_ini), _para_data(data_fim)
+        substituida = False
+        with self._lock(ticker):
+            df, intervalos = self._ler(ticker)
+            lacunas = calcular_lacunas(intervalos, data_ini, data_fim)
+            metricas.incrementar("cache_consultas_total", cache=f"historico_{self.nome}",
+                                 resultado="falta" if lacunas else "acerto")
+            if lacunas:
+                consultas = self._consultas(df, lacunas)
+                respostas = []
+                for inicio, fim in consultas:
+                    logger.info("Buscando lacuna de %s para %s: %s a %s", self.nome, ticker, inicio, fim)
+                    respostas.append(self.consultar(ticker, inicio.isoformat(), fim.isoformat()))
+                if self._base_divergente(df, intervalos, respostas):
+                    consultas = self._reconstruir(ticker, intervalos, data_ini, data_fim)
+                    respostas = [self.consultar(ticker, inicio.isoformat(), fim.isoformat()) for inicio, fim in consultas]
+                    if all(r and 'dados' in r for r in respostas):
+                        df, intervalos = pd.DataFrame(), []  # A série nova substitui a armazenada.
+                        substituida = True
+                    else:
+                        respostas = [None] * len(consultas)  # Sem misturar bases: a série armazenada fica como está.
+                df = self._incorporar(ticker, df, intervalos, consultas, respostas)
+            else:
+                logger.info("Histórico de %s para %s servido localmente de %s a %s", self.nome, ticker, data_ini, data_fim)
+        if substituida:
+            self._avisar_reconstrucao(ticker)
+        return self._recortar(df, data_ini, data_fim)
+
+    async def obter_async(self, ticker: str, data_ini, data_fim, consultar_async) -> pd.DataFrame:
+        """
+        Versão assíncrona de `obter`: as lacunas são buscadas com `consultar_async`, sem bloquear o loop.
+
+        O lock do ticker é adquirido apenas para incorporar os dados novos, e a série é relida nesse
+        momento para não perder o que outra thread gravou durante a espera. A leitura e a gravação
+        dos arquivos (e a espera pelo lock, que `obter` segura durante a busca na API) rodam em uma
+        thread à parte (`asyncio.to_thread`), para não travar as demais corrotinas do loop.
+
+        Args:
+            ticker (str): Ticker da ação ou do índice.
+            data_ini (date | str): Data inicial do período.
+            data_fim (date | str): Data final do período.
+            consultar_async (callable): Corrotina `consultar_async(ticker, data_ini, data_fim)` que
+                retorna o JSON da API ou None.
+
+        Returns:
+            pd.DataFrame: Preços do período, no mesmo formato de `obter`.
+        """
+        data_ini, data_fim = _para_data(data_ini), _para_data(data_fim)
+        df, intervalos = await asyncio.to_thread(self._ler, ticker)
+        lacunas = calcular_lacunas(intervalos, data_ini, data_fim)
+        metricas.incrementar("cache_consultas_total", cache=f"historico_{self.nome}",
+                             resultado="falta" if lacunas else "acerto")
+        if not lacunas:
+            logger.info("Histórico de %s para %s servido localmente de %s a %s", self.nome, ticker, data_ini, data_fim)
+            return self._recortar(df, data_ini, data_fim)
+
+        consultas = self._consultas(df, lacunas)
+        for inicio, fim in consultas:
+            logger.info("Buscando lacuna de %s para %s: %s a %s", self.nome, ticker, inicio, fim)
+        respostas = await asyncio.gather(*(consultar_async(ticker, inicio.isoformat(), fim.isoformat())
+                                           for inicio, fim in consultas))
+        substituir = False
+        if self._base_divergente(df, intervalos, respostas):
+            consultas = self._reconstruir(ticker, intervalos, data_ini, data_fim)
+            respostas = await asyncio.gather(*(consultar_async(ticker, inicio.isoformat(), fim.isoformat())
+                                               for inicio, fim in consultas))
+            substituir = all(r and 'dados' in r for r in respostas)
+            if not substituir:
+                respostas = [None] * len(consultas)  # Sem misturar bases: a série armazenada fica como está.
+
+        def incorporar():
+            with self._lock(ticker):
+                df, intervalos = (pd.DataFrame(), []) if substituir else self._ler(ticker)
+                return self._incorporar(ticker, df, intervalos, consultas, respostas)
+
+        df = await asyncio.to_thread(incorporar)
+        if substituir:
+            await asyncio.to_thread(self._avisar_reconstrucao, ticker)
+        return self._recortar(df, data_ini, data_fim)
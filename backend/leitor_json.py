@@ -0,0 +1,185 @@
+import json
+import codecs
+from array import array
+from itertools import chain
+import numpy as np
+import pandas as pd
+
+# Decodificador reaproveitado para cada valor lido do fluxo
+_DECODIFICADOR = json.JSONDecoder()
+
+# Caracteres ignorados entre os elementos do JSON
+_ESPACOS = ' \t\n\r'
+
+
+class _Fonte:
+    """
+    Texto JSON lido aos poucos de um iterável de blocos de bytes (UTF-8).
+
+    Guarda apenas o trecho ainda não consumido: o buffer nunca passa de um bloco mais o
+    valor que estiver sendo decodificado.
+    """
+
+    def __init__(self, blocos):
+        self._blocos = iter(blocos)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.texto = ''
+        self.pos = 0
+        self.fim = False
+
+    def carregar(self) -> bool:
+        """Acrescenta o próximo bloco ao buffer; devolve False no fim do fluxo."""
+        if self.fim:
+            return False
+        bloco = next(self._blocos, None)
+        self.fim = bloco is None
+        self.texto = self.texto[self.pos:] + self._utf8.decode(bloco or b'', final=self.fim)
+        self.pos = 0
+        return not self.fim
+
+    def caractere(self) -> str:
+        """Pula os espaços e devolve o próximo caractere sem consumi-lo ('' no fim do fluxo)."""
+        while True:
+            while self.pos < len(self.texto) and self.texto[self.pos] in _ESPACOS:
+                self.pos += 1
+            if self.pos < len(self.texto):
+                return self.texto[self.pos]
+            if not self.carregar():
+                return ''
+
+    def consumir(self, esperados: str) -> str:
+        """Consome o próximo caractere, que deve ser um dos `esperados`."""
+        caractere = self.caractere()
+        if not caractere or caractere not in esperados:
+            raise json.JSONDecodeError(f"Esperado um de {esperados!r}", self.texto, self.pos)
+        self.pos += 1
+        return caractere
+
+    def valor(self):
+        """Decodifica o próximo valor JSON completo, lendo mais blocos enquanto ele estiver incompleto."""
+        self.caractere()
+        while True:
+            try:
+                valor, fim = _DECODIFICADOR.raw_decode(self.texto, self.pos)
+            except json.JSONDecodeError:
+                if self.carregar():
+                    continue
+                raise
+            # Um número que termina junto com o buffer pode continuar no próximo bloco.
+            if fim == len(self.texto) and self.carregar():
+                continue
+            self.pos = fim
+            return valor
+
+
+# Registros decodificados antes de serem distribuídos pelas colunas
+TAMANHO_LOTE = 256
+
+# Tipos que mantêm uma coluna numérica
+_TIPOS_NUMERICOS = {int, float, type(None)}
+
+
+class _Coluna:
+    """
+    Valores de uma coluna, acumulados já no tipo final.
+
+    Números (e ausentes) vão direto para um array float64; inteiros são guardados nele (exatos até
+    2**53) e a coluna volta a int64 no fim se não houver ausentes. Ao aparecer um texto ou outro
+    tipo, a coluna passa a ser de objetos.
+    """
+
+    __slots__ = ('valores', 'numerica', 'inteira')
+
+    def __init__(self, ausentes: int = 0):
+        self.valores = array('d', [np.nan]) * ausentes
+        self.numerica = True
+        self.inteira = ausentes == 0
+
+    def estender(self, valores: list):
+        """Acrescenta os valores de um lote de registros."""
+        if self.numerica:
+            tipos = set(map(type, valores))
+            if tipos <= _TIPOS_NUMERICOS:
+                self.valores.frombytes(np.array(valores, dtype=np.float64).tobytes())  # None vira NaN.
+                self.inteira = self.inteira and tipos <= {int}
+                return
+            self.valores = [None if v != v else (int(v) if self.inteira else v) for v in self.valores]
+            self.numerica = False
+        self.valores.extend(valores)
+
+    def array(self) -> np.ndarray:
+        if not self.numerica:
+            # np.array(..., dtype=object) tentaria montar uma matriz se todos os valores fossem listas do mesmo tamanho.
+            valores = np.empty(len(self.valores), dtype=object)
+            for posicao, valor in enumerate(self.valores):
+                valores[posicao] = valor
+            return valores
+        valores = np.frombuffer(self.valores, dtype=np.float64)
+        return valores.astype(np.int64) if self.inteira and len(valores) else valores
+
+
+def _distribuir(lote: list, tabela: dict, linhas: int, filtro):
+    """Distribui um lote de registros pelas colunas (as que faltam num registro ficam ausentes)."""
+    for coluna in dict.fromkeys(chain.from_iterable(lote)):  # Colunas novas, na ordem do payload.
+        if coluna not in tabela and (filtro is None or coluna in filtro):
+            tabela[coluna] = _Coluna(linhas)
+    for coluna, acumulada in tabela.items():
+        acumulada.estender([registro.get(coluna) for registro in lote])
+
+
+def ler_tabela_json(blocos, chave: str = 'dados', colunas=None) -> pd.DataFrame:
+    """
+    Lê, de um fluxo JSON no formato {..., "<chave>": [ {registro}, ... ], ...}, a lista de registros
+    como um DataFrame, sem montar o documento inteiro em memória.
+
+    Os registros são decodificados assim que chegam e distribuídos em lotes pelas colunas: apenas
+    as colunas pedidas são mantidas e os valores vão direto para arrays tipados (números em float64/int64, o resto como objetos). O pico
+    de memória fica perto do tamanho do DataFrame final. Os demais campos do envelope são ignorados.
+
+    Args:
+        blocos (Iterable[bytes]): Corpo da resposta em blocos, por exemplo `resposta.iter_content(...)`.
+        chave (str, opcional): Campo do envelope que contém a lista de registros. Padrão: 'dados'.
+        colunas (list, opcional): Colunas mantidas; as ausentes do payload são ignoradas. Padrão: todas.
+
+    Returns:
+        pd.DataFrame: Uma linha por registro, colunas na ordem em que aparecem no payload
+            (vazio se a chave não existir ou a lista estiver vazia).
+
+    Raises:
+        json.JSONDecodeError: Se o conteúdo não for um JSON válido no formato esperado.
+    """
+    filtro = None if colunas is None else set(colunas)
+    tabela, linhas = {}, 0
+    fonte = _Fonte(blocos)
+
+    fonte.consumir('{')
+    if fonte.caractere() == '}':
+        fonte.pos += 1
+    else:
+        while True:
+            nome = fonte.valor()
+            fonte.consumir(':')
+            if nome == chave and fonte.caractere() == '[':
+                fonte.pos += 1
+                if fonte.caractere() == ']':
+                    fonte.pos += 1
+                else:
+                    lote = []
+                    while True:
+                        registro = fonte.valor()
+                        if not isinstance(registro, dict):
+                            raise json.JSONDecodeError(f"Registro de '{chave}' não é um objeto", fonte.texto, fonte.pos)
+                        lote.append(registro)
+                        fim = fonte.consumir(',]') == ']'
+                        if fim or len(lote) == TAMANHO_LOTE:
+                            _distribuir(lote, tabela, linhas, filtro)
+                            linhas += len(lote)
+                            lote = []
+                        if fim:
+                            break
+            else:
+                fonte.valor()  # Outros campos do envelope são descartados.
+            if fonte.consumir(',}') == '}':
+                break
+
+    return pd.DataFrame({coluna: acumulada.array() for coluna, acumulada in tabela.items()}, index=pd.RangeIndex(linhas))
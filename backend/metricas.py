@@ -0,0 +1,354 @@
+import time
+import numbers
+import bisect
+import inspect
+import threading
+import functools
+import pandas as pd
+
+# Prefixo dos nomes exportados no formato Prometheus
+PREFIXO = "mcmv_"
+
+# Limites (le) dos histogramas: tempo em segundos, tamanho em bytes e quantidade de linhas
+BALDES_TEMPO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BALDES_BYTES = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+BALDES_LINHAS = (1, 10, 100, 1e3, 1e4, 1e5, 1e6, 1e7)
+
+# Descrição de cada métrica (linha HELP da exportação)
+DESCRICOES = {
+    "funcao_duracao_segundos": "Tempo de execução das funções instrumentadas de apis e views.",
+    "funcao_chamadas_total": "Chamadas das funções instrumentadas, por resultado (ok ou erro).",
+    "funcao_linhas": "Linhas devolvidas pelas funções instrumentadas (DataFrames e respostas da API).",
+    "api_requisicao_segundos": "Tempo de cada requisição HTTP à API, incluindo filas de concorrência e de taxa.",
+    "api_resposta_bytes": "Tamanho do corpo das respostas da API (descomprimido).",
+    "api_respostas_total": "Respostas da API por endpoint e status HTTP.",
+    "api_json_segundos": "Tempo de decodificação do JSON das respostas da API.",
+    "cache_consultas_total": "Consultas aos caches, por cache e resultado (acerto ou falta).",
+    "historico_reconstrucoes_total": "Séries do histórico local buscadas de novo por mudança na base de ajuste.",
+    "cache_memoria_bytes": "Memória ocupada pelo cache de resultados compartilhado entre as sessões.",
+    "cache_memoria_entradas": "Entradas no cache de resultados compartilhado entre as sessões.",
+    "grafico_payload_bytes": "Tamanho estimado da figura Plotly enviada ao navegador (exato com o log em DEBUG).",
+    "grafico_render_segundos": "Tempo de serialização e envio das figuras ao Streamlit.",
+}
+
+
+def _formatar_amostra(valor) -> str:
+    """
+    Formata o valor de uma amostra no formato Prometheus sem perder precisão.
+
+    Inteiros saem como estão e floats com `repr`, a menor representação que volta ao mesmo valor
+    (`{:g}` guardaria só 6 dígitos, e um contador de 1234567 sairia como 1.23457e+06).
+
+    Args:
+        valor (int | float): Valor da amostra.
+
+    Returns:
+        str: Texto da amostra ('+Inf', '-Inf' e 'NaN' para os valores especiais).
+    """
+    if isinstance(valor, numbers.Integral):
+        return str(valor)
+    valor = float(valor)
+    if valor != valor:
+        return "NaN"
+    if valor in (float('inf'), float('-inf')):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(valor)
+
+
+class Histograma:
+    """
+    Histograma cumulativo no modelo do Prometheus: contagem por limite superior, soma e total.
+
+    Args:
+        baldes (tuple): Limites superiores dos baldes, em ordem crescente.
+    """
+
+    def __init__(self, baldes):
+        self.baldes = tuple(baldes)
+        self.contagens = [0] * (len(self.baldes) + 1)  # O último balde é o +Inf.
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        """Registra uma observação."""
+        self.contagens[bisect.bisect_left(self.baldes, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def quantil(self, q: float) -> float:
+        """
+        Estima um quantil por interpolação linear dentro do balde que o contém.
+
+        Args:
+            q (float): Quantil desejado, entre 0 e 1.
+
+        Returns:
+            float: Valor estimado (o maior limite finito se cair no balde +Inf), ou NaN sem observações.
+        """
+        if not self.total:
+            return float('nan')
+        alvo = q * self.total
+        acumulado = 0
+        for i, contagem in enumerate(self.contagens):
+            if acumulado + contagem >= alvo and contagem:
+                if i == len(self.baldes):
+                    return self.baldes[-1]
+                inferior = self.baldes[i - 1] if i else 0.0
+                return inferior + (self.baldes[i] - inferior) * (alvo - acumulado) / contagem
+            acumulado += contagem
+        return self.baldes[-1]
+
+
+class RegistroMetricas:
+    """
+    Registro em memória das métricas do processo: contadores e histogramas com rótulos.
+
+    Todas as operações são protegidas por um único lock, pois o custo de cada uma é de poucos
+    microssegundos. Fontes que já mantêm seus próprios números (como o cache em memória) podem
+    registrar coletores, chamados apenas na exportação.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = {}   # (nome, rótulos) -> valor
+        self._histogramas = {}  # (nome, rótulos) -> Histograma
+        self._coletores = []
+
+    @staticmethod
+    def _chave(nome: str, rotulos: dict):
+        return nome, tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+    def incrementar(self, nome: str, valor: float = 1, **rotulos):
+        """
+        Soma `valor` a um contador.
+
+        Args:
+            nome (str): Nome da métrica, sem o prefixo.
+            valor (float, opcional): Incremento. Padrão: 1.
+            **rotulos: Rótulos da série (por exemplo funcao='views.carteira').
+        """
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome: str, valor: float, baldes=BALDES_TEMPO, **rotulos):
+        """
+        Registra uma observação em um histograma.
+
+        Args:
+            nome (str): Nome da métrica, sem o prefixo.
+            valor (float): Valor observado.
+            baldes (tuple, opcional): Limites do histograma, usados na primeira observação. Padrão: BALDES_TEMPO.
+            **rotulos: Rótulos da série.
+        """
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma(baldes)
+            histograma.observar(valor)
+
+    def cronometrar(self, nome: str, **rotulos):
+        """
+        Gerenciador de contexto que registra a duração do bloco em um histograma de tempo.
+
+        Args:
+            nome (str): Nome da métrica, sem o prefixo.
+            **rotulos: Rótulos da série.
+
+        Returns:
+            Gerenciador de contexto.
+        """
+        registro = self
+
+        class _Cronometro:
+            def __enter__(self):
+                self.inicio = time.perf_counter()
+                return self
+
+            def __exit__(self, *_):
+                registro.observar(nome, time.perf_counter() - self.inicio, **rotulos)
+
+        return _Cronometro()
+
+    def registrar_coletor(self, coletor):
+        """
+        Registra uma função chamada na exportação que devolve medidas instantâneas.
+
+        Args:
+            coletor (callable): Função sem argumentos que devolve uma lista de tuplas (nome, rótulos, valor).
+        """
+        self._coletores.append(coletor)
+
+    def limpar(self):
+        """Zera contadores e histogramas (os coletores são mantidos)."""
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def instantaneo(self) -> dict:
+        """
+        Copia o estado atual das métricas.
+
+        Returns:
+            dict: {'contadores': {(nome, rótulos): valor}, 'histogramas': {(nome, rótulos): Histograma},
+                'medidas': [(nome, rótulos, valor)]}, com cópias independentes do registro.
+        """
+        with self._lock:
+            contadores = dict(self._contadores)
+            histogramas = {}
+            for chave, histograma in self._histogramas.items():
+                copia = Histograma(histograma.baldes)
+                copia.contagens, copia.soma, copia.total = list(histograma.contagens), histograma.soma, histograma.total
+                histogramas[chave] = copia
+        medidas = []
+        for coletor in self._coletores:
+            medidas.extend((nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())), valor)
+                           for nome, rotulos, valor in coletor())
+        return {'contadores': contadores, 'histogramas': histogramas, 'medidas': medidas}
+
+    def exportar_prometheus(self) -> str:
+        """
+        Exporta as métricas no formato de texto do Prometheus (versão 0.0.4).
+
+        Returns:
+            str: Contadores como `counter`, histogramas como `histogram` e medidas dos coletores como `gauge`.
+        """
+        estado = self.instantaneo()
+        linhas = []
+
+        def rotulos_texto(rotulos, extra=()):
+            pares = list(rotulos) + list(extra)
+            if not pares:
+                return ""
+            escapados = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                         for k, v in pares)
+            return "{" + ",".join(escapados) + "}"
+
+        def cabecalho(nome, tipo):
+            linhas.append(f"# HELP {PREFIXO}{nome} {DESCRICOES.get(nome, nome)}")
+            linhas.append(f"# TYPE {PREFIXO}{nome} {tipo}")
+
+        for tipo, series in (('counter', estado['contadores']), ('gauge', {(n, r): v for n, r, v in estado['medidas']})):
+            for nome in sorted({n for n, _ in series}):
+                cabecalho(nome, tipo)
+                for (n, rotulos), valor in sorted(series.items()):
+                    if n == nome:
+                        linhas.append(f"{PREFIXO}{nome}{rotulos_texto(rotulos)} {_formatar_amostra(valor)}")
+
+        histogramas = estado['histogramas']
+        for nome in sorted({n for n, _ in histogramas}):
+            cabecalho(nome, 'histogram')
+            for (n, rotulos), histograma in sorted(histogramas.items(), key=lambda item: item[0]):
+                if n != nome:
+                    continue
+                acumulado = 0
+                for limite, contagem in zip(histograma.baldes + (float('inf'),), histograma.contagens):
+                    acumulado += contagem
+                    le = "+Inf" if limite == float('inf') else f"{limite:g}"
+                    linhas.append(f"{PREFIXO}{nome}_bucket{rotulos_texto(rotulos, [('le', le)])} {acumulado}")
+                linhas.append(f"{PREFIXO}{nome}_sum{rotulos_texto(rotulos)} {_formatar_amostra(histograma.soma)}")
+                linhas.append(f"{PREFIXO}{nome}_count{rotulos_texto(rotulos)} {histograma.total}")
+        return "\n".join(linhas) + "\n"
+
+    def resumo(self) -> pd.DataFrame:
+        """
+        Resume as funções instrumentadas para exibição: chamadas, erros, latências e linhas.
+
+        Returns:
+            pd.DataFrame: Uma linha por função, da maior para a menor duração total.
+        """
+        estado = self.instantaneo()
+        linhas = {}
+        for (nome, rotulos), histograma in estado['histogramas'].items():
+            funcao = dict(rotulos).get('funcao')
+            if funcao is None:
+                continue
+            linha = linhas.setdefault(funcao, {'funcao': funcao})
+            if nome == 'funcao_duracao_segundos':
+                linha.update({
+                    'chamadas': histograma.total,
+                    'total_s': histograma.soma,
+                    'media_ms': histograma.soma / histograma.total * 1000,
+                    'p50_ms': histograma.quantil(0.5) * 1000,
+                    'p95_ms': histograma.quantil(0.95) * 1000,
+                })
+            elif nome == 'funcao_linhas':
+                linha['linhas_media'] = histograma.soma / histograma.total
+        for (nome, rotulos), valor in estado['contadores'].items():
+            rotulos = dict(rotulos)
+            if nome == 'funcao_chamadas_total' and rotulos.get('resultado') == 'erro' and rotulos['funcao'] in linhas:
+                linhas[rotulos['funcao']]['erros'] = valor
+        df = pd.DataFrame(list(linhas.values()))
+        if df.empty:
+            return df
+        if 'erros' not in df:
+            df['erros'] = 0
+        df['erros'] = df['erros'].fillna(0).astype(int)
+        return df.sort_values('total_s', ascending=False, na_position='last').reset_index(drop=True)
+
+
+# Registro compartilhado pelo processo inteiro
+metricas = RegistroMetricas()
+
+
+def _contar_linhas(resultado):
+    """Conta as linhas de um resultado: DataFrame, resposta da API ({'dados': [...]}) ou tupla contendo um deles."""
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return len(resultado)
+    if isinstance(resultado, dict) and isinstance(resultado.get('dados'), list):
+        return len(resultado['dados'])
+    if isinstance(resultado, tuple):
+        for valor in resultado:
+            linhas = _contar_linhas(valor)
+            if linhas is not None:
+                return linhas
+    return None
+
+
+def instrumentar(funcao):
+    """
+    Decorador que mede cada chamada da função: duração, resultado (ok ou erro) e linhas devolvidas.
+
+    Funciona com funções comuns e corrotinas. A função é identificada como '<módulo>.<nome>'
+    (por exemplo 'views.carteira').
+
+    Args:
+        funcao (Callable): Função a instrumentar.
+
+    Returns:
+        Callable: Função instrumentada, com a mesma assinatura.
+    """
+    rotulo = f"{funcao.__module__.rsplit('.', 1)[-1]}.{funcao.__name__}"
+
+    def registrar(inicio, resultado=None, erro=False):
+        metricas.observar("funcao_duracao_segundos", time.perf_counter() - inicio, funcao=rotulo)
+        metricas.incrementar("funcao_chamadas_total", funcao=rotulo, resultado="erro" if erro else "ok")
+        linhas = None if erro else _contar_linhas(resultado)
+        if linhas is not None:
+            metricas.observar("funcao_linhas", linhas, baldes=BALDES_LINHAS, funcao=rotulo)
+
+    if inspect.iscoroutinefunction(funcao):
+        @functools.wraps(funcao)
+        async def envoltorio_async(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                resultado = await funcao(*args, **kwargs)
+            except BaseException:
+                registrar(inicio, erro=True)
+                raise
+            registrar(inicio, resultado)
+            return resultado
+        return envoltorio_async
+
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao(*args, **kwargs)
+        except BaseException:
+            registrar(inicio, erro=True)
+            raise
+        registrar(inicio, resultado)
+        return resultado
+    return envoltorio
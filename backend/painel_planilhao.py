@@ -0,0 +1,444 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from backend.cache import _expirado
+from backend.config import CACHE_DIR, PRECO_MAX_WORKERS, PLANILHAO_CACHE_TTL
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Diretório do painel do planilhão (uma partição por data base)
+PAINEL_PLANILHAO_DIR = os.path.join(CACHE_DIR, "painel_planilhao")
+
+# Partições no formato hive: <diretorio>/data_base=YYYY-MM-DD/parte.parquet
+PARTICIONAMENTO = ds.partitioning(pa.schema([("data_base", pa.date32())]), flavor="hive")
+
+# Colunas de texto do planilhão; as demais são indicadores, gravados sempre como float64
+COLUNAS_TEXTO = ("ticker", "setor", "empresa")
+
+
+def _ajustar_tipos(df: pd.DataFrame, tipos: dict) -> pd.DataFrame:
+    """
+    Converte as colunas para o tipo do painel, para que todas as partições tenham o mesmo esquema.
+
+    Colunas já conhecidas seguem o tipo registrado em `tipos` (valores que não viram número, como
+    '-', ficam ausentes). Colunas novas são texto se estiverem em COLUNAS_TEXTO ou se nenhum valor
+    for numérico; caso contrário, são indicadores.
+
+    Args:
+        df (pd.DataFrame): Planilhão de uma data.
+        tipos (dict): {coluna: 'float64' | 'string'} com os tipos já usados no painel.
+
+    Returns:
+        pd.DataFrame: Cópia com as colunas em float64 ou string.
+    """
+    df = df.copy()
+    for coluna in df.columns:
+        tipo = tipos.get(coluna)
+        if tipo is None:
+            if coluna in COLUNAS_TEXTO or pd.api.types.is_bool_dtype(df[coluna]):
+                tipo = "string"
+            else:
+                convertida = pd.to_numeric(df[coluna], errors="coerce")
+                tipo = "float64" if convertida.notna().any() or df[coluna].isna().all() else "string"
+        if tipo == "float64":
+            df[coluna] = pd.to_numeric(df[coluna], errors="coerce").astype("float64")
+        else:
+            df[coluna] = df[coluna].astype("string")
+    return df
+
+
+def _tipos_resolvidos(esquemas) -> dict:
+    """
+    Decide o tipo de cada coluna a partir dos esquemas das partições: texto para COLUNAS_TEXTO e para
+    colunas que nunca foram numéricas, float64 para as demais.
+
+    Args:
+        esquemas (iterable): Esquemas físicos (pa.Schema) das partições.
+
+    Returns:
+        dict: {coluna: 'float64' | 'string'}, na ordem em que as colunas aparecem.
+    """
+    numericas, ordem = set(), {}
+    for esquema in esquemas:
+        for campo in esquema:
+            if campo.name == "data_base":
+                continue
+            ordem.setdefault(campo.name, None)
+            if pa.types.is_floating(campo.type) or pa.types.is_integer(campo.type):
+                numericas.add(campo.name)
+    return {nome: "float64" if nome in numericas and nome not in COLUNAS_TEXTO else "string" for nome in ordem}
+
+
+
+class PainelPlanilhao:
+    """
+    Painel do planilhão em várias datas: um dataset Parquet colunar datas x tickers x indicadores,
+    particionado por data base.
+
+    Cada data vira uma partição própria, então novas datas são acrescentadas sem reescrever as
+    anteriores e uma consulta lê apenas as partições do período e as colunas pedidas. Um pequeno
+    índice JSON registra as datas já ingeridas, para que não sejam buscadas de novo; como no cache do
+    planilhão, apenas as datas recentes (até PLANILHAO_DIAS_RECENTES dias) são buscadas de novo
+    PLANILHAO_CACHE_TTL segundos após a gravação. Datas sem planilhão (feriados) também ficam
+    registradas e só são consultadas de novo depois de PLANILHAO_CACHE_TTL segundos; uma falha da API
+    não é registrada, e a data é tentada de novo na próxima ingestão.
+
+    Todas as partições seguem o mesmo esquema, registrado no índice: indicadores em float64 e
+    COLUNAS_TEXTO como texto.
+    Partições gravadas com outro tipo são convertidas ao abrir o painel, e as que não puderem ser
+    lidas ficam de fora das consultas, em vez de impedir a leitura das demais.
+
+    As gravações são feitas por um único processo (o app ou o aquecimento); as consultas podem
+    rodar em paralelo a elas e enxergam as datas concluídas até o momento.
+
+    Args:
+        buscar (Callable): Função (date) -> pd.DataFrame que devolve o planilhão processado de uma data,
+            vazio se a data não tiver planilhão e levantando uma exceção se a consulta falhar (por exemplo
+            `views.pegar_df_planilhao` com `levantar_erro=True`).
+        diretorio (str, opcional): Pasta do painel. Padrão: PAINEL_PLANILHAO_DIR.
+    """
+
+    def __init__(self, buscar, diretorio: str = None):
+        self.buscar = buscar
+        self.diretorio = diretorio or PAINEL_PLANILHAO_DIR
+        self._lock = threading.Lock()
+        self._dataset = None
+        self._meta_mtime = None
+
+    @property
+    def _caminho_meta(self) -> str:
+        return os.path.join(self.diretorio, "_meta.json")  # Prefixo "_": ignorado pelo dataset.
+
+    def _carregar_meta(self) -> dict:
+        """
+        Lê o índice {'datas': {'YYYY-MM-DD': linhas}, 'vazias': {'YYYY-MM-DD': horário da consulta},
+        'tipos': {coluna: 'float64' | 'string'}}.
+        """
+        try:
+            with open(self._caminho_meta, encoding="utf-8") as arquivo:
+                meta = json.load(arquivo)
+        except FileNotFoundError:
+            meta = {"datas": {}, "vazias": {}}
+        meta.setdefault("tipos", {})  # Índices anteriores não registravam os tipos.
+        return meta
+
+    def _gravar_meta(self, meta: dict):
+        temporario = f"{self._caminho_meta}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(meta, arquivo, sort_keys=True)
+        os.replace(temporario, self._caminho_meta)
+
+    def datas(self) -> pd.DatetimeIndex:
+        """
+        Datas já ingeridas que têm planilhão.
+
+        Returns:
+            pd.DatetimeIndex: Datas base em ordem crescente.
+        """
+        datas = list(self._carregar_meta()["datas"])
+        return pd.DatetimeIndex(sorted(datas), name="data_base")
+
+    def faltantes(self, datas) -> list:
+        """
+        Indica as datas que ainda precisam ser ingeridas.
+
+        Datas recentes já ingeridas expiram como no cache do planilhão (`cache._expirado`), pois o
+        snapshot ainda pode ser revisado. Datas consultadas sem planilhão voltam a ser pedidas após
+        PLANILHAO_CACHE_TTL segundos, pois a API pode ainda não ter publicado o snapshot.
+
+        Args:
+            datas (iterable): Datas base desejadas.
+
+        Returns:
+            list: Datas (pd.Timestamp) ausentes do painel, em ordem crescente.
+        """
+        meta = self._carregar_meta()
+        agora = time.time()
+        faltantes = []
+        for data in sorted(pd.DatetimeIndex(datas).normalize().unique()):
+            chave = data.strftime("%Y-%m-%d")
+            if chave in meta["datas"]:
+                try:
+                    if _expirado(data, self._caminho_particao(chave)):
+                        faltantes.append(data)
+                except FileNotFoundError:
+                    faltantes.append(data)  # Partição apagada fora do painel.
+                continue
+            if agora - meta["vazias"].get(chave, 0) > PLANILHAO_CACHE_TTL:
+                faltantes.append(data)
+        return faltantes
+
+    def _caminho_particao(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"data_base={chave}", "parte.parquet")
+
+    @staticmethod
+    def _escrever(caminho: str, df: pd.DataFrame):
+        """Grava um arquivo de partição de forma atômica (o temporário começa com '.' e é ignorado pelo dataset)."""
+        pasta = os.path.dirname(caminho)
+        os.makedirs(pasta, exist_ok=True)
+        temporario = os.path.join(pasta, f".parte.{os.getpid()}.{threading.get_ident()}.tmp")
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, caminho)
+
+    def _gravar_particao(self, data: pd.Timestamp, df: pd.DataFrame):
+        """Grava o planilhão de uma data como uma partição (escrita atômica) e registra a data no índice."""
+        chave = data.strftime("%Y-%m-%d")
+        if not df.empty:
+            df = df.drop(columns=["data_base"], errors="ignore").reset_index(drop=True)
+            df = _ajustar_tipos(df, self._carregar_meta()["tipos"])
+            self._escrever(self._caminho_particao(chave), df)
+        with self._lock:
+            meta = self._carregar_meta()
+            if df.empty and chave in meta["datas"] and os.path.exists(self._caminho_particao(chave)):
+                # Uma data recente que já tinha planilhão mantém a partição até a próxima expiração.
+                os.utime(self._caminho_particao(chave))
+                return
+            if df.empty:
+                meta["vazias"][chave] = time.time()
+                meta["datas"].pop(chave, None)
+            else:
+                meta["datas"][chave] = len(df)
+                meta["vazias"].pop(chave, None)
+                for coluna, tipo in df.dtypes.items():
+                    meta["tipos"].setdefault(coluna, "float64" if tipo == "float64" else "string")
+            self._gravar_meta(meta)
+            self._dataset = None
+
+    def ingerir(self, datas, max_workers: int = None) -> int:
+        """
+        Acrescenta ao painel o planilhão das datas que ainda faltam, buscando várias em paralelo.
+
+        Cada data é gravada assim que chega: se a ingestão for interrompida, as datas já gravadas
+        não são buscadas de novo.
+
+        Args:
+            datas (iterable): Datas base desejadas.
+            max_workers (int, opcional): Datas buscadas em paralelo. Padrão: PRECO_MAX_WORKERS.
+
+        Returns:
+            int: Quantidade de datas com planilhão acrescentadas nesta chamada.
+        """
+        faltantes = self.faltantes(datas)
+        if not faltantes:
+            logger.info("Painel do planilhão já contém todas as %s datas pedidas.", len(pd.DatetimeIndex(datas)))
+            return 0
+        logger.info("Ingerindo %s datas no painel do planilhão (%s a %s)", len(faltantes),
+                    faltantes[0].date(), faltantes[-1].date())
+        os.makedirs(self.diretorio, exist_ok=True)
+        ingeridas = 0
+        with ThreadPoolExecutor(max_workers=max(1, max_workers or PRECO_MAX_WORKERS)) as executor:
+            futuros = {executor.submit(self.buscar, data.date()): data for data in faltantes}
+            for futuro in as_completed(futuros):
+                data = futuros[futuro]
+                try:
+                    df = futuro.result()
+                    self._gravar_particao(data, df)
+                    ingeridas += not df.empty
+                except Exception as e:
+                    logger.error("Erro ao ingerir o planilhão de %s no painel: %s", data.date(), e)
+        logger.info("Painel do planilhão atualizado | Datas com planilhão: %s de %s", ingeridas, len(faltantes))
+        return ingeridas
+
+    def _abrir(self) -> ds.Dataset:
+        """
+        Abre o dataset (reaproveitado enquanto o índice não mudar), com o esquema unificado de todas as datas.
+
+        Colunas novas em datas recentes não podem sumir das consultas: o esquema é a união de todos.
+        Partições com uma coluna em outro tipo são regravadas no tipo do painel, e as ilegíveis são
+        deixadas de fora.
+        """
+        try:
+            mtime = os.stat(self._caminho_meta).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self._dataset is None or mtime != self._meta_mtime:
+                esquemas = {}
+                for fragmento in ds.dataset(self.diretorio, format="parquet", partitioning=PARTICIONAMENTO).get_fragments():
+                    try:
+                        esquemas[fragmento.path] = fragmento.physical_schema
+                    except Exception as e:
+                        logger.warning("Partição ilegível ignorada no painel do planilhão: %s | %s", fragmento.path, e)
+                tipos = _tipos_resolvidos(esquemas.values())
+                tipos.update((nome, tipo) for nome, tipo in self._carregar_meta()["tipos"].items() if nome in tipos)
+                esquema = pa.schema([pa.field(nome, pa.float64() if tipo == "float64" else pa.string())
+                                     for nome, tipo in tipos.items()] + [pa.field("data_base", pa.date32())])
+                validos = []
+                for caminho, fisico in esquemas.items():
+                    if any(esquema.field(campo.name).type != campo.type for campo in fisico if campo.name in tipos):
+                        try:
+                            self._escrever(caminho, _ajustar_tipos(pd.read_parquet(caminho), tipos))
+                            logger.info("Partição do painel do planilhão convertida ao esquema comum: %s", caminho)
+                        except Exception as e:
+                            logger.warning("Partição com tipos divergentes ignorada no painel do planilhão: %s | %s", caminho, e)
+                            continue
+                    validos.append(caminho)
+                self._dataset = ds.dataset(validos, schema=esquema, format="parquet", partitioning=PARTICIONAMENTO,
+                                           partition_base_dir=self.diretorio)
+                self._meta_mtime = mtime
+            return self._dataset
+
+    def _ler(self, colunas: list, filtro=None) -> pd.DataFrame:
+        """Lê do painel as colunas pedidas das linhas que atendem ao filtro, com 'data_base' como datetime."""
+        dataset = self._abrir()
+        if dataset is None:
+            return pd.DataFrame(columns=colunas)
+        colunas = [c for c in dict.fromkeys(colunas) if c in dataset.schema.names]
+        df = dataset.to_table(columns=colunas, filter=filtro).to_pandas()
+        if "data_base" in df:
+            df["data_base"] = pd.to_datetime(df["data_base"])
+        return df
+
+    @staticmethod
+    def _filtro_periodo(data_ini=None, data_fim=None):
+        filtro = None
+        if data_ini is not None:
+            filtro = ds.field("data_base") >= pd.Timestamp(data_ini).date()
+        if data_fim is not None:
+            fim = ds.field("data_base") <= pd.Timestamp(data_fim).date()
+            filtro = fim if filtro is None else filtro & fim
+        return filtro
+
+    def serie(self, indicador: str, tickers=None, data_ini=None, data_fim=None) -> pd.DataFrame:
+        """
+        Série de um indicador ao longo das datas do painel.
+
+        Args:
+            indicador (str): Coluna do planilhão, por exemplo 'roic'.
+            tickers (list, opcional): Tickers desejados. Padrão: todos.
+            data_ini (date | str, opcional): Início do período. Padrão: primeira data do painel.
+            data_fim (date | str, opcional): Fim do período. Padrão: última data do painel.
+
+        Returns:
+            pd.DataFrame: Indexado por data base, uma coluna por ticker (ausente onde o ticker não aparece).
+        """
+        filtro = self._filtro_periodo(data_ini, data_fim)
+        if tickers is not None:
+            tickers = list(tickers)
+            filtro_tickers = ds.field("ticker").isin(tickers)
+            filtro = filtro_tickers if filtro is None else filtro & filtro_tickers
+        df = self._ler(["data_base", "ticker", indicador], filtro)
+        if indicador not in df:
+            raise KeyError(f"Indicador ausente do painel do planilhão: {indicador}")
+        matriz = df.pivot(index="data_base", columns="ticker", values=indicador).sort_index()
+        matriz.columns = matriz.columns.astype(object)
+        return matriz.reindex(columns=tickers) if tickers is not None else matriz
+
+    def corte(self, data_base, colunas=None) -> pd.DataFrame:
+        """
+        Corte transversal: todos os tickers de uma data base.
+
+        Args:
+            data_base (date | str): Data base desejada.
+            colunas (list, opcional): Colunas desejadas (além de 'ticker'). Padrão: todas.
+
+        Returns:
+            pd.DataFrame: Uma linha por ticker (vazio se a data não estiver no painel).
+        """
+        dataset = self._abrir()
+        colunas = ["ticker", *colunas] if colunas is not None else (
+            [c for c in dataset.schema.names if c != "data_base"] if dataset is not None else ["ticker"])
+        df = self._ler(colunas, ds.field("data_base") == pd.Timestamp(data_base).date())
+        return df.reset_index(drop=True)
+
+    def agregado_setor(self, indicador: str, data_ini=None, data_fim=None, funcao: str = "median") -> pd.DataFrame:
+        """
+        Agregado de um indicador por setor em cada data.
+
+        Args:
+            indicador (str): Coluna do planilhão, por exemplo 'roe'.
+            data_ini (date | str, opcional): Início do período.
+            data_fim (date | str, opcional): Fim do período.
+            funcao (str, opcional): Agregação do pandas ('median', 'mean', 'count', ...). Padrão: 'median'.
+
+        Returns:
+            pd.DataFrame: Indexado por data base, uma coluna por setor.
+        """
+        df = self._ler(["data_base", "setor", indicador], self._filtro_periodo(data_ini, data_fim))
+        if indicador not in df:
+            raise KeyError(f"Indicador ausente do painel do planilhão: {indicador}")
+        agregado = df.groupby(["data_base", "setor"], observed=True)[indicador].agg(funcao)
+        return agregado.unstack("setor").sort_index()
+
+    def opcoes(self, data_base) -> dict:
+        """
+        Valores disponíveis para montar uma consulta sobre uma data base.
+
+        Args:
+            data_base (date | str): Data base desejada.
+
+        Returns:
+            dict: 'setores' (ordenados), 'colunas' (na ordem do planilhão) e 'numericas' (indicadores);
+                listas vazias se a data não estiver no painel.
+        """
+        dataset = self._abrir()
+        if dataset is None or pd.Timestamp(data_base).strftime("%Y-%m-%d") not in self._carregar_meta()["datas"]:
+            return {"setores": [], "colunas": [], "numericas": []}
+        setores = self._ler(["setor"], ds.field("data_base") == pd.Timestamp(data_base).date())
+        campos = [campo for campo in dataset.schema if campo.name != "data_base"]
+        return {
+            "setores": sorted(setores["setor"].dropna().unique()) if "setor" in setores else [],
+            "colunas": [campo.name for campo in campos],
+            "numericas": [campo.name for campo in campos if pa.types.is_floating(campo.type)],
+        }
+
+    def consultar(self, data_base, colunas=None, setores=None, prefixo: str = None, faixas: dict = None,
+                  ordenar_por: str = None, ascendente: bool = True, inicio: int = 0, limite: int = 50):
+        """
+        Consulta paginada ao planilhão de uma data base: filtros, ordenação e projeção rodam sobre o
+        Parquet e só as linhas da página são convertidas em DataFrame.
+
+        Args:
+            data_base (date | str): Data base desejada.
+            colunas (list, opcional): Colunas devolvidas (além de 'ticker'). Padrão: todas.
+            setores (list, opcional): Mantém apenas estes setores.
+            prefixo (str, opcional): Mantém apenas tickers que começam com este texto (sem diferenciar maiúsculas).
+            faixas (dict, opcional): {indicador: (mínimo, máximo)}, limites inclusivos; None deixa o lado aberto.
+                Linhas sem o indicador são descartadas.
+            ordenar_por (str, opcional): Coluna da ordenação (ausentes ao final). Padrão: ordem do planilhão.
+            ascendente (bool, opcional): Ordem crescente. Padrão: True.
+            inicio (int, opcional): Posição da primeira linha da página. Padrão: 0.
+            limite (int, opcional): Linhas por página. Padrão: 50.
+
+        Returns:
+            tuple: (pd.DataFrame com as linhas da página, int com o total de linhas que atendem aos filtros).
+        """
+        dataset = self._abrir()
+        if dataset is None:
+            return pd.DataFrame(columns=["ticker", *(colunas or [])]), 0
+        nomes = set(dataset.schema.names)
+        filtro = ds.field("data_base") == pd.Timestamp(data_base).date()
+        if setores:
+            filtro &= ds.field("setor").isin(list(setores))
+        if prefixo:
+            filtro &= pc.starts_with(ds.field("ticker"), pattern=prefixo.strip(), ignore_case=True)
+        for indicador, (minimo, maximo) in (faixas or {}).items():
+            if indicador not in nomes:
+                raise KeyError(f"Indicador ausente do painel do planilhão: {indicador}")
+            filtro &= ds.field(indicador).is_valid()
+            if minimo is not None:
+                filtro &= ds.field(indicador) >= minimo
+            if maximo is not None:
+                filtro &= ds.field(indicador) <= maximo
+
+        if colunas is None:
+            colunas = [nome for nome in dataset.schema.names if nome != "data_base"]
+        colunas = [c for c in dict.fromkeys(["ticker", *colunas]) if c in nomes]
+        lidas = colunas + [ordenar_por] if ordenar_por in nomes and ordenar_por not in colunas else colunas
+        tabela = dataset.to_table(columns=lidas, filter=filtro)
+        total = tabela.num_rows
+
+        inicio = max(0, int(inicio))
+        if ordenar_por in nomes:
+            ordem = pc.sort_indices(tabela, sort_keys=[(ordenar_por, "ascending" if ascendente else "descending")])  # Nulos ao final.
+            tabela = tabela.take(ordem[inicio:inicio + limite])
+        else:
+            tabela = tabela.slice(inicio, limite)
+        return tabela.select(colunas).to_pandas(), total
@@ -0,0 +1,266 @@
+import os
+import json
+import threading
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from backend.config import CACHE_DIR
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Diretório onde ficam os painéis de preços (uma pasta por série)
+PAINEL_DIR = os.path.join(CACHE_DIR, "painel")
+
+# Espaço reservado além do necessário a cada crescimento, para que novos tickers e novos
+# pregões não exijam reescrever o arquivo inteiro
+FOLGA_TICKERS = 64
+FOLGA_DATAS = 252
+
+
+class PainelPrecos:
+    """
+    Painel de preços em disco: uma matriz float32 tickers x datas mapeada em memória (memmap),
+    mais um pequeno índice JSON com as datas, os tickers e o período coberto de cada ticker.
+
+    A matriz é gravada por ticker (a série de um ticker é contígua), que é exatamente o layout que
+    o pandas usa para um DataFrame datas x tickers de um só tipo: a leitura de um trecho vira uma
+    visão do arquivo, sem cópia e sem carregar o painel em memória. Vários processos podem abrir o
+    mesmo painel só para leitura e compartilham as páginas do arquivo pelo cache do sistema
+    operacional. O objeto pode ser enviado a processos de um pool: só o caminho é serializado.
+
+    As gravações são feitas por um único processo (o app ou o aquecimento). Enquanto cabem na
+    capacidade reservada, são feitas no próprio arquivo; ao crescer, o painel é copiado para um novo
+    arquivo e o índice passa a apontar para ele, então leitores abertos continuam com uma versão válida.
+
+    Args:
+        nome (str): Nome da série, usado como subpasta (por exemplo 'preco-corrigido').
+        diretorio (str, opcional): Pasta raiz dos painéis. Padrão: PAINEL_DIR.
+    """
+
+    def __init__(self, nome: str, diretorio: str = None):
+        self.nome = nome
+        self.diretorio = os.path.join(diretorio or PAINEL_DIR, nome)
+        self._lock = threading.Lock()
+        self._meta = None
+        self._meta_mtime = None
+        self._mapa = None
+
+    def __getstate__(self):
+        return {'nome': self.nome, 'diretorio': self.diretorio}
+
+    def __setstate__(self, estado):
+        self.__init__(estado['nome'])
+        self.diretorio = estado['diretorio']
+
+    @property
+    def _caminho_meta(self) -> str:
+        return os.path.join(self.diretorio, "meta.json")
+
+    def _carregar_meta(self) -> dict:
+        """
+        Lê o índice do painel, reaproveitando a leitura anterior se o arquivo não mudou.
+
+        Returns:
+            dict: Índice com 'arquivo', 'capacidade', 'datas', 'tickers' e 'cobertura', ou None se o painel não existir.
+        """
+        try:
+            mtime = os.stat(self._caminho_meta).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self._meta_mtime:
+            with open(self._caminho_meta, encoding="utf-8") as arquivo:
+                meta = json.load(arquivo)
+            meta['indice_datas'] = pd.DatetimeIndex(meta['datas'])
+            meta['indice_tickers'] = pd.Index(meta['tickers'])
+            self._meta, self._meta_mtime, self._mapa = meta, mtime, None
+        return self._meta
+
+    def _abrir(self, meta: dict, modo: str = 'r') -> np.memmap:
+        """Mapeia o arquivo da matriz em memória (a leitura é reaproveitada entre consultas)."""
+        caminho = os.path.join(self.diretorio, meta['arquivo'])
+        if modo != 'r':
+            return np.memmap(caminho, dtype=np.float32, mode=modo, shape=tuple(meta['capacidade']))
+        if self._mapa is None or self._mapa.filename != os.path.abspath(caminho):
+            self._mapa = np.memmap(caminho, dtype=np.float32, mode='r', shape=tuple(meta['capacidade']))
+        return self._mapa
+
+    def _gravar_meta(self, meta: dict):
+        """Substitui o índice do painel de forma atômica (leitores veem o antigo ou o novo, nunca metade)."""
+        temporario = f"{self._caminho_meta}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo_meta:
+            json.dump(meta, arquivo_meta)
+        os.replace(temporario, self._caminho_meta)
+
+    def faltantes(self, tickers, data_ini, data_fim) -> dict:
+        """
+        Indica os tickers cujo período coberto não inclui [data_ini, data_fim].
+
+        Args:
+            tickers (list): Tickers desejados.
+            data_ini (date | str): Início do período.
+            data_fim (date | str): Fim do período.
+
+        Returns:
+            dict: {ticker: (inicio, fim)} com o período a buscar para cada ticker faltante, já unido ao
+                período coberto, para que cada ticker continue com um único intervalo contínuo.
+        """
+        data_ini, data_fim = pd.Timestamp(data_ini).date(), pd.Timestamp(data_fim).date()
+        ontem = date.today() - timedelta(days=1)
+        meta = self._carregar_meta()
+        cobertura = meta['cobertura'] if meta else {}
+        faltantes = {}
+        for ticker in tickers:
+            coberto = cobertura.get(ticker)
+            if coberto is None:
+                faltantes[ticker] = (data_ini, data_fim)
+                continue
+            inicio, fim = date.fromisoformat(coberto[0]), date.fromisoformat(coberto[1])
+            # O dia de hoje em diante nunca fica coberto, pois o pregão ainda pode estar em andamento.
+            if data_ini < inicio or min(data_fim, ontem) > fim:
+                faltantes[ticker] = (min(data_ini, inicio), max(data_fim, fim))
+        return faltantes
+
+    def gravar(self, df_preco: pd.DataFrame, cobertura: dict):
+        """
+        Grava no painel os preços de vários tickers e registra o período coberto por cada um.
+
+        Args:
+            df_preco (pd.DataFrame): Preços no formato de `pegar_df_preco_corrigido` (data, ticker, fechamento).
+            cobertura (dict): {ticker: (inicio, fim)} período consultado de cada ticker; só o que já está
+                fechado (até ontem) é marcado como coberto.
+
+        Returns:
+            None
+        """
+        ontem = date.today() - timedelta(days=1)
+        with self._lock:
+            meta = self._carregar_meta()
+            datas_atuais = meta['indice_datas'] if meta else pd.DatetimeIndex([])
+            tickers_atuais = meta['indice_tickers'] if meta else pd.Index([], dtype=object)
+
+            precos = df_preco if not df_preco.empty else pd.DataFrame(columns=['data', 'ticker', 'fechamento'])
+            datas_novas = pd.DatetimeIndex(precos['data']).normalize()
+            tickers_novos = pd.Index(pd.unique(precos['ticker'].astype(str)))
+            datas = datas_atuais.union(datas_novas.unique())
+            tickers = tickers_atuais.append(tickers_novos.difference(tickers_atuais, sort=False))
+
+            capacidade = list(meta['capacidade']) if meta else [0, 0]
+            # Pregões novos só no fim do eixo cabem no arquivo atual; qualquer outro caso reescreve o painel.
+            no_lugar = (meta is not None and datas[:len(datas_atuais)].equals(datas_atuais)
+                        and len(tickers) <= capacidade[0] and len(datas) <= capacidade[1])
+            if no_lugar:
+                matriz = self._abrir(meta, 'r+')
+                versao, arquivo = meta['versao'], meta['arquivo']
+            else:
+                capacidade = [len(tickers) + FOLGA_TICKERS, len(datas) + FOLGA_DATAS]
+                versao = (meta['versao'] + 1) if meta else 1
+                arquivo = f"fechamento.{versao}.f32"
+                os.makedirs(self.diretorio, exist_ok=True)
+                matriz = np.memmap(os.path.join(self.diretorio, arquivo), dtype=np.float32, mode='w+',
+                                   shape=tuple(capacidade))
+                matriz[:] = np.nan
+                if meta is not None:
+                    # Copia o painel antigo para as novas posições, um bloco de tickers por vez.
+                    antigo = self._abrir(meta)
+                    colunas = datas.get_indexer(datas_atuais)
+                    for inicio in range(0, len(tickers_atuais), FOLGA_TICKERS):
+                        fim = min(inicio + FOLGA_TICKERS, len(tickers_atuais))
+                        matriz[inicio:fim, colunas] = antigo[inicio:fim, :len(datas_atuais)]
+
+            if not precos.empty:
+                linhas = tickers.get_indexer(precos['ticker'].astype(str))
+                matriz[linhas, datas.get_indexer(datas_novas)] = precos['fechamento'].to_numpy(dtype=np.float32)
+            matriz.flush()
+            del matriz
+
+            cobertos = dict(meta['cobertura']) if meta else {}
+            for ticker, (inicio, fim) in cobertura.items():
+                inicio, fim = pd.Timestamp(inicio).date(), min(pd.Timestamp(fim).date(), ontem)
+                if inicio <= fim:
+                    cobertos[ticker] = (inicio.isoformat(), fim.isoformat())
+
+            novo_meta = {
+                'versao': versao,
+                'arquivo': arquivo,
+                'capacidade': capacidade,
+                'datas': [d.strftime('%Y-%m-%d') for d in datas],
+                'tickers': list(tickers),
+                'cobertura': cobertos,
+            }
+            self._gravar_meta(novo_meta)
+
+            if meta is not None and not no_lugar:
+                try:
+                    os.remove(os.path.join(self.diretorio, meta['arquivo']))  # Leitores abertos mantêm o mapeamento.
+                except OSError as e:
+                    logger.warning("Não foi possível remover a versão antiga do painel %s | %s", self.nome, e)
+            logger.info("Painel %s atualizado | Tickers: %s, datas: %s, %s", self.nome, len(tickers), len(datas),
+                        'no mesmo arquivo' if no_lugar else 'arquivo reescrito')
+
+    def invalidar(self, tickers):
+        """
+        Descarta os preços e o período coberto dos tickers, que voltam a ser buscados na próxima consulta.
+
+        Usado quando a série de um ticker muda de base de ajuste (ver `HistoricoPrecos`): os preços
+        gravados deixam de valer e não podem ser misturados com os novos.
+
+        Args:
+            tickers (list): Tickers a descartar; os ausentes do painel são ignorados.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            meta = self._carregar_meta()
+            if meta is None:
+                return
+            linhas = meta['indice_tickers'].get_indexer(list(tickers))
+            linhas = linhas[linhas >= 0]
+            if not len(linhas):
+                return
+            matriz = self._abrir(meta, 'r+')
+            matriz[linhas] = np.nan
+            matriz.flush()
+            del matriz
+
+            descartados = set(tickers)
+            cobertos = {t: p for t, p in meta['cobertura'].items() if t not in descartados}
+            novo_meta = {chave: meta[chave] for chave in ('versao', 'arquivo', 'capacidade', 'datas', 'tickers')}
+            novo_meta['cobertura'] = cobertos
+            self._gravar_meta(novo_meta)
+            logger.info("Painel %s invalidado para %s tickers", self.nome, len(linhas))
+
+    def matriz(self, tickers, data_ini, data_fim) -> pd.DataFrame:
+        """
+        Lê do painel a matriz datas x tickers de um período.
+
+        Quando os tickers pedidos ocupam linhas consecutivas do painel (por exemplo, todo o universo na
+        ordem em que foi gravado), o resultado é uma visão do arquivo mapeado, sem cópia; caso contrário
+        apenas as linhas pedidas são copiadas. O resultado é somente leitura.
+
+        Args:
+            tickers (list): Tickers desejados; os ausentes do painel viram colunas vazias.
+            data_ini (date | str): Data inicial.
+            data_fim (date | str): Data final.
+
+        Returns:
+            pd.DataFrame: Fechamentos em float32, indexados pelos pregões do período, uma coluna por ticker.
+        """
+        meta = self._carregar_meta()
+        if meta is None:
+            return pd.DataFrame(np.full((0, len(tickers)), np.nan, dtype=np.float32),
+                                index=pd.DatetimeIndex([], name='data'), columns=pd.Index(list(tickers), name='ticker'))
+        datas = meta['indice_datas']
+        inicio, fim = datas.searchsorted(pd.Timestamp(data_ini)), datas.searchsorted(pd.Timestamp(data_fim), side='right')
+        linhas = meta['indice_tickers'].get_indexer(list(tickers))
+        mapa = self._abrir(meta)
+
+        if len(linhas) and (linhas >= 0).all() and (np.diff(linhas) == 1).all():
+            bloco = mapa[linhas[0]:linhas[-1] + 1, inicio:fim]  # Visão do arquivo, sem cópia.
+        else:
+            bloco = np.full((len(linhas), fim - inicio), np.nan, dtype=np.float32)
+            presentes = linhas >= 0
+            bloco[presentes] = mapa[linhas[presentes], inicio:fim]
+        return pd.DataFrame(bloco.T, index=datas[inicio:fim].rename('data'),
+                            columns=pd.Index(list(tickers), name='ticker'), copy=False)
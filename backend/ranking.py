@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+# Colunas do planilhão usadas pela estratégia de seleção de ações
+COLUNAS_CARTEIRA = ["ticker", "setor", "data_base", "roc", "roe", "roic", "earning_yield", "dividend_yield", "p_vp"]
+
+# Indicadores disponíveis na página de Estratégia
+INDICADORES_RENTABILIDADE = ["roe", "roic", "roc"]
+INDICADORES_DESCONTO = ["earning_yield", "dividend_yield", "p_vp"]
+
+# Indicadores em que o menor valor é o melhor
+INDICADORES_ASCENDENTES = {"p_vp"}
+
+# Quantidade de ações mantidas em cada corte por indicador
+CORTE_RANKING = 300
+
+
+def ranquear_carteira(df: pd.DataFrame, indicador_rent: str, indicador_desc: str, num: int):
+    """
+    Ranqueia as ações de um planilhão já processado pelos indicadores de rentabilidade e desconto.
+
+    Args:
+        df (pd.DataFrame): Planilhão processado, com as colunas de `COLUNAS_CARTEIRA`.
+        indicador_rent (str): Indicador de rentabilidade para ranqueamento.
+        indicador_desc (str): Indicador de desconto para ranqueamento ('p_vp' é ordenado do menor para o maior).
+        num (int): Número de ações a serem selecionadas.
+
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: DataFrame com as ações selecionadas e lista de tickers.
+    """
+    # Seleciona as colunas de interesse.
+    df = df[COLUNAS_CARTEIRA]
+
+    # Filtra as ações com base no indicador de rentabilidade.
+    df = df.nlargest(CORTE_RANKING, indicador_rent).reset_index(drop=True)
+    df['index_rent'] = df.index
+
+    # Filtra as ações com base no indicador de desconto.
+    if indicador_desc == 'p_vp':
+        df = df.nsmallest(CORTE_RANKING, indicador_desc).reset_index(drop=True)
+    else:
+        df = df.nlargest(CORTE_RANKING, indicador_desc).reset_index(drop=True)
+    df['index_desc'] = df.index
+
+    return _selecionar_melhores(df, num)
+
+
+def _selecionar_melhores(df: pd.DataFrame, num: int):
+    """
+    Soma as posições nos dois rankings e seleciona as `num` melhores ações.
+
+    Args:
+        df (pd.DataFrame): Ações do corte final, com as colunas 'index_rent' e 'index_desc'.
+        num (int): Número de ações a serem selecionadas.
+
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: DataFrame com as ações selecionadas e lista de tickers.
+    """
+    # Calcula a média dos rankings e seleciona as melhores ações.
+    df["media"] = df["index_desc"] + df["index_rent"]
+    df_sorted = df.sort_values(by=['media'], ascending=True).nsmallest(num, 'media').reset_index(drop=True)
+    df_sorted.index = df_sorted.index + 1
+
+    # Extrai os tickers das ações selecionadas.
+    return df_sorted, df_sorted['ticker'].tolist()
+
+
+def construir_indice_ranking(df: pd.DataFrame) -> dict:
+    """
+    Pré-calcula a ordenação de cada indicador da estratégia para um planilhão.
+
+    A ordem é decrescente (crescente para 'p_vp'), com empates na ordem original das linhas e
+    valores ausentes por último, a mesma de `nlargest`/`nsmallest`.
+
+    Args:
+        df (pd.DataFrame): Planilhão processado.
+
+    Returns:
+        dict: Mapa {indicador: posições (iloc) das linhas em ordem de ranking}.
+    """
+    indice = {}
+    for indicador in INDICADORES_RENTABILIDADE + INDICADORES_DESCONTO:
+        valores = df[indicador].to_numpy(dtype=np.float64)
+        chave = valores if indicador in INDICADORES_ASCENDENTES else -valores
+        indice[indicador] = np.argsort(chave, kind='stable').astype(np.int32)  # O NumPy coloca NaN no fim.
+    return indice
+
+
+def _ordem_sem_empates(ordem: np.ndarray, candidatos: np.ndarray, valores: np.ndarray):
+    """
+    Ordena um subconjunto de linhas a partir da ordem pré-calculada de um indicador.
+
+    Reproduz `nlargest`/`nsmallest` quando o corte pega todas as linhas (caso em que o pandas usa uma
+    ordenação não estável): valores ausentes vão para o fim na ordem dos candidatos. Só é possível
+    quando não há empates entre os valores presentes.
+
+    Args:
+        ordem (np.ndarray): Ordem completa do indicador no planilhão.
+        candidatos (np.ndarray): Posições das linhas a ordenar, na ordem atual do DataFrame.
+        valores (np.ndarray): Valores do indicador em todo o planilhão.
+
+    Returns:
+        np.ndarray or None: Posições dos candidatos ordenadas, ou None se houver empates.
+    """
+    mascara = np.zeros(len(ordem), dtype=bool)
+    mascara[candidatos] = True
+    ordenados = ordem[mascara[ordem]]
+    presentes = ordenados[~np.isnan(valores[ordenados])]
+    if np.any(valores[presentes][1:] == valores[presentes][:-1]):
+        return None
+    return np.concatenate([presentes, candidatos[np.isnan(valores[candidatos])]])
+
+
+def ranquear_carteira_indice(df: pd.DataFrame, indice: dict, indicador_rent: str, indicador_desc: str, num: int):
+    """
+    Ranqueia as ações como `ranquear_carteira`, mas a partir do índice pré-calculado do planilhão.
+
+    Os cortes por indicador saem do índice sem ordenar o planilhão. Se houver empates que o pandas
+    resolveria com uma ordenação não estável, usa `ranquear_carteira`, para que o resultado seja sempre
+    idêntico.
+
+    Args:
+        df (pd.DataFrame): Planilhão processado, na mesma ordem de linhas usada para montar o índice.
+        indice (dict): Índice de `construir_indice_ranking`.
+        indicador_rent (str): Indicador de rentabilidade para ranqueamento.
+        indicador_desc (str): Indicador de desconto para ranqueamento.
+        num (int): Número de ações a serem selecionadas.
+
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: DataFrame com as ações selecionadas e lista de tickers.
+    """
+    # Corte pelo indicador de rentabilidade.
+    if len(df) > CORTE_RANKING:
+        corte_rent = indice[indicador_rent][:CORTE_RANKING]
+    else:
+        valores_rent = df[indicador_rent].to_numpy(dtype=np.float64)
+        corte_rent = _ordem_sem_empates(indice[indicador_rent], np.arange(len(df)), valores_rent)
+        if corte_rent is None:
+            return ranquear_carteira(df, indicador_rent, indicador_desc, num)
+
+    # Corte pelo indicador de desconto dentro do anterior.
+    valores_desc = df[indicador_desc].to_numpy(dtype=np.float64)
+    corte_desc = _ordem_sem_empates(indice[indicador_desc], corte_rent, valores_desc)
+    if corte_desc is None:
+        return ranquear_carteira(df, indicador_rent, indicador_desc, num)
+
+    posicao_rent = np.empty(len(df), dtype=np.int64)
+    posicao_rent[corte_rent] = np.arange(len(corte_rent))
+
+    df = df[COLUNAS_CARTEIRA].iloc[corte_desc].reset_index(drop=True)
+    df['index_rent'] = posicao_rent[corte_desc]
+    df['index_desc'] = df.index
+    return _selecionar_melhores(df, num)
+
+
+def ranquear_combinacoes(data, df: pd.DataFrame, combinacoes, indice: dict = None):
+    """
+    Calcula a carteira de várias combinações de indicadores sobre o mesmo planilhão.
+
+    Usada como tarefa do pool de threads da varredura de estratégias, uma chamada por data.
+
+    Args:
+        data (pd.Timestamp): Data base do planilhão, devolvida junto com o resultado.
+        df (pd.DataFrame): Planilhão processado.
+        combinacoes (list): Lista de tuplas (indicador_rent, indicador_desc, num).
+        indice (dict, opcional): Índice de ranking do planilhão. Padrão: construído aqui.
+
+    Returns:
+        Tuple[pd.Timestamp, dict]: A data e o mapa {(indicador_rent, indicador_desc, num): lista de tickers}.
+    """
+    indice = indice if indice is not None else construir_indice_ranking(df)
+    return data, {
+        (rent, desc, num): ranquear_carteira_indice(df, indice, rent, desc, num)[1]
+        for rent, desc, num in combinacoes
+    }
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+
+def pivotar_precos(df_preco: pd.DataFrame, calendario=None) -> pd.DataFrame:
+    """
+    Converte o DataFrame longo de preços (data, ticker, fechamento) em uma matriz densa datas x tickers.
+
+    A matriz é preenchida diretamente pelos códigos das datas e dos tickers, sem `pivot`. Com um
+    calendário (por exemplo, os pregões do Ibovespa), as linhas são exatamente as datas dele: preços
+    em datas fora do calendário são descartados e datas sem cotação ficam ausentes.
+
+    Args:
+        df_preco (pd.DataFrame): Preços no formato retornado por `pegar_df_preco_corrigido`.
+        calendario (array-like, opcional): Datas das linhas da matriz. Padrão: as datas de `df_preco`.
+
+    Returns:
+        pd.DataFrame: Matriz de fechamentos em float64, indexada por data, uma coluna por ticker
+            (na ordem em que aparecem em `df_preco`).
+    """
+    if df_preco.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex(calendario if calendario is not None else [], name='data'))
+
+    datas_preco = pd.DatetimeIndex(df_preco['data'])
+    if calendario is None:
+        datas = datas_preco.unique().sort_values()
+    else:
+        datas = pd.DatetimeIndex(calendario).unique().sort_values()
+    linhas = datas.get_indexer(datas_preco)
+    tickers = pd.Categorical(df_preco['ticker'].astype(str), categories=pd.unique(df_preco['ticker'].astype(str)))
+
+    matriz = np.full((len(datas), len(tickers.categories)), np.nan)
+    validos = linhas >= 0
+    matriz[linhas[validos], tickers.codes[validos]] = df_preco['fechamento'].to_numpy(dtype=np.float64)[validos]
+    return pd.DataFrame(matriz, index=datas.rename('data'), columns=pd.Index(tickers.categories, name='ticker'))
+
+
+def _preencher_para_frente(matriz: np.ndarray) -> np.ndarray:
+    """Repete em cada coluna a última cotação conhecida nos dias seguintes (sem laço por ticker)."""
+    posicoes = np.where(~np.isnan(matriz), np.arange(len(matriz))[:, None], 0)
+    np.maximum.accumulate(posicoes, axis=0, out=posicoes)
+    return np.take_along_axis(matriz, posicoes, axis=0)
+
+
+def retornos_diarios(precos: np.ndarray) -> np.ndarray:
+    """
+    Calcula o retorno diário de cada coluna de uma matriz de preços.
+
+    O retorno de um dia é medido contra a última cotação anterior do mesmo ticker, então uma data
+    sem cotação não gera retorno (fica ausente) nem zera o retorno do dia seguinte.
+
+    Args:
+        precos (np.ndarray): Matriz datas x tickers de fechamentos (ausentes como NaN).
+
+    Returns:
+        np.ndarray: Matriz de mesmo formato com os retornos; a primeira cotação de cada ticker fica ausente.
+    """
+    precos = np.asarray(precos, dtype=np.float64)
+    retornos = np.full(precos.shape, np.nan)
+    if len(precos) < 2:
+        return retornos
+    ultimo = _preencher_para_frente(precos)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        retornos[1:] = precos[1:] / ultimo[:-1] - 1
+    return retornos
+
+
+def _media_linhas(matriz: np.ndarray) -> np.ndarray:
+    """Média de cada linha ignorando ausentes; linhas sem nenhum valor valem 0."""
+    presentes = ~np.isnan(matriz)
+    quantidade = presentes.sum(axis=1)
+    return np.where(quantidade > 0, np.where(presentes, matriz, 0.0).sum(axis=1) / np.maximum(quantidade, 1), 0.0)
+
+
+def calcular_retornos(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Calcula, de uma só vez, as séries de retorno usadas nos gráficos de carteira e Ibovespa.
+
+    Os preços da carteira viram uma matriz datas x tickers alinhada ao calendário do Ibovespa (ou às
+    datas da própria carteira, sem Ibovespa), e todas as séries saem de operações vetorizadas sobre
+    ela. Para reaproveitar o resultado entre os gráficos e as reexecuções da página, use
+    `views.pegar_retornos`, guardado em cache pelos parâmetros da consulta.
+
+    - carteira: igualmente ponderada e rebalanceada todo dia (média dos retornos dos tickers cotados no dia).
+    - buy_hold: pesos iguais na primeira cotação de cada ticker, sem rebalanceamento.
+    - ibov: retorno do índice.
+
+    Args:
+        df_carteira (pd.DataFrame): Preços da carteira (data, ticker, fechamento).
+        df_ibov (pd.DataFrame, opcional): Preços do Ibovespa (data, fechamento).
+
+    Returns:
+        pd.DataFrame: Indexado por data, com 'retorno_diario_<serie>' e 'retorno_acumulado_<serie>'
+            para 'carteira' e 'buy_hold' (e 'ibov', se informado). O primeiro dia tem retorno 0.
+    """
+    logger.info("Calculando a matriz de retornos da carteira.")
+    try:
+        calendario = None
+        if df_ibov is not None and not df_ibov.empty:
+            ibov = df_ibov.drop_duplicates('data').sort_values('data')
+            calendario = pd.DatetimeIndex(ibov['data'])
+        precos = pivotar_precos(df_carteira, calendario)
+        matriz = precos.to_numpy()
+        if not len(matriz):
+            logger.warning("Nenhuma data disponível para calcular os retornos.")
+            return pd.DataFrame(index=precos.index)
+
+        colunas = {}
+        retorno_carteira = _media_linhas(retornos_diarios(matriz))
+        colunas['retorno_diario_carteira'] = retorno_carteira
+
+        # Buy-and-hold: valor de cada posição relativo à sua primeira cotação; antes dela, a fatia está em caixa.
+        ultimo = _preencher_para_frente(matriz)
+        primeiro = ultimo[(~np.isnan(matriz)).argmax(axis=0), np.arange(matriz.shape[1])]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            relativo = ultimo / primeiro
+        relativo = np.where(np.isnan(relativo) & ~np.isnan(matriz).all(axis=0), 1.0, relativo)
+        valor = _media_linhas(relativo)
+        valor = np.where(valor > 0, valor, 1.0)  # Sem nenhum ticker cotado, o valor fica constante.
+        retorno_buy_hold = np.zeros(len(valor))
+        retorno_buy_hold[1:] = valor[1:] / valor[:-1] - 1
+        colunas['retorno_diario_buy_hold'] = retorno_buy_hold
+
+        if calendario is not None:
+            retorno_ibov = retornos_diarios(ibov['fechamento'].to_numpy(dtype=np.float64)[:, None])[:, 0]
+            colunas['retorno_diario_ibov'] = np.nan_to_num(retorno_ibov)
+
+        df_retornos = pd.DataFrame(index=precos.index.rename('data'))
+        for serie in ('carteira', 'buy_hold', 'ibov'):
+            diario = colunas.get(f'retorno_diario_{serie}')
+            if diario is None:
+                continue
+            diario[:1] = 0.0
+            df_retornos[f'retorno_diario_{serie}'] = diario
+            df_retornos[f'retorno_acumulado_{serie}'] = np.cumprod(1 + diario) - 1
+        logger.info("Matriz de retornos calculada | Datas: %s, tickers: %s", len(df_retornos), matriz.shape[1])
+        return df_retornos
+    except Exception as e:
+        logger.error("Erro ao calcular a matriz de retornos: %s", e)
+        raise
@@ -1,35 +1,56 @@
 from backend.views import (
-    pegar_df_planilhao,
+    pegar_opcoes_planilhao,
+    consultar_planilhao,
     carteira,
     pegar_df_preco_corrigido,
     pegar_df_preco_diversos,
     plot_comparativo_acumulado
 )
-from log_config.logging_config import logger  # Importa o logger centralizado
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
 
-def menu_planilhao(data_base):
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+def menu_planilhao_opcoes(data_base):
     """
-    Consulta os dados do Planilhão para uma data base específica e retorna um DataFrame.
+    Obtém os setores e colunas do Planilhão de uma data base, usados nos filtros da consulta paginada.
 
     Args:
-        data_base (str): Data base para a consulta ao planilhão no formato 'YYYY-MM-DD'.
+        data_base (str): Data base no formato 'YYYY-MM-DD'.
 
     Returns:
-        pd.DataFrame: DataFrame com os dados do Planilhão.
+        dict: 'setores', 'colunas' e 'numericas'.
 
     Raises:
-        ValueError: Se nenhum dado for encontrado ou ocorrer um erro na consulta.
+        ValueError: Se não houver Planilhão na data base.
     """
-    logger.info(f"Iniciando consulta ao planilhão para a data base: {data_base}")
+    logger.info("Obtendo opções de consulta do planilhão para a data base: %s", data_base)
     try:
-        df = pegar_df_planilhao(data_base)
-        if df is None or df.empty:
-            logger.warning(f"Nenhum dado retornado para a data base: {data_base}")
+        opcoes = pegar_opcoes_planilhao(data_base)
+        if not opcoes['colunas']:
+            logger.warning("Nenhum dado retornado para a data base: %s", data_base)
             raise ValueError("Nenhum dado foi encontrado para o Planilhão.")
-        logger.info(f"Consulta ao planilhão bem-sucedida para a data base: {data_base} | Linhas retornadas: {len(df)}")
-        return df
+        return opcoes
+    except Exception as e:
+        logger.error("Erro ao obter opções do planilhão para a data base: %s | %s", data_base, e)
+        raise
+
+
+def menu_planilhao_pagina(data_base, **consulta):
+    """
+    Consulta uma página do Planilhão com filtros, ordenação e projeção feitos no servidor.
+
+    Args:
+        data_base (str): Data base no formato 'YYYY-MM-DD'.
+        **consulta: Filtros, ordenação e paginação aceitos por `consultar_planilhao`.
+
+    Returns:
+        tuple: (pd.DataFrame da página, total de linhas filtradas, página devolvida).
+    """
+    logger.info("Consultando página do planilhão para a data base: %s", data_base)
+    try:
+        return consultar_planilhao(data_base, **consulta)
     except Exception as e:
-        logger.error(f"Erro ao consultar o planilhão para a data base: {data_base} | {e}")
+        logger.error("Erro ao consultar página do planilhão para a data base: %s | %s", data_base, e)
         raise
 
 
@@ -49,16 +70,16 @@ def menu_estrategia(data, indicador_rent, indicador_desc, num):
     Raises:
         ValueError: Se nenhum dado for retornado ou ocorrer um erro no cálculo.
     """
-    logger.info(f"Calculando estratégia com indicador_rent: {indicador_rent}, indicador_desc: {indicador_desc}, num: {num}")
+    logger.info("Calculando estratégia com indicador_rent: %s, indicador_desc: %s, num: %s", indicador_rent, indicador_desc, num)
     try:
         df = carteira(data, indicador_rent, indicador_desc, num)
         if df is None or df.empty:
             logger.warning("Nenhum dado retornado pela função carteira.")
             raise ValueError("Nenhum dado foi encontrado para a estratégia.")
-        logger.info(f"Estratégia gerada com sucesso | Linhas retornadas: {len(df)}")
+        logger.info("Estratégia gerada com sucesso | Linhas retornadas: %s", len(df))
         return df
     except Exception as e:
-        logger.error(f"Erro ao calcular estratégia | Indicadores: {indicador_rent}, {indicador_desc}, Num: {num} | {e}")
+        logger.error("Erro ao calcular estratégia | Indicadores: %s, %s, Num: %s | %s", indicador_rent, indicador_desc, num, e)
         raise
 
 
@@ -77,7 +98,7 @@ def menu_graficos(data_ini, data_fim, acoes_carteira):
     Raises:
         ValueError: Se a carteira estiver vazia ou nenhum dado for encontrado.
     """
-    logger.info(f"Iniciando geração de gráficos para a carteira | Data inicial: {data_ini}, Data final: {data_fim}, Ações: {acoes_carteira}")
+    logger.info("Iniciando geração de gráficos para a carteira | Data inicial: %s, Data final: %s, Ações: %s", data_ini, data_fim, len(acoes_carteira))
     try:
         if not acoes_carteira:
             logger.error("Nenhuma ação na carteira foi fornecida para gerar gráficos.")
@@ -87,10 +108,10 @@ def menu_graficos(data_ini, data_fim, acoes_carteira):
         if df is None or df.empty:
             logger.warning("Nenhum dado retornado para os gráficos da carteira.")
             raise ValueError("Nenhum dado foi encontrado para os gráficos da carteira.")
-        logger.info(f"Gráficos gerados com sucesso para a carteira | Linhas retornadas: {len(df)}")
+        logger.info("Gráficos gerados com sucesso para a carteira | Linhas retornadas: %s", len(df))
         return df
     except Exception as e:
-        logger.error(f"Erro ao gerar gráficos para a carteira | {e}")
+        logger.error("Erro ao gerar gráficos para a carteira | %s", e)
         raise
 
 
@@ -108,26 +129,28 @@ def grafico_ibov(data_ini, data_fim):
     Raises:
         ValueError: Se nenhum dado for encontrado para o Ibovespa.
     """
-    logger.info(f"Iniciando geração de gráficos para o Ibovespa | Data inicial: {data_ini}, Data final: {data_fim}")
+    logger.info("Iniciando geração de gráficos para o Ibovespa | Data inicial: %s, Data final: %s", data_ini, data_fim)
     try:
         df = pegar_df_preco_diversos(data_ini, data_fim)
         if df is None or df.empty:
             logger.warning("Nenhum dado retornado para os gráficos do Ibovespa.")
             raise ValueError("Nenhum dado foi encontrado para os gráficos do Ibovespa.")
-        logger.info(f"Gráficos do Ibovespa gerados com sucesso | Linhas retornadas: {len(df)}")
+        logger.info("Gráficos do Ibovespa gerados com sucesso | Linhas retornadas: %s", len(df))
         return df
     except Exception as e:
-        logger.error(f"Erro ao gerar gráficos para o Ibovespa | {e}")
+        logger.error("Erro ao gerar gráficos para o Ibovespa | %s", e)
         raise
 
 
-def Comparacao_graficos(df_carteira, df_ibov):
+def Comparacao_graficos(df_carteira, df_ibov, janela=None, df_retornos=None):
     """
     Gera um gráfico comparativo entre a carteira de ações e o Ibovespa.
 
     Args:
         df_carteira (pd.DataFrame): Dados da carteira de ações.
         df_ibov (pd.DataFrame): Dados do Ibovespa.
+        janela (tuple, opcional): (inicio, fim) do trecho a exibir em detalhe. Padrão: o período inteiro.
+        df_retornos (pd.DataFrame, opcional): Retornos já calculados para a consulta, reaproveitados a cada redesenho.
 
     Raises:
         ValueError: Se os dados da carteira ou do Ibovespa estiverem ausentes ou inválidos.
@@ -142,8 +165,8 @@ def Comparacao_graficos(df_carteira, df_ibov):
             raise ValueError("Dados do Ibovespa não estão disponíveis para a comparação.")
 
         # Gera o gráfico comparativo usando a função plot_comparativo_acumulado
-        plot_comparativo_acumulado(df_carteira, df_ibov)
-        logger.info(f"Comparação de gráficos gerada com sucesso.")
+        plot_comparativo_acumulado(df_carteira, df_ibov, janela, df_retornos)
+        logger.info("Comparação de gráficos gerada com sucesso.")
     except Exception as e:
-        logger.error(f"Erro ao gerar comparação de gráficos | {e}")
+        logger.error("Erro ao gerar comparação de gráficos | %s", e)
         raise
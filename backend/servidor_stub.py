@@ -0,0 +1,167 @@
+"""
+Servidor local que imita a API do Laboratório de Finanças, para testes de carga e profiling sem a rede.
+
+Atende os endpoints `planilhao`, `preco-corrigido` e `preco-diversos` a partir das gravações feitas
+com API_MODO=gravar ou, na falta delas, com dados sintéticos. A latência e a taxa de erros são
+ajustáveis, para reproduzir a lentidão e a instabilidade do serviço real. As respostas 200 levam
+um ETag e requisições com If-None-Match igual recebem 304, sem corpo.
+
+Uso (a partir da raiz do projeto):
+    python -m backend.servidor_stub --porta 8000 --latencia 0.3 --jitter 0.2 --taxa-erro 0.05
+
+e, em outro terminal, aponte o app para ele:
+    API_BASE_URL=http://localhost:8000/api/v1 streamlit run app.py
+"""
+import gzip
+import json
+import hashlib
+import time
+import random
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+from backend.config import API_GRAVACOES_DIR
+from backend.dados_sinteticos import gerar_planilhao, gerar_precos
+from backend.gravacao import ler_gravacao
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+ENDPOINTS = ('planilhao', 'preco-corrigido', 'preco-diversos')
+
+
+def gerar_resposta(endpoint: str, params: dict, linhas_planilhao: int = 1000) -> dict:
+    """
+    Gera dados sintéticos no formato de um endpoint da API.
+
+    Args:
+        endpoint (str): 'planilhao', 'preco-corrigido' ou 'preco-diversos'.
+        params (dict): Parâmetros da query string.
+        linhas_planilhao (int, opcional): Tickers no planilhão gerado. Padrão: 1000.
+
+    Returns:
+        dict: Payload no formato {'dados': [...]}.
+
+    Raises:
+        KeyError: Se faltar um parâmetro obrigatório do endpoint.
+    """
+    if endpoint == 'planilhao':
+        return gerar_planilhao(linhas_planilhao, params['data_base'])
+    preco_inicial = 100000.0 if endpoint == 'preco-diversos' else None
+    return gerar_precos(params['ticker'], params['data_ini'], params['data_fim'], preco_inicial=preco_inicial)
+
+
+class ManipuladorStub(BaseHTTPRequestHandler):
+    """Atende as requisições GET do servidor stub; a configuração fica em `self.server`."""
+
+    protocol_version = 'HTTP/1.1'  # Mantém a conexão aberta (keep-alive), como o serviço real.
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        endpoint = partes.path.rstrip('/').rsplit('/', 1)[-1]
+        params = dict(parse_qsl(partes.query))
+
+        if endpoint not in ENDPOINTS:
+            return self._responder(404, {'detail': 'Endpoint não encontrado.'})
+
+        servidor = self.server
+        time.sleep(servidor.latencia + random.uniform(0, servidor.jitter))
+        if random.random() < servidor.taxa_erro:
+            return self._responder(servidor.status_erro, {'detail': 'Erro simulado pelo servidor stub.'})
+
+        gravacao = ler_gravacao(servidor.pasta_gravacoes, endpoint, params) if servidor.pasta_gravacoes else None
+        if gravacao is not None:
+            return self._responder(gravacao['status'], gravacao['corpo'].encode('utf-8'))
+        if not servidor.sinteticos:
+            return self._responder(404, {'detail': 'Gravação ausente.'})
+        try:
+            return self._responder(200, gerar_resposta(endpoint, params, servidor.linhas_planilhao))
+        except (KeyError, ValueError) as e:
+            return self._responder(400, {'detail': f'Parâmetros inválidos: {e}'})
+
+    def _responder(self, status: int, corpo):
+        """Envia a resposta em JSON, comprimida com gzip quando o cliente aceita (ou 304, se não mudou)."""
+        if not isinstance(corpo, bytes):
+            corpo = json.dumps(corpo).encode('utf-8')
+        etag = f'"{hashlib.sha1(corpo).hexdigest()[:20]}"'
+        if status == 200 and etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if status == 200:
+            self.send_header('ETag', etag)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            corpo = gzip.compress(corpo, compresslevel=5)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        logger.info("Servidor stub | %s | %s", self.address_string(), format % args)
+
+
+def criar_servidor(host: str = '127.0.0.1', porta: int = 8000, latencia: float = 0.0, jitter: float = 0.0,
+                   taxa_erro: float = 0.0, status_erro: int = 503, pasta_gravacoes: str = API_GRAVACOES_DIR,
+                   sinteticos: bool = True, linhas_planilhao: int = 1000) -> ThreadingHTTPServer:
+    """
+    Cria o servidor stub (sem iniciá-lo).
+
+    Args:
+        host (str, opcional): Endereço de escuta. Padrão: '127.0.0.1'.
+        porta (int, opcional): Porta de escuta (0 escolhe uma porta livre). Padrão: 8000.
+        latencia (float, opcional): Atraso fixo de cada resposta, em segundos.
+        jitter (float, opcional): Atraso aleatório máximo somado à latência, em segundos.
+        taxa_erro (float, opcional): Fração das requisições respondidas com `status_erro`.
+        status_erro (int, opcional): Status das respostas de erro simuladas. Padrão: 503.
+        pasta_gravacoes (str, opcional): Pasta das gravações (None para não usar gravações).
+        sinteticos (bool, opcional): Gera dados sintéticos quando não há gravação. Padrão: True.
+        linhas_planilhao (int, opcional): Tickers no planilhão sintético. Padrão: 1000.
+
+    Returns:
+        ThreadingHTTPServer: Servidor pronto para `serve_forever()`.
+    """
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorStub)
+    servidor.daemon_threads = True
+    servidor.latencia = latencia
+    servidor.jitter = jitter
+    servidor.taxa_erro = taxa_erro
+    servidor.status_erro = status_erro
+    servidor.pasta_gravacoes = pasta_gravacoes
+    servidor.sinteticos = sinteticos
+    servidor.linhas_planilhao = linhas_planilhao
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='Endereço de escuta.')
+    parser.add_argument('--porta', type=int, default=8000, help='Porta de escuta.')
+    parser.add_argument('--latencia', type=float, default=0.0, help='Atraso fixo de cada resposta (s).')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Atraso aleatório máximo somado à latência (s).')
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help='Fração das requisições que falham (0 a 1).')
+    parser.add_argument('--status-erro', type=int, default=503, help='Status HTTP das falhas simuladas.')
+    parser.add_argument('--gravacoes', default=API_GRAVACOES_DIR, help='Pasta das gravações.')
+    parser.add_argument('--sem-sinteticos', action='store_true', help='Responde 404 quando não há gravação.')
+    parser.add_argument('--linhas-planilhao', type=int, default=1000, help='Tickers no planilhão sintético.')
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.host, args.porta, args.latencia, args.jitter, args.taxa_erro, args.status_erro,
+                              args.gravacoes, not args.sem_sinteticos, args.linhas_planilhao)
+    host, porta = servidor.server_address[:2]
+    print(f"Servidor stub em http://{host}:{porta}/api/v1 (Ctrl+C para encerrar)")
+    logger.info("Servidor stub iniciado em http://%s:%s/api/v1 | Latência: %ss, jitter: %ss, taxa de erro: %s",
+                host, porta, args.latencia, args.jitter, args.taxa_erro)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == '__main__':
+    main()
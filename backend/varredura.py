@@ -0,0 +1,83 @@
+from itertools import product
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from backend.backtest import gerar_datas_rebalanceamento, calcular_backtest, resumir_backtest
+from backend.config import VARREDURA_MAX_WORKERS, PRECO_MAX_WORKERS
+from backend.ranking import COLUNAS_CARTEIRA, INDICADORES_RENTABILIDADE, INDICADORES_DESCONTO, ranquear_combinacoes
+from backend.views import pegar_df_planilhao, pegar_matriz_preco_corrigido, pegar_indice_ranking
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+
+def varrer_estrategias(data_ini, data_fim, nums=(10, 20, 30), indicadores_rent=None, indicadores_desc=None,
+                       frequencia: str = 'mensal', ordenar_por: str = 'sharpe', max_workers: int = None) -> pd.DataFrame:
+    """
+    Avalia todas as combinações (indicador_rent, indicador_desc, num) da estratégia em um período.
+
+    Cada snapshot do planilhão é obtido uma única vez e compartilhado por todas as combinações. O
+    ranqueamento de cada data roda em um pool de threads, os preços da união de todos os tickers
+    selecionados são obtidos uma única vez e cada combinação vira um backtest vetorizado.
+
+    O ranqueamento de uma data leva milissegundos a partir do índice pré-calculado, então roda em
+    threads: um pool de processos gastaria mais copiando os snapshots do que ranqueando, e criar
+    processos por fork a partir do Streamlit (que tem várias threads) pode travar o filho.
+
+    Args:
+        data_ini (date | str): Início do período avaliado.
+        data_fim (date | str): Fim do período avaliado.
+        nums (iterable, opcional): Quantidades de ações a testar. Padrão: (10, 20, 30).
+        indicadores_rent (list, opcional): Indicadores de rentabilidade. Padrão: todos da página de Estratégia.
+        indicadores_desc (list, opcional): Indicadores de desconto. Padrão: todos da página de Estratégia.
+        frequencia (str, opcional): 'mensal' ou 'trimestral'. Padrão: 'mensal'.
+        ordenar_por (str, opcional): Métrica usada para ordenar o resultado (decrescente). Padrão: 'sharpe'.
+        max_workers (int, opcional): Threads do pool de ranqueamento. Padrão: VARREDURA_MAX_WORKERS.
+
+    Returns:
+        pd.DataFrame: Uma linha por combinação com as métricas de `resumir_backtest`, da melhor para a pior.
+
+    Raises:
+        ValueError: Se nenhum planilhão for encontrado no período.
+    """
+    combinacoes = list(product(indicadores_rent or INDICADORES_RENTABILIDADE,
+                               indicadores_desc or INDICADORES_DESCONTO,
+                               sorted(set(nums))))
+    datas = gerar_datas_rebalanceamento(data_ini, data_fim, frequencia)
+    logger.info("Iniciando varredura de %s combinações em %s datas de %s a %s", len(combinacoes), len(datas), data_ini, data_fim)
+    try:
+        # 1. Um snapshot por data, obtido uma única vez (e guardado no cache em disco).
+        with ThreadPoolExecutor(max_workers=PRECO_MAX_WORKERS) as executor:
+            snapshots = dict(zip(datas, executor.map(lambda data: pegar_df_planilhao(data.date(), COLUNAS_CARTEIRA), datas)))
+        snapshots = {data: df[COLUNAS_CARTEIRA] for data, df in snapshots.items() if not df.empty}
+        if not snapshots:
+            raise ValueError("Nenhum planilhão encontrado no período da varredura.")
+
+        # 2. Ranqueamento de todas as combinações a partir do índice de cada data, uma tarefa por data.
+        carteiras = {combinacao: {} for combinacao in combinacoes}
+        with ThreadPoolExecutor(max_workers=max_workers or VARREDURA_MAX_WORKERS) as executor:
+            tarefas = [
+                executor.submit(ranquear_combinacoes, data, df, combinacoes, pegar_indice_ranking(data.date(), df))
+                for data, df in snapshots.items()
+            ]
+            for tarefa in tarefas:
+                data, resultado = tarefa.result()
+                for combinacao, acoes in resultado.items():
+                    carteiras[combinacao][data] = acoes
+
+        # 3. Preços da união de todos os tickers selecionados, lidos uma única vez do painel em disco.
+        tickers = list(dict.fromkeys(t for por_data in carteiras.values() for acoes in por_data.values() for t in acoes))
+        matriz_precos = pegar_matriz_preco_corrigido(min(snapshots).date(), data_fim, tickers)
+
+        # 4. Um backtest vetorizado por combinação sobre a mesma matriz de preços.
+        linhas = []
+        for (rent, desc, num), por_data in carteiras.items():
+            df_diario, df_periodos = calcular_backtest(matriz_precos, por_data)
+            linhas.append({'indicador_rent': rent, 'indicador_desc': desc, 'num': num,
+                           **resumir_backtest(df_diario, df_periodos)})
+
+        resultados = pd.DataFrame(linhas).sort_values(ordenar_por, ascending=False, na_position='last')
+        logger.info("Varredura concluída | Combinações avaliadas: %s", len(resultados))
+        return resultados.reset_index(drop=True)
+    except Exception as e:
+        logger.error("Erro na varredura de estratégias: %s", e)
+        raise
@@ -1,72 +1,146 @@
+import numpy as np
 import pandas as pd
 from datetime import date
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-from backend.apis import pegar_planilhao, get_preco_corrigido, get_preco_diversos
+from backend.apis import pegar_planilhao_colunas, get_preco_corrigido, get_preco_diversos
+from backend.cache_memoria import cache_resultado
+from backend.cache import ler_planilhao_cache, salvar_planilhao_cache, ler_indice_ranking, salvar_indice_ranking
+from backend.config import PRECO_MAX_WORKERS, CACHE_MEMORIA_TTL
+from backend.graficos import linha_retorno, exibir_grafico
+from backend.historico import HistoricoPrecos
+from backend.metricas import instrumentar
+from backend.painel_precos import PainelPrecos
+from backend.painel_planilhao import PainelPlanilhao
+from backend.retornos import calcular_retornos
+from backend.ranking import COLUNAS_CARTEIRA, INDICADORES_RENTABILIDADE, INDICADORES_DESCONTO, construir_indice_ranking, ranquear_carteira_indice
 import plotly.graph_objects as go
-from log_config.logging_config import logger  # Importando o logger centralizado para logs consistentes.
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Painel em disco (memmap) com os preços corrigidos de todos os tickers já consultados, para backtests.
+painel_preco_corrigido = PainelPrecos('preco-corrigido')
+
+# Séries históricas locais: a API só é consultada para os períodos ainda não armazenados.
+# Quando a série corrigida de um ticker muda de base de ajuste, o painel descarta a cópia dele.
+historico_preco_corrigido = HistoricoPrecos(
+    'preco-corrigido', lambda ticker, data_ini, data_fim: get_preco_corrigido(ticker, data_ini, data_fim),
+    ao_reconstruir=lambda ticker: painel_preco_corrigido.invalidar([ticker])
+)
+historico_preco_diversos = HistoricoPrecos(
+    'preco-diversos', lambda ticker, data_ini, data_fim: get_preco_diversos(data_ini, data_fim, ticker)
+)
+
+# Painel em disco (Parquet por data base) com os planilhões já consultados, para séries de indicadores.
+painel_planilhao = PainelPlanilhao(lambda data_base: pegar_df_planilhao(data_base, levantar_erro=True))
 
 # Filtrar empresas duplicadas
-def filtrar_duplicado(df: pd.DataFrame, meio: str = None) -> pd.DataFrame:
+@instrumentar
+def filtrar_duplicado(df: pd.DataFrame, meio=None, ascendente=False) -> pd.DataFrame:
     """
     Filtra empresas duplicadas no DataFrame, mantendo o ticker com maior valor na coluna especificada.
 
+    A escolha é feita em uma única passada: as linhas duplicadas são ordenadas pelos critérios
+    (ordenação estável, valores ausentes por último) e fica o primeiro ticker de cada empresa.
+
     Args:
         df (pd.DataFrame): DataFrame contendo as informações das empresas e seus tickers.
-        meio (str, opcional): Coluna usada como critério para filtrar duplicatas. Padrão: 'volume'.
+        meio (str | list, opcional): Coluna, ou lista de colunas para desempate, usada como critério
+            para filtrar duplicatas. Padrão: 'volume'.
+        ascendente (bool | list, opcional): Ordem de cada critério. Padrão: False (maior valor vence).
 
     Returns:
         pd.DataFrame: DataFrame sem empresas duplicadas.
     """
     logger.info("Iniciando filtragem de duplicados.")  # Log inicial do processo.
     meio = meio or 'volume'  # Define a coluna padrão como 'volume' caso não seja especificado.
+    criterios = [meio] if isinstance(meio, str) else list(meio)
     try:
         # Identificar empresas duplicadas
         df_dup = df[df.empresa.duplicated(keep=False)]  # Filtra linhas onde a coluna 'empresa' está duplicada.
-        lst_dup = df_dup.empresa.unique()  # Obtém os nomes únicos das empresas duplicadas.
-        lst_final = []
 
-        # Seleciona o ticker com maior valor na coluna especificada para cada empresa duplicada.
-        for tic in lst_dup:
-            tic_dup = df_dup[df_dup.empresa == tic].sort_values(by=[meio], ascending=False)['ticker'].values[0]
-            lst_final.append(tic_dup)
+        # Seleciona o ticker com maior valor nos critérios para cada empresa duplicada.
+        df_ordenado = df_dup.sort_values(by=criterios, ascending=ascendente, kind='mergesort', na_position='last')
+        lst_final = df_ordenado.drop_duplicates(subset='empresa', keep='first')['ticker']
 
         # Remove duplicatas restantes com base nos tickers selecionados.
         lst_dup = df_dup[~df_dup.ticker.isin(lst_final)]['ticker'].values
-        logger.info(f"Filtragem concluída com sucesso. Empresas duplicadas filtradas: {len(lst_final)}")
+        logger.info("Filtragem concluída com sucesso. Empresas duplicadas filtradas: %s", len(lst_final))
         return df[~df.ticker.isin(lst_dup)]  # Retorna o DataFrame sem duplicatas.
     except Exception as e:
-        logger.error(f"Erro ao filtrar duplicados: {e}")  # Log de erro detalhado.
+        logger.error("Erro ao filtrar duplicados: %s", e)  # Log de erro detalhado.
         raise
 
 # Processar e filtrar o planilhão
-def pegar_df_planilhao(data_base: date) -> pd.DataFrame:
+@instrumentar
+@cache_resultado(ttl=CACHE_MEMORIA_TTL['planilhao'])
+def pegar_df_planilhao(data_base: date, colunas=None, levantar_erro: bool = False) -> pd.DataFrame:
     """
     Obtém e processa o planilhão para uma data base específica, removendo duplicatas.
+    O snapshot processado é guardado no cache em disco e reaproveitado nas chamadas seguintes.
+
+    A resposta da API é lida em streaming e, com `colunas`, apenas essas colunas (mais 'ticker' e
+    'volume', usadas na remoção de duplicatas) são carregadas. Um snapshot completo em cache atende
+    qualquer projeção, lendo do Parquet só as colunas pedidas; um projetado fica gravado à parte.
 
     Args:
         data_base (date): Data base para consulta do planilhão.
+        colunas (list, opcional): Colunas necessárias. Padrão: todas.
+        levantar_erro (bool, opcional): Se True, uma falha na consulta à API levanta RuntimeError em vez
+            de devolver um DataFrame vazio, que passa a indicar apenas uma data sem planilhão. Padrão: False.
 
     Returns:
-        pd.DataFrame: DataFrame com os dados processados e filtrados.
+        pd.DataFrame: DataFrame com os dados processados e filtrados, com a coluna 'empresa'.
+
+    Raises:
+        RuntimeError: Se `levantar_erro` for True e a consulta à API falhar.
     """
-    logger.info(f"Consultando planilhão para a data base: {data_base}")  # Log do início do processo.
+    logger.info("Consultando planilhão para a data base: %s", data_base)  # Log do início do processo.
     try:
-        dados = pegar_planilhao(data_base)  # Obtém dados do planilhão para a data base fornecida.
-        if dados:
-            dados = dados['dados']  # Extrai os dados relevantes.
-            planilhao = pd.DataFrame(dados)  # Converte para DataFrame.
-            planilhao['empresa'] = [ticker[:4] for ticker in planilhao.ticker.values]  # Cria coluna 'empresa'.
+        projecao = None if colunas is None else list(dict.fromkeys(['ticker', 'volume', *colunas]))
+        df = ler_planilhao_cache(data_base, projecao)  # Tenta reaproveitar o snapshot já processado.
+        if df is not None:
+            return df
+        planilhao = pegar_planilhao_colunas(data_base, projecao)  # Lê a resposta em streaming, já projetada.
+        if planilhao is not None and not planilhao.empty:
+            planilhao = planilhao.assign(empresa=planilhao['ticker'].str[:4])  # Cria coluna 'empresa' sem alterar o DataFrame recebido.
             df = filtrar_duplicado(planilhao)  # Remove duplicatas usando a função `filtrar_duplicado`.
-            logger.info(f"Planilhão processado com sucesso. Total de linhas: {len(df)}")
+            salvar_planilhao_cache(data_base, df, parcial=colunas is not None)  # Guarda o snapshot processado no cache.
+            if set(INDICADORES_RENTABILIDADE + INDICADORES_DESCONTO) <= set(df.columns):
+                salvar_indice_ranking(data_base, construir_indice_ranking(df))  # Guarda o índice de ranking ao lado.
+            logger.info("Planilhão processado com sucesso. Total de linhas: %s", len(df))
             return df
-        else:
-            logger.warning("Nenhum dado retornado para o planilhão.")
-            return pd.DataFrame()  # Retorna um DataFrame vazio se não houver dados.
+        if planilhao is None and levantar_erro:
+            raise RuntimeError(f"Falha na consulta ao planilhão da data base {data_base}")
+        logger.warning("Nenhum dado retornado para o planilhão.")
+        return pd.DataFrame()  # Retorna um DataFrame vazio se não houver dados.
     except Exception as e:
-        logger.error(f"Erro ao processar o planilhão: {e}")
+        logger.error("Erro ao processar o planilhão: %s", e)
         raise
 
+# Obter o índice de ranking do planilhão
+@instrumentar
+def pegar_indice_ranking(data_base: date, df: pd.DataFrame) -> dict:
+    """
+    Obtém o índice de ranking de uma data base, lendo do cache ou construindo e gravando se necessário.
+
+    Args:
+        data_base (date): Data base do planilhão.
+        df (pd.DataFrame): Planilhão processado da mesma data base.
+
+    Returns:
+        dict: Índice {indicador: posições ordenadas} compatível com `df`.
+    """
+    indice = ler_indice_ranking(data_base)
+    if indice is None or any(len(ordem) != len(df) for ordem in indice.values()):
+        indice = construir_indice_ranking(df)
+        salvar_indice_ranking(data_base, indice)
+    return indice
+
 # Gerar carteira baseada em indicadores
+@instrumentar
+@cache_resultado(ttl=CACHE_MEMORIA_TTL['carteira'])
 def carteira(data, indicador_rent, indicador_desc, num):
     """
     Gera uma carteira com base em indicadores de rentabilidade e desconto.
@@ -80,75 +154,340 @@ def carteira(data, indicador_rent, indicador_desc, num):
     Returns:
         Tuple[pd.DataFrame, List[str]]: DataFrame com as ações selecionadas e lista de tickers.
     """
-    logger.info(f"Gerando carteira com base nos indicadores: {indicador_rent}, {indicador_desc} e num ações: {num}")
+    logger.info("Gerando carteira com base nos indicadores: %s, %s e num ações: %s", indicador_rent, indicador_desc, num)
     try:
-        # Obtém os dados do planilhão processado.
-        df = pegar_df_planilhao(data)
+        # Obtém os dados do planilhão processado (apenas as colunas usadas pela estratégia).
+        df = pegar_df_planilhao(data, COLUNAS_CARTEIRA)
         if df.empty:
             logger.warning("Nenhum dado encontrado no planilhão para a data selecionada.")
             raise ValueError("Planilhão vazio.")
 
-        # Seleciona as colunas de interesse.
-        colunas = ["ticker", "setor", "data_base", "roc", "roe", "roic", "earning_yield", "dividend_yield", "p_vp"]
-        df = df[colunas]
+        # Ranqueia as ações pelos dois indicadores a partir do índice pré-calculado.
+        indice = pegar_indice_ranking(data, df)
+        df_sorted, acoes_carteira = ranquear_carteira_indice(df, indice, indicador_rent, indicador_desc, num)
+        logger.info("Carteira gerada com sucesso. Ações selecionadas: %s", len(acoes_carteira))
+        logger.debug("Ações da carteira: %s", acoes_carteira)
+        return df_sorted, acoes_carteira
+    except Exception as e:
+        logger.error("Erro ao gerar a carteira: %s", e)
+        raise
+
+# Montar um único DataFrame de preços a partir das séries de cada ticker
+@instrumentar
+def _montar_df_precos(blocos, com_ticker: bool = True) -> pd.DataFrame:
+    """
+    Junta as séries de preço de vários tickers em um único DataFrame, materializado uma só vez.
+
+    As colunas de cada série são reunidas como arrays e concatenadas no final, evitando copiar o
+    DataFrame acumulado a cada ticker. O resultado usa tipos compactos: ticker categórico, preços
+    em float32 e datas em datetime64; o retorno diário, calculado sobre os preços originais, fica em float64.
+
+    Args:
+        blocos (list): Lista de tuplas (ticker, pd.DataFrame) na ordem desejada; blocos vazios são ignorados.
+        com_ticker (bool, opcional): Se True, adiciona a coluna 'ticker' e o 'retorno_diario' de cada ticker.
+
+    Returns:
+        pd.DataFrame: DataFrame com as séries empilhadas, ou vazio se não houver dados.
+    """
+    blocos = [(ticker, df) for ticker, df in blocos if df is not None and not df.empty]
+    if not blocos:
+        return pd.DataFrame()
+
+    tamanhos = np.array([len(df) for _, df in blocos])
+    colunas = list(dict.fromkeys(c for _, df in blocos for c in df.columns if c != 'ticker'))
+    arrays = {}
+    for coluna in colunas:
+        arrays[coluna] = np.concatenate([
+            df[coluna].to_numpy() if coluna in df else np.full(len(df), np.nan) for _, df in blocos
+        ])
+
+    if com_ticker:
+        categorias = pd.Index(pd.unique(pd.Series([ticker for ticker, _ in blocos])))
+        codigos = np.repeat(categorias.get_indexer([ticker for ticker, _ in blocos]), tamanhos)
+        arrays['ticker'] = pd.Categorical.from_codes(codigos, categories=categorias)
+        # Retorno diário de todos os tickers de uma vez, como o pct_change do pandas: um fechamento ausente
+        # é preenchido com o último válido do mesmo ticker, e o primeiro dia de cada ticker fica sem retorno.
+        fechamento = arrays['fechamento'].astype(np.float64)
+        inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+        ultimo_valido = np.where(np.isnan(fechamento), -1, np.arange(len(fechamento)))
+        ultimo_valido[inicios] = inicios  # Não herda o fechamento do ticker anterior.
+        preenchido = fechamento[np.maximum.accumulate(ultimo_valido)]
+        retorno = np.full(len(fechamento), np.nan)
+        retorno[1:] = preenchido[1:] / preenchido[:-1] - 1
+        retorno[inicios] = np.nan
+        arrays['retorno_diario'] = retorno
+
+    for coluna, valores in arrays.items():
+        if coluna == 'data':
+            arrays[coluna] = pd.to_datetime(valores)
+        elif isinstance(valores, np.ndarray) and valores.dtype.kind == 'f' and coluna != 'retorno_diario':
+            arrays[coluna] = valores.astype(np.float32)  # Retornos ficam em float64: são acumulados depois.
+    return pd.DataFrame(arrays)
+
+# Obter o preço corrigido de um único ticker
+@instrumentar
+def _baixar_preco_corrigido(ticker, data_ini, data_fim):
+    """
+    Obtém os preços corrigidos de um ticker pelo histórico local.
+
+    Args:
+        ticker (str): Ticker da ação.
+        data_ini (date): Data inicial para consulta.
+        data_fim (date): Data final para consulta.
+
+    Returns:
+        pd.DataFrame or None: Preços do ticker, ou None se não houver dados.
+    """
+    # Lê o histórico local, que consulta a API apenas para as lacunas do intervalo.
+    df_temp = historico_preco_corrigido.obter(ticker, data_ini, data_fim)
+    return None if df_temp.empty else df_temp
 
-        # Filtra as ações com base no indicador de rentabilidade.
-        df = df.nlargest(300, indicador_rent).reset_index(drop=True)
-        df['index_rent'] = df.index
+# Obter preços corrigidos para os tickers da carteira
+@instrumentar
+@cache_resultado(ttl=CACHE_MEMORIA_TTL['precos'])
+def pegar_df_preco_corrigido(data_ini, data_fim, acoes_carteira, max_workers: int = None) -> pd.DataFrame:
+    """
+    Obtém os preços corrigidos das ações selecionadas em um intervalo de datas.
 
-        # Filtra as ações com base no indicador de desconto.
-        if indicador_desc == 'p_vp':
-            df = df.nsmallest(300, indicador_desc).reset_index(drop=True)
+    Os tickers são consultados em paralelo por um pool de threads limitado, e o resultado
+    mantém a ordem de `acoes_carteira`.
+
+    Args:
+        data_ini (date): Data inicial para consulta.
+        data_fim (date): Data final para consulta.
+        acoes_carteira (list): Lista de tickers das ações na carteira.
+        max_workers (int, opcional): Máximo de consultas simultâneas. Padrão: PRECO_MAX_WORKERS (1 = sequencial).
+
+    Returns:
+        pd.DataFrame: DataFrame com os preços corrigidos (data, ticker, fechamento, retorno_diario).
+    """
+    logger.info("Obtendo preços corrigidos de %s a %s para %s ações.", data_ini, data_fim, len(acoes_carteira))
+    logger.debug("Ações consultadas: %s", acoes_carteira)
+    max_workers = max(1, min(max_workers or PRECO_MAX_WORKERS, len(acoes_carteira) or 1))
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # `map` devolve os resultados na ordem dos tickers, independentemente de qual termina primeiro.
+            resultados = executor.map(lambda ticker: _baixar_preco_corrigido(ticker, data_ini, data_fim), acoes_carteira)
+            blocos = list(zip(acoes_carteira, resultados))
+        df_preco = _montar_df_precos(blocos)  # Monta o DataFrame final de uma só vez.
+        if df_preco.empty:
+            logger.warning("Nenhum dado retornado para os preços corrigidos.")
         else:
-            df = df.nlargest(300, indicador_desc).reset_index(drop=True)
-        df['index_desc'] = df.index
+            logger.info("Preços corrigidos obtidos com sucesso. Total de linhas: %s", len(df_preco))
+        return df_preco
+    except Exception as e:
+        logger.error("Erro ao obter preços corrigidos: %s", e)
+        raise
 
-        # Calcula a média dos rankings e seleciona as melhores ações.
-        df["media"] = df["index_desc"] + df["index_rent"]
-        df_sorted = df.sort_values(by=['media'], ascending=True).nsmallest(num, 'media').reset_index(drop=True)
-        df_sorted.index = df_sorted.index + 1
+# Obter a matriz de preços corrigidos a partir do painel em disco
+@instrumentar
+def pegar_matriz_preco_corrigido(data_ini, data_fim, acoes_carteira) -> pd.DataFrame:
+    """
+    Obtém a matriz datas x tickers de preços corrigidos lendo do painel em disco.
 
-        # Extrai os tickers das ações selecionadas.
-        acoes_carteira = df_sorted['ticker'].tolist()
-        logger.info(f"Carteira gerada com sucesso. Ações selecionadas: {acoes_carteira}")
-        return df_sorted, acoes_carteira
+    Apenas os tickers cujo período ainda não está no painel são buscados (pelo histórico local) e
+    gravados nele; a leitura em si é uma visão do arquivo mapeado em memória, sem montar um
+    DataFrame por ticker. Indicado para backtests sobre muitos tickers e períodos longos.
+
+    Args:
+        data_ini (date): Data inicial para consulta.
+        data_fim (date): Data final para consulta.
+        acoes_carteira (list): Lista de tickers.
+
+    Returns:
+        pd.DataFrame: Fechamentos em float32 (somente leitura), indexados por data, uma coluna por ticker.
+    """
+    logger.info("Obtendo matriz de preços corrigidos de %s a %s para %s ações.", data_ini, data_fim, len(acoes_carteira))
+    try:
+        faltantes = painel_preco_corrigido.faltantes(acoes_carteira, data_ini, data_fim)
+        # Tickers com o mesmo período faltante são buscados juntos.
+        por_periodo = {}
+        for ticker, periodo in faltantes.items():
+            por_periodo.setdefault(periodo, []).append(ticker)
+        for (inicio, fim), tickers in por_periodo.items():
+            df_preco = pegar_df_preco_corrigido(inicio, fim, tickers)
+            painel_preco_corrigido.gravar(df_preco, {ticker: (inicio, fim) for ticker in tickers})
+        matriz = painel_preco_corrigido.matriz(acoes_carteira, data_ini, data_fim)
+        logger.info("Matriz de preços obtida | Datas: %s, tickers buscados: %s", matriz.shape[0], len(faltantes))
+        return matriz
     except Exception as e:
-        logger.error(f"Erro ao gerar a carteira: {e}")
+        logger.error("Erro ao obter a matriz de preços corrigidos: %s", e)
         raise
-# Obter preços corrigidos para os tickers da carteira
-def pegar_df_preco_corrigido(data_ini, data_fim, acoes_carteira) -> pd.DataFrame:
+
+# Obter a série de um indicador do planilhão a partir do painel em disco
+@instrumentar
+def pegar_serie_indicador(indicador: str, datas, tickers=None) -> pd.DataFrame:
     """
-    Obtém os preços corrigidos das ações selecionadas em um intervalo de datas.
+    Obtém a série de um indicador do planilhão ao longo de várias datas base.
+
+    Apenas as datas ainda ausentes do painel são buscadas (em paralelo) e acrescentadas a ele; a
+    consulta lê do Parquet só as partições do período e as colunas necessárias.
+
+    Args:
+        indicador (str): Indicador do planilhão, por exemplo 'roic'.
+        datas (iterable): Datas base desejadas (por exemplo, um `pd.bdate_range`).
+        tickers (list, opcional): Tickers desejados. Padrão: todos.
+
+    Returns:
+        pd.DataFrame: Indexado por data base, uma coluna por ticker.
+    """
+    datas = pd.DatetimeIndex(datas)
+    logger.info("Obtendo série de %s em %s datas base.", indicador, len(datas))
+    try:
+        painel_planilhao.ingerir(datas)
+        serie = painel_planilhao.serie(indicador, tickers, datas.min(), datas.max())
+        return serie[serie.index.isin(datas)]
+    except Exception as e:
+        logger.error("Erro ao obter a série do indicador %s: %s", indicador, e)
+        raise
+
+# Obter o corte transversal de uma data base a partir do painel em disco
+@instrumentar
+def pegar_corte_planilhao(data_base: date, colunas=None) -> pd.DataFrame:
+    """
+    Obtém o planilhão de uma data base a partir do painel, ingerindo a data se necessário.
+
+    Args:
+        data_base (date): Data base desejada.
+        colunas (list, opcional): Colunas desejadas (além de 'ticker'). Padrão: todas.
+
+    Returns:
+        pd.DataFrame: Uma linha por ticker (vazio se não houver planilhão na data).
+    """
+    try:
+        painel_planilhao.ingerir([data_base])
+        return painel_planilhao.corte(data_base, colunas)
+    except Exception as e:
+        logger.error("Erro ao obter o corte do planilhão de %s: %s", data_base, e)
+        raise
+
+# Obter as opções de consulta do planilhão de uma data base
+@instrumentar
+def pegar_opcoes_planilhao(data_base: date) -> dict:
+    """
+    Obtém os setores e as colunas disponíveis no planilhão de uma data base, ingerindo a data no painel se necessário.
+
+    Args:
+        data_base (date): Data base desejada.
+
+    Returns:
+        dict: 'setores', 'colunas' e 'numericas' (listas vazias se não houver planilhão na data).
+    """
+    try:
+        painel_planilhao.ingerir([data_base])
+        return painel_planilhao.opcoes(data_base)
+    except Exception as e:
+        logger.error("Erro ao obter as opções do planilhão de %s: %s", data_base, e)
+        raise
+
+# Consultar uma página do planilhão com filtros, ordenação e projeção
+@instrumentar
+def consultar_planilhao(data_base: date, colunas=None, setores=None, prefixo=None, faixas=None,
+                        ordenar_por=None, ascendente=True, pagina=1, tamanho_pagina=50):
+    """
+    Consulta uma página do planilhão de uma data base, com filtros, ordenação e projeção feitos no
+    servidor sobre o painel em disco: apenas as linhas e colunas da página são montadas e enviadas
+    ao navegador, qualquer que seja o tamanho do universo.
+
+    Args:
+        data_base (date): Data base desejada.
+        colunas (list, opcional): Colunas exibidas (além de 'ticker'). Padrão: todas.
+        setores (list, opcional): Setores mantidos. Padrão: todos.
+        prefixo (str, opcional): Prefixo do ticker.
+        faixas (dict, opcional): {indicador: (mínimo, máximo)}; None deixa o lado aberto.
+        ordenar_por (str, opcional): Coluna da ordenação. Padrão: ordem do planilhão.
+        ascendente (bool, opcional): Ordem crescente. Padrão: True.
+        pagina (int, opcional): Página desejada, a partir de 1; páginas além da última devolvem a última. Padrão: 1.
+        tamanho_pagina (int, opcional): Linhas por página. Padrão: 50.
+
+    Returns:
+        tuple: (pd.DataFrame com as linhas da página, int com o total de linhas filtradas, int com a página devolvida).
+    """
+    logger.info("Consultando página %s do planilhão de %s | Setores: %s, prefixo: %s, faixas: %s, ordem: %s",
+                pagina, data_base, setores, prefixo, faixas, ordenar_por)
+    try:
+        painel_planilhao.ingerir([data_base])
+        consulta = dict(colunas=colunas, setores=setores, prefixo=prefixo, faixas=faixas,
+                        ordenar_por=ordenar_por, ascendente=ascendente, limite=tamanho_pagina)
+        pagina = max(1, int(pagina))
+        df, total = painel_planilhao.consultar(data_base, inicio=(pagina - 1) * tamanho_pagina, **consulta)
+        ultima = max(1, -(-total // tamanho_pagina))
+        if pagina > ultima:
+            pagina = ultima
+            df, total = painel_planilhao.consultar(data_base, inicio=(pagina - 1) * tamanho_pagina, **consulta)
+        logger.info("Página %s do planilhão obtida | Linhas: %s de %s", pagina, len(df), total)
+        return df, total, pagina
+    except Exception as e:
+        logger.error("Erro ao consultar o planilhão de %s: %s", data_base, e)
+        raise
+
+# Obter um indicador agregado por setor a partir do painel em disco
+@instrumentar
+def pegar_agregado_setor(indicador: str, datas, funcao: str = 'median') -> pd.DataFrame:
+    """
+    Obtém um indicador do planilhão agregado por setor em cada data base.
+
+    Args:
+        indicador (str): Indicador do planilhão, por exemplo 'roe'.
+        datas (iterable): Datas base desejadas.
+        funcao (str, opcional): Agregação do pandas ('median', 'mean', 'count', ...). Padrão: 'median'.
+
+    Returns:
+        pd.DataFrame: Indexado por data base, uma coluna por setor.
+    """
+    datas = pd.DatetimeIndex(datas)
+    logger.info("Obtendo %s de %s por setor em %s datas base.", funcao, indicador, len(datas))
+    try:
+        painel_planilhao.ingerir(datas)
+        agregado = painel_planilhao.agregado_setor(indicador, datas.min(), datas.max(), funcao)
+        return agregado[agregado.index.isin(datas)]
+    except Exception as e:
+        logger.error("Erro ao agregar %s por setor: %s", indicador, e)
+        raise
+
+# Versão assíncrona da busca de preços corrigidos
+@instrumentar
+async def pegar_df_preco_corrigido_async(data_ini, data_fim, acoes_carteira, cliente_api=None) -> pd.DataFrame:
+    """
+    Versão assíncrona de `pegar_df_preco_corrigido`: todos os tickers são consultados na mesma thread,
+    multiplexados pelo cliente aiohttp (com o limite de concorrência do cliente).
+
+    Usa o mesmo histórico local e devolve o mesmo DataFrame que a versão síncrona.
 
     Args:
         data_ini (date): Data inicial para consulta.
         data_fim (date): Data final para consulta.
         acoes_carteira (list): Lista de tickers das ações na carteira.
+        cliente_api (ClienteAPIAsync, opcional): Cliente assíncrono a usar. Padrão: o de `backend.apis_async`.
 
     Returns:
-        pd.DataFrame: DataFrame com os preços corrigidos e retornos diários.
+        pd.DataFrame: DataFrame com os preços corrigidos (data, ticker, fechamento, retorno_diario).
     """
-    logger.info(f"Obtendo preços corrigidos de {data_ini} a {data_fim} para as ações: {acoes_carteira}")
-    df_preco = pd.DataFrame()
+    import asyncio
+    from backend import apis_async  # Importado sob demanda: o aiohttp só é necessário aqui.
+
+    async def consultar(ticker, ini, fim):
+        return await apis_async.get_preco_corrigido(ticker, ini, fim, cliente_api)
+
+    logger.info("Obtendo preços corrigidos (assíncrono) de %s a %s para %s ações.", data_ini, data_fim, len(acoes_carteira))
+    logger.debug("Ações consultadas: %s", acoes_carteira)
     try:
-        for ticker in acoes_carteira:
-            # Chama a API para obter dados do ticker no intervalo fornecido.
-            dados = get_preco_corrigido(ticker, data_ini, data_fim)
-            if dados and 'dados' in dados:
-                df_temp = pd.DataFrame.from_dict(dados['dados'])  # Converte os dados para DataFrame.
-                df_temp['ticker'] = ticker  # Adiciona a coluna de ticker.
-                df_temp['retorno_diario'] = df_temp['fechamento'].pct_change()  # Calcula o retorno diário.
-                df_preco = pd.concat([df_preco, df_temp], axis=0, ignore_index=True)  # Adiciona ao DataFrame final.
+        resultados = await asyncio.gather(*(
+            historico_preco_corrigido.obter_async(ticker, data_ini, data_fim, consultar) for ticker in acoes_carteira
+        ))
+        df_preco = _montar_df_precos(zip(acoes_carteira, resultados))  # Monta o DataFrame final de uma só vez.
         if df_preco.empty:
             logger.warning("Nenhum dado retornado para os preços corrigidos.")
         else:
-            logger.info(f"Preços corrigidos obtidos com sucesso. Total de linhas: {len(df_preco)}")
+            logger.info("Preços corrigidos obtidos com sucesso. Total de linhas: %s", len(df_preco))
         return df_preco
     except Exception as e:
-        logger.error(f"Erro ao obter preços corrigidos: {e}")
+        logger.error("Erro ao obter preços corrigidos: %s", e)
         raise
 
 # Obter preços do índice Ibovespa
+@instrumentar
+@cache_resultado(ttl=CACHE_MEMORIA_TTL['precos'])
 def pegar_df_preco_diversos(data_ini: date, data_fim: date) -> pd.DataFrame:
     """
     Obtém os preços do índice Ibovespa em um intervalo de datas.
@@ -160,30 +499,60 @@ def pegar_df_preco_diversos(data_ini: date, data_fim: date) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame com os preços do Ibovespa.
     """
-    logger.info(f"Obtendo preços diversos de {data_ini} a {data_fim} para o Ibovespa.")
+    logger.info("Obtendo preços diversos de %s a %s para o Ibovespa.", data_ini, data_fim)
     try:
-        df_preco = pd.DataFrame()
-        dados = get_preco_diversos(data_ini, data_fim, 'ibov')  # Obtém dados do índice Ibovespa.
-        if dados:
-            dados = dados['dados']
-            df_temp = pd.DataFrame.from_dict(dados)  # Converte para DataFrame.
-            df_preco = pd.concat([df_preco, df_temp], axis=0, ignore_index=True)  # Adiciona ao DataFrame final.
+        df_temp = historico_preco_diversos.obter('ibov', data_ini, data_fim)  # Obtém dados do índice Ibovespa.
+        df_preco = _montar_df_precos([('ibov', df_temp)], com_ticker=False)  # Converte para tipos compactos.
         if df_preco.empty:
             logger.warning("Nenhum dado retornado para os preços diversos.")
         else:
-            logger.info(f"Preços diversos obtidos com sucesso. Total de linhas: {len(df_preco)}")
+            logger.info("Preços diversos obtidos com sucesso. Total de linhas: %s", len(df_preco))
         return df_preco
     except Exception as e:
-        logger.error(f"Erro ao obter preços diversos: {e}")
+        logger.error("Erro ao obter preços diversos: %s", e)
+        raise
+
+# Obter as séries de retorno da carteira e do Ibovespa de uma consulta
+@instrumentar
+@cache_resultado(ttl=CACHE_MEMORIA_TTL['precos'])
+def pegar_retornos(data_ini, data_fim, acoes_carteira) -> pd.DataFrame:
+    """
+    Obtém as séries de retorno usadas nos gráficos de carteira e Ibovespa.
+
+    O cache é indexado pelos parâmetros da consulta (período e tickers), não pelo conteúdo dos
+    DataFrames de preço: reexecuções da página e os vários gráficos da mesma consulta reaproveitam o
+    resultado sem recalcular nem percorrer os dados.
+
+    Args:
+        data_ini (date): Data inicial para consulta.
+        data_fim (date): Data final para consulta.
+        acoes_carteira (list): Lista de tickers da carteira.
+
+    Returns:
+        pd.DataFrame: Retornos diários e acumulados (carteira, buy_hold e ibov), indexados por data.
+    """
+    logger.info("Calculando retornos de %s a %s para %s ações.", data_ini, data_fim, len(acoes_carteira))
+    try:
+        df_carteira = pegar_df_preco_corrigido(data_ini, data_fim, acoes_carteira)
+        df_ibov = pegar_df_preco_diversos(data_ini, data_fim)
+        return calcular_retornos(df_carteira, df_ibov)
+    except Exception as e:
+        logger.error("Erro ao calcular os retornos: %s", e)
         raise
 
 # Plotar o retorno acumulado da carteira
-def plot_retorno_acumulado_carteira(df_carteira):
+@instrumentar
+def plot_retorno_acumulado_carteira(df_carteira, janela=None, df_ibov=None, df_retornos=None):
     """
     Plota o gráfico do retorno acumulado da carteira ao longo do tempo.
 
     Args:
-        df_carteira (pd.DataFrame): DataFrame contendo os retornos diários da carteira.
+        df_carteira (pd.DataFrame): DataFrame contendo os preços das ações da carteira.
+        janela (tuple, opcional): (inicio, fim) do trecho exibido, em resolução total quando couber
+            no orçamento de pontos. Padrão: o período inteiro.
+        df_ibov (pd.DataFrame, opcional): Preços do Ibovespa, cujo calendário alinha as datas da carteira.
+        df_retornos (pd.DataFrame, opcional): Retornos já calculados para a consulta (ver `pegar_retornos`);
+            sem eles, são calculados a partir dos preços.
 
     Returns:
         None: O gráfico é exibido na interface Streamlit.
@@ -191,17 +560,16 @@ def plot_retorno_acumulado_carteira(df_carteira):
     logger.info("Plotando o retorno acumulado da carteira.")
     try:
         fig = go.Figure()
-        # Calcula o retorno acumulado agrupado por data.
-        df_carteira_grouped = df_carteira.groupby('data')['retorno_diario'].mean().reset_index()
-        df_carteira_grouped['retorno_acumulado'] = (1 + df_carteira_grouped['retorno_diario']).cumprod() - 1
+        if df_retornos is None:
+            df_retornos = calcular_retornos(df_carteira, df_ibov)
 
         # Adiciona a linha de retorno acumulado da carteira ao gráfico.
-        fig.add_trace(go.Scatter(
-            x=df_carteira_grouped['data'],
-            y=df_carteira_grouped['retorno_acumulado'],
-            mode='lines',
-            name="Retorno Acumulado da Carteira",
-            line=dict(color='blue', width=2)
+        fig.add_trace(linha_retorno(
+            x=df_retornos.index,
+            y=df_retornos['retorno_acumulado_carteira'],
+            nome="Retorno Acumulado da Carteira",
+            cor='blue',
+            janela=janela
         ))
 
         # Configura o layout do gráfico.
@@ -214,19 +582,25 @@ def plot_retorno_acumulado_carteira(df_carteira):
             template="plotly_white"
         )
 
-        st.plotly_chart(fig, use_container_width=True)  # Exibe o gráfico no Streamlit.
+        exibir_grafico(fig, "Retorno acumulado da carteira")  # Exibe o gráfico no Streamlit e registra payload e tempo.
         logger.info("Gráfico de retorno acumulado da carteira plotado com sucesso.")
     except Exception as e:
-        logger.error(f"Erro ao plotar o retorno acumulado da carteira: {e}")
+        logger.error("Erro ao plotar o retorno acumulado da carteira: %s", e)
         raise
 
 # Plotar o retorno acumulado do Ibovespa
-def plot_retorno_acumulado_ibov(df_ibov):
+@instrumentar
+def plot_retorno_acumulado_ibov(df_ibov, janela=None, df_carteira=None, df_retornos=None):
     """
     Plota o gráfico do retorno acumulado do Ibovespa ao longo do tempo.
 
     Args:
-        df_ibov (pd.DataFrame): DataFrame contendo os preços e retornos diários do Ibovespa.
+        df_ibov (pd.DataFrame): DataFrame contendo os preços do Ibovespa.
+        janela (tuple, opcional): (inicio, fim) do trecho exibido, em resolução total quando couber
+            no orçamento de pontos. Padrão: o período inteiro.
+        df_carteira (pd.DataFrame, opcional): Preços da carteira da mesma consulta.
+        df_retornos (pd.DataFrame, opcional): Retornos já calculados para a consulta (ver `pegar_retornos`);
+            sem eles, são calculados a partir dos preços.
 
     Returns:
         None: O gráfico é exibido na interface Streamlit.
@@ -234,17 +608,16 @@ def plot_retorno_acumulado_ibov(df_ibov):
     logger.info("Plotando o retorno acumulado do Ibovespa.")
     try:
         fig = go.Figure()
-        # Calcula o retorno diário e acumulado do Ibovespa.
-        df_ibov['retorno_diario'] = df_ibov['fechamento'].pct_change()
-        df_ibov['retorno_acumulado'] = (1 + df_ibov['retorno_diario']).cumprod() - 1
+        if df_retornos is None:
+            df_retornos = calcular_retornos(df_carteira if df_carteira is not None else pd.DataFrame(), df_ibov)
 
         # Adiciona a linha de retorno acumulado do Ibovespa ao gráfico.
-        fig.add_trace(go.Scatter(
-            x=df_ibov['data'],
-            y=df_ibov['retorno_acumulado'],
-            mode='lines',
-            name="Retorno Acumulado do Ibovespa",
-            line=dict(color='green', width=2)
+        fig.add_trace(linha_retorno(
+            x=df_retornos.index,
+            y=df_retornos['retorno_acumulado_ibov'],
+            nome="Retorno Acumulado do Ibovespa",
+            cor='green',
+            janela=janela
         ))
 
         # Configura o layout do gráfico.
@@ -257,20 +630,25 @@ def plot_retorno_acumulado_ibov(df_ibov):
             template="plotly_white"
         )
 
-        st.plotly_chart(fig, use_container_width=True)  # Exibe o gráfico no Streamlit.
+        exibir_grafico(fig, "Retorno acumulado do Ibovespa")  # Exibe o gráfico no Streamlit e registra payload e tempo.
         logger.info("Gráfico de retorno acumulado do Ibovespa plotado com sucesso.")
     except Exception as e:
-        logger.error(f"Erro ao plotar o retorno acumulado do Ibovespa: {e}")
+        logger.error("Erro ao plotar o retorno acumulado do Ibovespa: %s", e)
         raise
 
 # Plotar comparativo entre carteira e Ibovespa
-def plot_comparativo_acumulado(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame):
+@instrumentar
+def plot_comparativo_acumulado(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame, janela=None, df_retornos=None):
     """
     Plota um gráfico comparativo do retorno acumulado da carteira e do Ibovespa ao longo do tempo.
 
     Args:
-        df_carteira (pd.DataFrame): DataFrame com os retornos diários da carteira.
-        df_ibov (pd.DataFrame): DataFrame com os preços e retornos diários do Ibovespa.
+        df_carteira (pd.DataFrame): DataFrame com os preços das ações da carteira.
+        df_ibov (pd.DataFrame): DataFrame com os preços do Ibovespa.
+        janela (tuple, opcional): (inicio, fim) do trecho exibido, em resolução total quando couber
+            no orçamento de pontos. Padrão: o período inteiro.
+        df_retornos (pd.DataFrame, opcional): Retornos já calculados para a consulta (ver `pegar_retornos`);
+            sem eles, são calculados a partir dos preços.
 
     Returns:
         None: O gráfico é exibido na interface Streamlit.
@@ -279,29 +657,25 @@ def plot_comparativo_acumulado(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame)
     try:
         fig = go.Figure()
 
-        # Calcula o retorno acumulado da carteira.
-        df_carteira_grouped = df_carteira.groupby('data')['retorno_diario'].mean().reset_index()
-        df_carteira_grouped['retorno_acumulado'] = (1 + df_carteira_grouped['retorno_diario']).cumprod() - 1
-
-        # Calcula o retorno acumulado do Ibovespa.
-        df_ibov['retorno_diario'] = df_ibov['fechamento'].pct_change()
-        df_ibov['retorno_acumulado'] = (1 + df_ibov['retorno_diario']).cumprod() - 1
+        # Carteira e Ibovespa saem da mesma matriz de retornos, alinhada ao calendário do índice.
+        if df_retornos is None:
+            df_retornos = calcular_retornos(df_carteira, df_ibov)
 
         # Adiciona ambas as séries de retorno ao gráfico.
-        fig.add_trace(go.Scatter(
-            x=df_carteira_grouped['data'],
-            y=df_carteira_grouped['retorno_acumulado'],
-            mode='lines',
-            name="Retorno Acumulado da Carteira",
-            line=dict(color='blue', width=2)
+        fig.add_trace(linha_retorno(
+            x=df_retornos.index,
+            y=df_retornos['retorno_acumulado_carteira'],
+            nome="Retorno Acumulado da Carteira",
+            cor='blue',
+            janela=janela
         ))
 
-        fig.add_trace(go.Scatter(
-            x=df_ibov['data'],
-            y=df_ibov['retorno_acumulado'],
-            mode='lines',
-            name="Retorno Acumulado do Ibovespa",
-            line=dict(color='green', width=2)
+        fig.add_trace(linha_retorno(
+            x=df_retornos.index,
+            y=df_retornos['retorno_acumulado_ibov'],
+            nome="Retorno Acumulado do Ibovespa",
+            cor='green',
+            janela=janela
         ))
 
         # Configura o layout do gráfico.
@@ -314,13 +688,14 @@ def plot_comparativo_acumulado(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame)
             template="plotly_white"
         )
 
-        st.plotly_chart(fig, use_container_width=True)  # Exibe o gráfico no Streamlit.
+        exibir_grafico(fig, "Comparativo carteira x Ibovespa")  # Exibe o gráfico no Streamlit e registra payload e tempo.
         logger.info("Gráfico comparativo acumulado plotado com sucesso.")
     except Exception as e:
-        logger.error(f"Erro ao plotar gráfico comparativo acumulado: {e}")
+        logger.error("Erro ao plotar gráfico comparativo acumulado: %s", e)
         raise
 
 # Validar data fornecida pelo usuário
+@instrumentar
 def validar_data(data):
     """
     Valida a data fornecida, verificando se é válida para operações.
@@ -331,7 +706,7 @@ def validar_data(data):
     Raises:
         ValueError: Se a data for inválida por ser o dia atual, um final de semana ou uma data futura.
     """
-    logger.info(f"Validando a data: {data}")
+    logger.info("Validando a data: %s", data)
     try:
         # Verifica se a data é o dia atual.
         if data == pd.to_datetime('today').date():
@@ -344,5 +719,5 @@ def validar_data(data):
             raise ValueError("Datas futuras não são permitidas.")
         logger.info("Data validada com sucesso.")
     except ValueError as e:
-        logger.error(f"Data inválida: {e}")
+        logger.error("Data inválida: %s", e)
         st.error(str(e))  # Exibe o erro na interface Streamlit.
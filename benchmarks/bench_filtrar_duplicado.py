@@ -0,0 +1,54 @@
+"""
+Micro-benchmark de `filtrar_duplicado`: compara a versão vetorizada com a antiga, que filtrava
+e ordenava `df_dup` uma vez por empresa duplicada, e confere que as duas dão o mesmo resultado.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_filtrar_duplicado --linhas 5000 --repeticoes 5
+"""
+import argparse
+import timeit
+
+import pandas as pd
+from backend.dados_sinteticos import gerar_planilhao
+from backend.views import filtrar_duplicado
+
+
+def filtrar_duplicado_laco(df: pd.DataFrame, meio: str = None) -> pd.DataFrame:
+    """Implementação anterior, com um filtro e uma ordenação por empresa duplicada."""
+    meio = meio or 'volume'
+    df_dup = df[df.empresa.duplicated(keep=False)]
+    lst_dup = df_dup.empresa.unique()
+    lst_final = []
+    for tic in lst_dup:
+        tic_dup = df_dup[df_dup.empresa == tic].sort_values(by=[meio], ascending=False)['ticker'].values[0]
+        lst_final.append(tic_dup)
+    lst_dup = df_dup[~df_dup.ticker.isin(lst_final)]['ticker'].values
+    return df[~df.ticker.isin(lst_dup)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=5000, help="Linhas do planilhão sintético.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por medição (vale a melhor).")
+    args = parser.parse_args()
+
+    planilhao = pd.DataFrame(gerar_planilhao(args.linhas)["dados"])
+    planilhao["empresa"] = planilhao.ticker.str[:4]
+    n_duplicadas = planilhao.empresa.duplicated(keep=False).sum()
+
+    esperado = filtrar_duplicado_laco(planilhao)
+    obtido = filtrar_duplicado(planilhao)
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+    tempo_laco = min(timeit.repeat(lambda: filtrar_duplicado_laco(planilhao), number=1, repeat=args.repeticoes))
+    tempo_vetor = min(timeit.repeat(lambda: filtrar_duplicado(planilhao), number=1, repeat=args.repeticoes))
+
+    print(f"Planilhão sintético: {len(planilhao)} linhas, {n_duplicadas} em empresas duplicadas")
+    print(f"Resultado idêntico à implementação anterior: {len(obtido)} linhas")
+    print(f"Laço por empresa : {tempo_laco * 1000:8.2f} ms")
+    print(f"Vetorizada       : {tempo_vetor * 1000:8.2f} ms")
+    print(f"Aceleração       : {tempo_laco / tempo_vetor:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
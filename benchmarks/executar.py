@@ -0,0 +1,294 @@
+"""
+Suíte de benchmarks dos caminhos críticos do backend, sem rede e sem TOKEN.
+
+A API do Laboratório de Finanças é substituída por payloads sintéticos em JSON (os mesmos bytes
+que a API devolveria são decodificados a cada chamada). Para cada cenário são medidos o tempo de
+parede (melhor e mediana de N execuções), o pico de memória e, pelas estatísticas do tracemalloc,
+quantas alocações o cenário fez que continuavam vivas ao final e em quantos pontos do código elas
+ocorreram. O cache em disco fica em uma pasta temporária.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.executar                      # roda tudo e compara com a baseline
+    python -m benchmarks.executar --rapido             # só os cenários pequenos
+    python -m benchmarks.executar --filtro carteira    # só cenários cujo nome contém 'carteira'
+    python -m benchmarks.executar --salvar-baseline    # grava a baseline desta máquina
+    python -m benchmarks.executar --ci                 # falha também se faltar a baseline
+
+Um cenário mais lento que `--tolerancia-tempo` ou com mais memória que `--tolerancia-memoria` em
+relação à baseline (benchmarks/baseline.json, versionada) é reportado como REGRESSÃO e o processo
+termina com código 1. Com `--ci` (ou a variável CI definida), a falta da baseline ou de um cenário
+nela também termina com código 1, em vez de passar sem comparar nada.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+
+# Ambiente isolado: o cache fica em uma pasta temporária descartável.
+PASTA_CACHE = tempfile.mkdtemp(prefix="benchmark_cache_")
+os.environ["CACHE_DIR"] = PASTA_CACHE
+
+import pandas as pd
+from streamlit import config as config_streamlit
+from streamlit.logger import set_log_level
+from backend import views
+from backend.apis import TAMANHO_BLOCO
+from backend.leitor_json import ler_tabela_json
+from backend.retornos import calcular_retornos
+from backend.cache_memoria import cache_memoria
+from backend.dados_sinteticos import gerar_planilhao, gerar_precos, gerar_tickers
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+DATA_BASE = "2024-01-02"
+DATA_FIM = "2024-12-30"
+LINHAS_PLANILHAO = 1000
+TAMANHOS_CARTEIRA = (10, 50, 300)
+ANOS = (1, 5, 10)
+
+
+class APIFalsa:
+    """
+    Substitui as funções de `backend.apis` usadas por `backend.views` por payloads sintéticos.
+
+    Os payloads são gerados uma vez, guardados como bytes JSON e decodificados a cada chamada,
+    reproduzindo o custo de `r.json()` sem acessar a rede. O planilhão é lido em blocos, como na
+    leitura em streaming da API.
+    """
+
+    def __init__(self, linhas_planilhao: int = LINHAS_PLANILHAO):
+        self.linhas_planilhao = linhas_planilhao
+        self._payloads = {}
+        self.chamadas = 0
+
+    def _payload(self, chave, gerar):
+        if chave not in self._payloads:
+            self._payloads[chave] = json.dumps(gerar()).encode()
+        self.chamadas += 1
+        return json.loads(self._payloads[chave])
+
+    def pegar_planilhao_colunas(self, data_base, colunas=None):
+        chave = ("planilhao", str(data_base))
+        if chave not in self._payloads:
+            self._payloads[chave] = json.dumps(gerar_planilhao(self.linhas_planilhao, data_base)).encode()
+        self.chamadas += 1
+        corpo = self._payloads[chave]
+        blocos = (corpo[i:i + TAMANHO_BLOCO] for i in range(0, len(corpo), TAMANHO_BLOCO))
+        return ler_tabela_json(blocos, 'dados', colunas)
+
+    def get_preco_corrigido(self, ticker, data_ini, data_fim):
+        return self._payload(("preco-corrigido", ticker, str(data_ini), str(data_fim)),
+                             lambda: gerar_precos(ticker, data_ini, data_fim))
+
+    def get_preco_diversos(self, data_ini, data_fim, ticker):
+        return self._payload(("preco-diversos", ticker, str(data_ini), str(data_fim)),
+                             lambda: gerar_precos(ticker, data_ini, data_fim, preco_inicial=100000.0))
+
+    def instalar(self):
+        """Aponta `backend.views` para a API falsa."""
+        views.pegar_planilhao_colunas = self.pegar_planilhao_colunas
+        views.get_preco_corrigido = self.get_preco_corrigido
+        views.get_preco_diversos = self.get_preco_diversos
+
+
+def limpar_cache(*subpastas):
+    """Apaga o cache em memória e o cache em disco do benchmark (ou apenas as subpastas indicadas)."""
+    cache_memoria.invalidar()
+    alvos = [os.path.join(PASTA_CACHE, s) for s in subpastas] if subpastas else [PASTA_CACHE]
+    for alvo in alvos:
+        shutil.rmtree(alvo, ignore_errors=True)
+
+
+class Cenario:
+    """Um caminho crítico a medir: `preparar` roda antes de cada execução e fica fora da medição."""
+
+    def __init__(self, nome, executar, preparar=lambda: None):
+        self.nome = nome
+        self.executar = executar
+        self.preparar = preparar
+
+
+def montar_cenarios(rapido: bool = False):
+    """
+    Monta a lista de cenários: planilhão (sem cache, do disco e da memória), carteira, preços de carteiras de 10/50/300 tickers
+    em janelas de 1/5/10 anos (sem e com o histórico local) e o gráfico comparativo.
+    """
+    data_fim = pd.Timestamp(DATA_FIM)
+    tamanhos = TAMANHOS_CARTEIRA[:1] if rapido else TAMANHOS_CARTEIRA
+    anos = ANOS[:1] if rapido else ANOS
+    universo = gerar_tickers(max(tamanhos), seed=42)
+
+    def aquecer_planilhao():
+        views.pegar_df_planilhao(DATA_BASE)
+        cache_memoria.invalidar()
+
+    cenarios = [
+        Cenario("planilhao_sem_cache", lambda: views.pegar_df_planilhao(DATA_BASE), lambda: limpar_cache()),
+        Cenario("planilhao_com_cache", lambda: views.pegar_df_planilhao(DATA_BASE), aquecer_planilhao),
+        Cenario("planilhao_em_memoria", lambda: views.pegar_df_planilhao(DATA_BASE),
+                lambda: views.pegar_df_planilhao(DATA_BASE)),
+        Cenario("carteira", lambda: views.carteira(DATA_BASE, "roic", "earning_yield", 20), aquecer_planilhao),
+    ]
+    for n in tamanhos:
+        for a in anos:
+            data_ini = (data_fim - pd.DateOffset(years=a)).date()
+            tickers = universo[:n]
+
+            def buscar(data_ini=data_ini, tickers=tickers):
+                return views.pegar_df_preco_corrigido(data_ini, data_fim.date(), tickers)
+
+            def aquecer(buscar=buscar):
+                buscar()
+                cache_memoria.invalidar()
+
+            graficos = {}
+
+            def preparar_grafico(data_ini=data_ini, buscar=buscar, graficos=graficos):
+                graficos["carteira"] = buscar()
+                graficos["ibov"] = views.pegar_df_preco_diversos(data_ini, data_fim.date())
+                graficos["retornos"] = calcular_retornos(graficos["carteira"], graficos["ibov"])
+
+            def retornar(graficos=graficos):
+                calcular_retornos(graficos["carteira"], graficos["ibov"])
+
+            def plotar(graficos=graficos):
+                # Como na página: os retornos são calculados uma vez por consulta e reaproveitados.
+                views.plot_comparativo_acumulado(graficos["carteira"], graficos["ibov"], df_retornos=graficos["retornos"])
+
+            cenarios += [
+                Cenario(f"preco_corrigido_{n}t_{a}a_sem_historico", buscar, lambda: limpar_cache("historico")),
+                Cenario(f"preco_corrigido_{n}t_{a}a_com_historico", buscar, aquecer),
+                Cenario(f"retornos_{n}t_{a}a", retornar, preparar_grafico),
+                Cenario(f"plot_comparativo_{n}t_{a}a", plotar, preparar_grafico),
+            ]
+    return cenarios
+
+
+def medir(cenario: Cenario, repeticoes: int) -> dict:
+    """
+    Mede um cenário: tempo de parede em `repeticoes` execuções e, em uma execução extra sob
+    tracemalloc, o pico de memória e as alocações feitas pelo cenário.
+
+    O tracemalloc só enxerga blocos vivos: 'alocacoes' conta os blocos alocados durante a execução
+    que não foram liberados até o fim (comparando com um retrato tirado antes), e 'locais_alocacao'
+    as linhas de código que os alocaram. Alocações temporárias aparecem apenas no pico de memória.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        cenario.preparar()
+        inicio = time.perf_counter()
+        cenario.executar()
+        tempos.append(time.perf_counter() - inicio)
+
+    cenario.preparar()
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    cenario.executar()
+    _, pico = tracemalloc.get_traced_memory()
+    depois = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    filtros = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diferencas = [d for d in depois.filter_traces(filtros).compare_to(antes.filter_traces(filtros), "lineno")
+                  if d.count_diff > 0]
+
+    return {
+        "tempo_min_s": min(tempos),
+        "tempo_mediana_s": statistics.median(tempos),
+        "pico_memoria_mb": pico / 1024 / 1024,
+        "alocacoes": sum(d.count_diff for d in diferencas),
+        "locais_alocacao": len(diferencas),
+    }
+
+
+def comparar(resultados: dict, baseline: dict, tolerancia_tempo: float, tolerancia_memoria: float):
+    """Retorna a lista de regressões (nome, métrica, valor atual, valor da baseline)."""
+    regressoes = []
+    for nome, atual in resultados.items():
+        referencia = baseline.get(nome)
+        if not referencia:
+            continue
+        if atual["tempo_min_s"] > referencia["tempo_min_s"] * (1 + tolerancia_tempo):
+            regressoes.append((nome, "tempo_min_s", atual["tempo_min_s"], referencia["tempo_min_s"]))
+        if atual["pico_memoria_mb"] > referencia["pico_memoria_mb"] * (1 + tolerancia_memoria):
+            regressoes.append((nome, "pico_memoria_mb", atual["pico_memoria_mb"], referencia["pico_memoria_mb"]))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções cronometradas por cenário.")
+    parser.add_argument("--rapido", action="store_true", help="Roda apenas a carteira de 10 tickers em 1 ano.")
+    parser.add_argument("--filtro", default="", help="Roda apenas cenários cujo nome contém este texto.")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help="Arquivo JSON da baseline.")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os resultados como nova baseline.")
+    parser.add_argument("--tolerancia-tempo", type=float, default=0.5, help="Piora de tempo aceita (0.5 = +50%%).")
+    parser.add_argument("--tolerancia-memoria", type=float, default=0.2, help="Piora de memória aceita (0.2 = +20%%).")
+    parser.add_argument("--saida", help="Grava os resultados desta execução neste arquivo JSON.")
+    parser.add_argument("--ci", action="store_true", default=bool(os.getenv("CI")),
+                        help="Falha se a baseline ou algum cenário dela estiver faltando (padrão com a variável CI).")
+    args = parser.parse_args()
+
+    # Fora do `streamlit run` o Streamlit avisa a cada gráfico que não há sessão; os avisos só poluem a saída.
+    # A configuração é lida antes, senão a leitura preguiçosa dela restauraria o nível padrão.
+    config_streamlit.get_config_options()
+    set_log_level("error")
+
+    api = APIFalsa()
+    api.instalar()
+
+    resultados = {}
+    try:
+        for cenario in montar_cenarios(args.rapido):
+            if args.filtro not in cenario.nome:
+                continue
+            cenario.preparar()
+            cenario.executar()  # Aquece os payloads da API falsa e os imports preguiçosos.
+            resultados[cenario.nome] = medir(cenario, args.repeticoes)
+            r = resultados[cenario.nome]
+            print(f"{cenario.nome:<42} {r['tempo_min_s'] * 1000:10.1f} ms (mediana {r['tempo_mediana_s'] * 1000:10.1f} ms)"
+                  f" {r['pico_memoria_mb']:9.1f} MB pico {r['alocacoes']:9d} alocações em {r['locais_alocacao']:5d} linhas", flush=True)
+    finally:
+        limpar_cache()
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultados, arquivo, indent=2, sort_keys=True)
+
+    if args.salvar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as arquivo:
+                baseline = json.load(arquivo)
+        baseline.update(resultados)
+        with open(args.baseline, "w", encoding="utf-8") as arquivo:
+            json.dump(baseline, arquivo, indent=2, sort_keys=True)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Nenhuma baseline em {args.baseline}; rode com --salvar-baseline para criar uma.")
+        return 1 if args.ci else 0
+    with open(args.baseline, encoding="utf-8") as arquivo:
+        baseline = json.load(arquivo)
+    regressoes = comparar(resultados, baseline, args.tolerancia_tempo, args.tolerancia_memoria)
+    sem_referencia = [nome for nome in resultados if nome not in baseline]
+    for nome in sem_referencia:
+        print(f"SEM BASELINE {nome}: rode com --salvar-baseline para incluí-lo.")
+    if args.ci and sem_referencia:
+        return 1
+    for nome, metrica, atual, referencia in regressoes:
+        print(f"REGRESSÃO {nome}: {metrica} {atual:.3f} (baseline {referencia:.3f}, {atual / referencia - 1:+.0%})")
+    if regressoes:
+        return 1
+    print("Sem regressões em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
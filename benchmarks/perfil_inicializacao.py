@@ -0,0 +1,191 @@
+"""
+Perfil de inicialização: quanto custa importar o app e cada página, medido com `python -X importtime`.
+
+Cada cenário roda em um processo novo (importação a frio, sem nada em `sys.modules`), tantas vezes
+quanto `--repeticoes`, e fica com a execução mais rápida. São reportados o tempo total de importação,
+o tempo por pacote de primeiro nível (streamlit, pandas, backend, ...) e os módulos com maior tempo
+próprio. O cenário 'app' é o que todo worker novo paga antes de desenhar a página inicial; os demais
+são o custo adicional de abrir cada página pela primeira vez.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.perfil_inicializacao                     # compara com a baseline
+    python -m benchmarks.perfil_inicializacao --top 20            # mostra os 20 módulos mais caros
+    python -m benchmarks.perfil_inicializacao --saida perfil.json # grava o relatório desta implantação
+    python -m benchmarks.perfil_inicializacao --salvar-baseline   # grava a baseline desta máquina
+
+Com uma baseline gravada, um cenário cuja importação fique mais lenta que `--tolerancia` em relação
+a ela é reportado como REGRESSÃO e o processo termina com código 1.
+"""
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_inicializacao.json")
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# O que o app importa antes de desenhar qualquer página (espelha o topo de app.py)
+IMPORTS_APP = ["streamlit", "log_config.logging_config", "backend.config"]
+
+# Cenário -> módulos importados. As páginas são medidas por cima do app já carregado.
+CENARIOS = {
+    "app": IMPORTS_APP,
+    "pagina_inicio": IMPORTS_APP + ["frontend.Pagina_inicio"],
+    "pagina_documentacao": IMPORTS_APP + ["frontend.documentacao_page"],
+    "pagina_planilhao": IMPORTS_APP + ["frontend.planilhao_page"],
+    "pagina_estrategia": IMPORTS_APP + ["frontend.estrategia_page"],
+    "pagina_grafico": IMPORTS_APP + ["frontend.grafico_page"],
+    "pagina_diagnostico": IMPORTS_APP + ["frontend.diagnostico_page"],
+}
+
+# Linha do -X importtime: "import time:  <próprio us> | <acumulado us> | <indentação><módulo>"
+_LINHA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def interpretar_importtime(saida: str) -> list:
+    """
+    Lê a saída de `-X importtime` (stderr).
+
+    Args:
+        saida (str): Texto emitido pelo interpretador.
+
+    Returns:
+        list: Um dict por módulo com 'modulo', 'proprio_ms', 'acumulado_ms' e 'nivel' (0 = importado
+            diretamente pelo cenário).
+    """
+    modulos = []
+    for linha in saida.splitlines():
+        casamento = _LINHA.match(linha)
+        if casamento:
+            proprio, acumulado, indentacao, modulo = casamento.groups()
+            modulos.append({
+                "modulo": modulo,
+                "proprio_ms": int(proprio) / 1000,
+                "acumulado_ms": int(acumulado) / 1000,
+                "nivel": (len(indentacao) - 1) // 2,
+            })
+    return modulos
+
+
+def medir_cenario(imports: list, repeticoes: int) -> list:
+    """
+    Importa os módulos em processos novos e devolve os módulos da execução mais rápida.
+
+    Args:
+        imports (list): Módulos importados pelo cenário, em ordem.
+        repeticoes (int): Número de processos; o menor tempo total é o mais próximo do custo real.
+
+    Returns:
+        list: Módulos no formato de `interpretar_importtime`.
+    """
+    ambiente = dict(os.environ)
+    ambiente.setdefault("TOKEN", "benchmark")  # O perfil não acessa a API.
+    ambiente["CACHE_DIR"] = tempfile.mkdtemp(prefix="perfil_cache_")
+    codigo = "; ".join(f"import {modulo}" for modulo in imports)
+    melhor, melhor_total = None, None
+    try:
+        for _ in range(repeticoes):
+            processo = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=RAIZ, env=ambiente,
+                                      capture_output=True, text=True)
+            if processo.returncode != 0:
+                raise RuntimeError(f"Falha ao importar {imports}: {processo.stderr.strip().splitlines()[-1:]}")
+            modulos = interpretar_importtime(processo.stderr)
+            total = sum(m["acumulado_ms"] for m in modulos if m["nivel"] == 0)
+            if melhor_total is None or total < melhor_total:
+                melhor, melhor_total = modulos, total
+    finally:
+        shutil.rmtree(ambiente["CACHE_DIR"], ignore_errors=True)
+    return melhor
+
+
+def resumir(modulos: list, top: int) -> dict:
+    """
+    Agrega os tempos de um cenário.
+
+    Args:
+        modulos (list): Módulos no formato de `interpretar_importtime`.
+        top (int): Quantos módulos com maior tempo próprio manter no relatório.
+
+    Returns:
+        dict: 'total_ms', 'modulos' (quantidade), 'por_pacote' {pacote: ms próprios} e 'mais_caros'.
+    """
+    por_pacote = defaultdict(float)
+    for m in modulos:
+        por_pacote[m["modulo"].split(".")[0]] += m["proprio_ms"]
+    mais_caros = sorted(modulos, key=lambda m: m["proprio_ms"], reverse=True)[:top]
+    return {
+        "total_ms": sum(m["acumulado_ms"] for m in modulos if m["nivel"] == 0),
+        "modulos": len(modulos),
+        "por_pacote": dict(sorted(por_pacote.items(), key=lambda item: item[1], reverse=True)),
+        "mais_caros": [{k: m[k] for k in ("modulo", "proprio_ms", "acumulado_ms")} for m in mais_caros],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=3, help="Processos por cenário (fica o mais rápido).")
+    parser.add_argument("--top", type=int, default=10, help="Módulos com maior tempo próprio exibidos por cenário.")
+    parser.add_argument("--filtro", default="", help="Roda apenas cenários cujo nome contém este texto.")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help="Arquivo JSON da baseline.")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os resultados como nova baseline.")
+    parser.add_argument("--tolerancia", type=float, default=0.3, help="Piora de tempo aceita (0.3 = +30%%).")
+    parser.add_argument("--saida", help="Grava o relatório completo desta execução neste arquivo JSON.")
+    args = parser.parse_args()
+
+    resultados = {}
+    base_app = None
+    for nome, imports in CENARIOS.items():
+        if args.filtro not in nome:
+            continue
+        resumo = resumir(medir_cenario(imports, args.repeticoes), args.top)
+        resultados[nome] = resumo
+        if nome == "app":
+            base_app = resumo["total_ms"]
+        adicional = f" (+{resumo['total_ms'] - base_app:8.1f} ms sobre o app)" if base_app and nome != "app" else ""
+        print(f"{nome:<22} {resumo['total_ms']:9.1f} ms {resumo['modulos']:5d} módulos{adicional}")
+        pacotes = ", ".join(f"{pacote} {ms:.0f}" for pacote, ms in list(resumo["por_pacote"].items())[:6])
+        print(f"    por pacote (ms): {pacotes}")
+        for m in resumo["mais_caros"]:
+            print(f"    {m['proprio_ms']:8.1f} ms próprio {m['acumulado_ms']:9.1f} ms acumulado  {m['modulo']}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump({"python": sys.version.split()[0], "cenarios": resultados}, arquivo, indent=2, sort_keys=True)
+
+    totais = {nome: {"total_ms": r["total_ms"]} for nome, r in resultados.items()}
+    if args.salvar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as arquivo:
+                baseline = json.load(arquivo)
+        baseline.update(totais)
+        with open(args.baseline, "w", encoding="utf-8") as arquivo:
+            json.dump(baseline, arquivo, indent=2, sort_keys=True)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Nenhuma baseline em {args.baseline}; rode com --salvar-baseline para criar uma.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as arquivo:
+        baseline = json.load(arquivo)
+    regressoes = []
+    for nome, atual in totais.items():
+        referencia = baseline.get(nome)
+        if referencia and atual["total_ms"] > referencia["total_ms"] * (1 + args.tolerancia):
+            regressoes.append((nome, atual["total_ms"], referencia["total_ms"]))
+    for nome, atual, referencia in regressoes:
+        print(f"REGRESSÃO {nome}: total_ms {atual:.1f} (baseline {referencia:.1f}, {atual / referencia - 1:+.0%})")
+    if regressoes:
+        return 1
+    print("Sem regressões em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import streamlit as st
+from backend.metricas import metricas
+from backend.cache_memoria import cache_memoria
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+def Pagina_diagnostico():
+    """
+    Exibe a página oculta de diagnóstico, acessível apenas pelo painel de administração.
+
+    Funcionalidades:
+        - Tabela com chamadas, erros, latências (média, p50 e p95) e linhas devolvidas de cada
+          função instrumentada de `backend.apis` e `backend.views`.
+        - Consultas aos caches (acertos e faltas), bytes economizados na API (304 e compressão) e
+          estado do cache em memória.
+        - Exportação das métricas no formato de texto do Prometheus, para download.
+        - Botão para zerar as métricas.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    logger.info("Página Diagnóstico carregada.")
+    st.title("📈 Diagnóstico")
+    st.caption("Métricas coletadas neste processo desde a última inicialização (ou desde que foram zeradas).")
+
+    resumo = metricas.resumo()
+    st.subheader("⏱️ Funções instrumentadas")
+    if resumo.empty:
+        st.info("Nenhuma chamada registrada ainda.")
+    else:
+        st.dataframe(resumo, hide_index=True, use_container_width=True)
+
+    st.subheader("🗄️ Caches")
+    contadores = metricas.instantaneo()['contadores']
+    consultas, economizados = {}, {}
+    for (nome, rotulos), valor in contadores.items():
+        if nome == "cache_consultas_total":
+            rotulos = dict(rotulos)
+            cache = consultas.setdefault(rotulos['cache'], {'acerto': 0, 'falta': 0})
+            cache[rotulos['resultado']] += valor
+        elif nome == "api_bytes_economizados_total":
+            rotulos = dict(rotulos)
+            economizados.setdefault(rotulos['endpoint'], {})[rotulos['motivo']] = int(valor)
+    st.json({'consultas': consultas, 'bytes_economizados_api': economizados, 'cache_memoria': cache_memoria.estatisticas()})
+
+    st.subheader("📤 Exportação (Prometheus)")
+    texto = metricas.exportar_prometheus()
+    st.download_button("Baixar métricas", texto, file_name="metricas.prom", mime="text/plain")
+    with st.expander("Ver texto exportado"):
+        st.code(texto, language="text")
+
+    if st.button("Zerar métricas"):
+        metricas.limpar()
+        logger.warning("Métricas zeradas pela página de diagnóstico.")
+        st.success("✅ Métricas zeradas.")
@@ -3,7 +3,9 @@ import pandas as pd
 from datetime import date
 from backend.views import carteira, validar_data
 from backend.routers import menu_estrategia
-from log_config.logging_config import logger  # Importa o logger centralizado
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
 
 def Pagina_estrategia():
     """
@@ -52,14 +54,14 @@ def Pagina_estrategia():
             options=list(indicadores_rentabilidade.keys())
         )
         indicador_rent_valor = indicadores_rentabilidade[indicador_rent]
-        logger.info(f"Indicador de rentabilidade selecionado: {indicador_rent} ({indicador_rent_valor})")
+        logger.info("Indicador de rentabilidade selecionado: %s (%s)", indicador_rent, indicador_rent_valor)
 
         indicador_desc = st.selectbox(
             "Selecione o indicador de **desconto**:",
             options=list(indicadores_desconto.keys())
         )
         indicador_desc_valor = indicadores_desconto[indicador_desc]
-        logger.info(f"Indicador de desconto selecionado: {indicador_desc} ({indicador_desc_valor})")
+        logger.info("Indicador de desconto selecionado: %s (%s)", indicador_desc, indicador_desc_valor)
 
         # Input de data e quantidade de ações
         st.markdown("### 🗓️ Selecione o Período e Quantidade de Ações")
@@ -68,7 +70,7 @@ def Pagina_estrategia():
             "Quantas ações você deseja analisar?",
             min_value=1, max_value=3000, value=10
         )
-        logger.info(f"Data selecionada: {data}. Quantidade de ações: {num}")
+        logger.info("Data selecionada: %s. Quantidade de ações: %s", data, num)
 
         # Validação da data
         validar_data(data)
@@ -84,7 +86,8 @@ def Pagina_estrategia():
                 st.session_state.acoes_carteira = acoes_carteira
                 st.session_state.df_sorted = df_sorted
                 st.session_state.estrategia_preenchida = True
-                logger.info(f"Carteira gerada com sucesso. Ações selecionadas: {acoes_carteira}")
+                logger.info("Carteira gerada com sucesso. Ações selecionadas: %s", len(acoes_carteira))
+                logger.debug("Ações da carteira: %s", acoes_carteira)
 
                 # Exibição dos resultados
                 st.markdown("### 📊 Resultados da Análise")
@@ -95,8 +98,8 @@ def Pagina_estrategia():
                 st.dataframe(df_sorted)
                 st.success("✅ Estratégia gerada com sucesso!")
             except Exception as e:
-                logger.error(f"Erro ao gerar estratégia: {e}")
+                logger.error("Erro ao gerar estratégia: %s", e)
                 st.error("❌ Ocorreu um erro ao gerar a estratégia. Por favor, tente novamente.")
     except Exception as e:
-        logger.error(f"Erro na página Estratégia: {e}")
+        logger.error("Erro na página Estratégia: %s", e)
         st.error("❌ Ocorreu um erro inesperado. Verifique os logs ou entre em contato com o suporte.")
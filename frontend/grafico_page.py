@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-from backend.views import pegar_df_preco_corrigido, pegar_df_preco_diversos, validar_data
+from backend.views import pegar_df_preco_corrigido, pegar_df_preco_diversos, pegar_retornos, validar_data
 from backend.routers import Comparacao_graficos
-from log_config.logging_config import logger  # Importa o logger centralizado
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
 
 def Pagina_grafico(restrict_access=False):
     """
@@ -58,7 +60,7 @@ def Pagina_grafico(restrict_access=False):
         try:
             validar_data(data_ini)
             validar_data(data_fim)
-            logger.info(f"Período selecionado: {data_ini} - {data_fim}")
+            logger.info("Período selecionado: %s - %s", data_ini, data_fim)
 
             if data_ini > data_fim:
                 logger.warning("Data de fim é anterior à data de início.")
@@ -67,15 +69,37 @@ def Pagina_grafico(restrict_access=False):
 
             if st.button("Gerar Gráficos"):
                 try:
-                    df_carteira = pegar_df_preco_corrigido(data_ini, data_fim, acoes_carteira)
-                    df_ibov = pegar_df_preco_diversos(data_ini, data_fim)
+                    # Guarda os dados na sessão para que o zoom redesenhe o gráfico sem buscar de novo.
+                    st.session_state.graficos = {
+                        "periodo": (data_ini, data_fim),
+                        "acoes": list(acoes_carteira),
+                        "df_carteira": pegar_df_preco_corrigido(data_ini, data_fim, acoes_carteira),
+                        "df_ibov": pegar_df_preco_diversos(data_ini, data_fim),
+                        "df_retornos": pegar_retornos(data_ini, data_fim, acoes_carteira),
+                    }
                     logger.info("Gráficos gerados com sucesso.")
-                    st.subheader("📊 Comparativo: Retorno Acumulado Carteira x IBOVESPA")
-                    Comparacao_graficos(df_carteira, df_ibov)
                     st.success("✅ Gráficos gerados com sucesso!")
                 except Exception as e:
-                    logger.error(f"Erro ao gerar gráficos: {e}")
+                    logger.error("Erro ao gerar gráficos: %s", e)
                     st.error(f"❌ Erro ao gerar gráficos: {e}")
+
+            graficos = st.session_state.get("graficos")
+            if graficos and graficos["periodo"] == (data_ini, data_fim) and graficos["acoes"] == list(acoes_carteira):
+                try:
+                    st.subheader("📊 Comparativo: Retorno Acumulado Carteira x IBOVESPA")
+                    janela = (data_ini, data_fim)
+                    if data_ini < data_fim:
+                        # Trechos curtos são exibidos em resolução total; o período inteiro é reduzido.
+                        janela = st.slider(
+                            "🔎 Janela de zoom:",
+                            min_value=data_ini, max_value=data_fim, value=(data_ini, data_fim),
+                            format="DD/MM/YYYY", key="janela_zoom"
+                        )
+                    Comparacao_graficos(graficos["df_carteira"], graficos["df_ibov"],
+                                        None if janela == (data_ini, data_fim) else janela, graficos["df_retornos"])
+                except Exception as e:
+                    logger.error("Erro ao exibir gráficos: %s", e)
+                    st.error(f"❌ Erro ao exibir gráficos: {e}")
         except Exception as e:
-            logger.error(f"Erro ao processar as datas: {e}")
+            logger.error("Erro ao processar as datas: %s", e)
             st.error(f"❌ Erro ao processar as datas: {e}")
@@ -1,7 +1,12 @@
 import streamlit as st
-from backend.routers import menu_planilhao
+from backend.routers import menu_planilhao_opcoes, menu_planilhao_pagina
 from backend.views import validar_data
-from log_config.logging_config import logger  # Importa o logger centralizado
+from log_config.logging_config import obter_logger  # Importa a configuração centralizada de logs
+
+logger = obter_logger(__name__)  # Logger do módulo (nível ajustável em LOG_NIVEIS)
+
+# Linhas por página oferecidas na tabela
+TAMANHOS_PAGINA = [25, 50, 100, 250]
 
 def Pagina_planilhao():
     """
@@ -12,7 +17,9 @@ def Pagina_planilhao():
         - Entrada de data base para análise.
         - Validação da data selecionada pelo usuário.
         - Busca de dados de mercado com base na data fornecida.
-        - Exibição dos resultados em formato de tabela, caso existam dados.
+        - Filtros por setor, prefixo do ticker e faixa de um indicador, escolha de colunas e ordenação,
+          aplicados no servidor.
+        - Exibição paginada dos resultados: apenas as linhas da página são enviadas ao navegador.
         - Tratamento de erros e mensagens para guiar o usuário.
 
     Args:
@@ -35,30 +42,81 @@ def Pagina_planilhao():
         # Entrada de data
         st.markdown("### 🗓️ Selecione a Data de Análise")
         data_base = st.date_input("Escolha uma data base para buscar os dados:")
-        logger.info(f"Data selecionada: {data_base}")
+        logger.info("Data selecionada: %s", data_base)
 
         # Validação da data
         validar_data(data_base)
 
-        # Ação ao clicar no botão "Buscar"
+        # Ação ao clicar no botão "Buscar": a data fica na sessão para que filtros e páginas funcionem depois.
         if st.button("Buscar Dados"):
-            logger.info(f"Usuário clicou em 'Buscar' para a data: {data_base}")
-            try:
-                # Consulta os dados
-                df = menu_planilhao(data_base)
-                if not df.empty:
-                    # Exibe o DataFrame no Streamlit
-                    st.markdown("### 📊 Resultados da Análise")
-                    st.dataframe(df, height=600, use_container_width=True)
-                    st.success(f"✅ Dados encontrados! Total de {len(df)} registros exibidos.")
-                    logger.info(f"Dados encontrados: {len(df)} linhas exibidas.")
-                else:
-                    # Caso nenhum dado seja encontrado
-                    st.warning("⚠️ Nenhum dado foi encontrado para a data selecionada. Tente outra data!")
-                    logger.warning(f"Nenhum dado encontrado para a data: {data_base}")
-            except Exception as e:
-                logger.error(f"Erro ao buscar dados do Planilhão para a data: {data_base} | {e}")
-                st.error("❌ Ocorreu um erro ao buscar os dados. Por favor, tente novamente.")
+            logger.info("Usuário clicou em 'Buscar' para a data: %s", data_base)
+            st.session_state['planilhao_data'] = data_base
+        data_consulta = st.session_state.get('planilhao_data')
+        if data_consulta is None:
+            return
+        try:
+            opcoes = menu_planilhao_opcoes(data_consulta)
+        except ValueError:
+            # Caso nenhum dado seja encontrado
+            st.warning("⚠️ Nenhum dado foi encontrado para a data selecionada. Tente outra data!")
+            logger.warning("Nenhum dado encontrado para a data: %s", data_consulta)
+            return
+        except Exception as e:
+            logger.error("Erro ao buscar dados do Planilhão para a data: %s | %s", data_consulta, e)
+            st.error("❌ Ocorreu um erro ao buscar os dados. Por favor, tente novamente.")
+            return
+
+        # Filtros, colunas e ordenação (aplicados no servidor)
+        st.markdown(f"### 🔎 Filtros ({data_consulta:%d/%m/%Y})")
+        col1, col2 = st.columns(2)
+        setores = col1.multiselect("Setores:", options=opcoes['setores'])
+        prefixo = col2.text_input("Ticker começa com:", max_chars=6)
+        col1, col2, col3 = st.columns(3)
+        indicador = col1.selectbox("Faixa do indicador:", options=["(nenhum)", *opcoes['numericas']])
+        minimo = col2.number_input("Mínimo:", value=None, format="%.4f", disabled=indicador == "(nenhum)")
+        maximo = col3.number_input("Máximo:", value=None, format="%.4f", disabled=indicador == "(nenhum)")
+        faixas = {indicador: (minimo, maximo)} if indicador != "(nenhum)" else None
+        colunas = st.multiselect("Colunas exibidas:", options=opcoes['colunas'], default=opcoes['colunas'])
+        col1, col2, col3, col4 = st.columns(4)
+        ordenar_por = col1.selectbox("Ordenar por:", options=["(planilhão)", *opcoes['colunas']])
+        ascendente = col2.radio("Ordem:", options=["Crescente", "Decrescente"], horizontal=True) == "Crescente"
+        tamanho_pagina = col3.selectbox("Linhas por página:", options=TAMANHOS_PAGINA, index=1)
+        # Filtros, ordenação ou tamanho de página novos mudam as linhas: a paginação volta para a primeira página.
+        filtros = (data_consulta, tuple(setores), prefixo, indicador, minimo, maximo, ordenar_por, ascendente, tamanho_pagina)
+        if st.session_state.get('planilhao_filtros') != filtros:
+            st.session_state['planilhao_filtros'] = filtros
+            st.session_state['planilhao_pagina'] = 1
+        elif 'planilhao_pagina_ajustada' in st.session_state:
+            # Página além do fim, limitada pelo backend na execução anterior: o campo mostra a página exibida.
+            st.session_state['planilhao_pagina'] = st.session_state.pop('planilhao_pagina_ajustada')
+        pagina = col4.number_input("Página:", min_value=1, step=1, key='planilhao_pagina')
+
+        try:
+            df, total, pagina = menu_planilhao_pagina(
+                data_consulta, colunas=colunas, setores=setores, prefixo=prefixo, faixas=faixas,
+                ordenar_por=None if ordenar_por == "(planilhão)" else ordenar_por, ascendente=ascendente,
+                pagina=pagina, tamanho_pagina=tamanho_pagina,
+            )
+        except Exception as e:
+            logger.error("Erro ao consultar página do Planilhão para a data: %s | %s", data_consulta, e)
+            st.error("❌ Ocorreu um erro ao buscar os dados. Por favor, tente novamente.")
+            return
+        if pagina != st.session_state['planilhao_pagina']:
+            # O valor de um widget só pode ser trocado antes de ele ser criado: ajusta e executa de novo.
+            st.session_state['planilhao_pagina_ajustada'] = pagina
+            st.rerun()
+
+        if total:
+            # Exibe apenas a página no Streamlit
+            st.markdown("### 📊 Resultados da Análise")
+            st.dataframe(df, hide_index=True, use_container_width=True)
+            inicio = (pagina - 1) * tamanho_pagina
+            st.success(f"✅ Dados encontrados! Exibindo {inicio + 1}–{inicio + len(df)} de {total} registros "
+                       f"(página {pagina} de {-(-total // tamanho_pagina)}).")
+            logger.info("Dados encontrados: %s linhas exibidas de %s.", len(df), total)
+        else:
+            st.info("Nenhum registro atende aos filtros escolhidos.")
+            logger.info("Nenhum registro atende aos filtros para a data: %s", data_consulta)
     except Exception as e:
-        logger.error(f"Erro na página Planilhão: {e}")
+        logger.error("Erro na página Planilhão: %s", e)
         st.error("❌ Ocorreu um erro inesperado. Verifique os logs ou entre em contato com o suporte.")
@@ -1,17 +1,179 @@
-import logging
 import os
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from backend.config import (
+    LOG_DIR,
+    LOG_NIVEL,
+    LOG_NIVEIS,
+    LOG_FORMATO,
+    LOG_ROTACAO,
+    LOG_MAX_MB,
+    LOG_ARQUIVOS,
+)
 
-# Diretório para armazenar os logs
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
+# Arquivo de log principal (os arquivos rotacionados ganham sufixo .1, .2, ... ou a data)
+ARQUIVO_LOG = os.path.join(LOG_DIR, "app.log")
 
-# Configuração do logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    filename=f"{LOG_DIR}/app.log",
-    filemode="a"
-)
+# Atributos próprios de todo LogRecord; os demais vêm de `extra=` e vão para o JSON como campos
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class FormatadorJSON(logging.Formatter):
+    """
+    Formata cada registro como uma linha JSON: horário (UTC, ISO 8601), nível, logger, mensagem,
+    origem (módulo, função, linha), thread e os campos passados em `extra=`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        registro = {
+            "horario": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            "modulo": record.module,
+            "funcao": record.funcName,
+            "linha": record.lineno,
+            "thread": record.threadName,
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO and not chave.startswith("_"):
+                registro[chave] = valor
+        if record.exc_info or record.exc_text:
+            registro["excecao"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+
+class ManipuladorFila(logging.handlers.QueueHandler):
+    """
+    Coloca os registros em uma fila sem formatá-los: a mensagem só é montada (`%` com os argumentos)
+    pela thread que escreve o arquivo, fora da thread que fez o log.
+
+    Os argumentos são guardados por referência; objetos alterados logo após o log podem aparecer
+    já alterados na mensagem.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            # O traceback é formatado aqui, enquanto os frames da exceção ainda existem.
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+class _FormatadorTexto(logging.Formatter):
+    """Formato de texto tradicional, mantido para quem prefere ler o arquivo diretamente."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+def _criar_manipulador_arquivo(arquivo: str = ARQUIVO_LOG) -> logging.Handler:
+    """
+    Cria o manipulador do arquivo de log com rotação por tamanho ou diária.
+
+    Args:
+        arquivo (str, opcional): Caminho do arquivo de log. Padrão: ARQUIVO_LOG.
+
+    Returns:
+        logging.Handler: Manipulador configurado com o formato escolhido em LOG_FORMATO.
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    if LOG_ROTACAO == "diaria":
+        manipulador = logging.handlers.TimedRotatingFileHandler(
+            arquivo, when="midnight", backupCount=LOG_ARQUIVOS, encoding="utf-8"
+        )
+    else:
+        manipulador = logging.handlers.RotatingFileHandler(
+            arquivo, maxBytes=int(LOG_MAX_MB * 1024 * 1024), backupCount=LOG_ARQUIVOS, encoding="utf-8"
+        )
+    manipulador.setFormatter(FormatadorJSON() if LOG_FORMATO == "json" else _FormatadorTexto())
+    return manipulador
+
+
+def _aplicar_niveis(niveis: str):
+    """
+    Aplica os níveis por módulo no formato "modulo=NIVEL,outro.modulo=NIVEL".
+
+    Args:
+        niveis (str): Lista de pares separados por vírgula; pares inválidos são ignorados.
+    """
+    for par in filter(None, (p.strip() for p in niveis.split(","))):
+        nome, _, nivel = par.partition("=")
+        if nome.strip() and isinstance(logging.getLevelName(nivel.strip().upper()), int):
+            logging.getLogger(nome.strip()).setLevel(nivel.strip().upper())
+
+
+def configurar_logs(arquivo: str = ARQUIVO_LOG) -> logging.handlers.QueueListener:
+    """
+    Configura o pipeline de logs do processo (uma única vez, mesmo com várias importações).
+
+    O logger raiz recebe apenas um `ManipuladorFila`: registrar um log custa colocar o registro em uma
+    fila. Uma thread em segundo plano (`QueueListener`) formata e grava os registros no arquivo com
+    rotação. Na saída do processo a fila é esvaziada antes de encerrar.
+
+    Args:
+        arquivo (str, opcional): Caminho do arquivo de log. Padrão: ARQUIVO_LOG.
+
+    Returns:
+        logging.handlers.QueueListener: Thread escritora em execução.
+    """
+    raiz = logging.getLogger()
+    for manipulador in raiz.handlers:
+        if isinstance(manipulador, ManipuladorFila):
+            return manipulador.listener
+
+    fila = queue.SimpleQueue()
+    manipulador = ManipuladorFila(fila)
+    manipulador.listener = logging.handlers.QueueListener(fila, _criar_manipulador_arquivo(arquivo), respect_handler_level=True)
+    raiz.addHandler(manipulador)
+    raiz.setLevel(LOG_NIVEL.upper())
+    _aplicar_niveis(LOG_NIVEIS)
+    manipulador.listener.start()
+    atexit.register(_encerrar, manipulador.listener)
+    return manipulador.listener
+
+
+def _encerrar(listener: logging.handlers.QueueListener):
+    """Esvazia a fila e encerra a thread escritora (na saída do processo)."""
+    try:
+        listener.stop()
+    except AttributeError:
+        pass  # Já encerrada.
+
+
+def _reconfigurar_no_filho():
+    """
+    Em um processo criado por fork, a thread escritora do pai não existe: o manipulador herdado é trocado
+    por um novo, com sua própria fila e thread, que grava em um arquivo só do filho (app.<pid>.log).
+    Processos diferentes nunca rotacionam o mesmo arquivo, o que poderia perder ou embaralhar registros.
+    """
+    raiz = logging.getLogger()
+    for manipulador in list(raiz.handlers):
+        if isinstance(manipulador, ManipuladorFila):
+            raiz.removeHandler(manipulador)
+    base, extensao = os.path.splitext(ARQUIVO_LOG)
+    configurar_logs(f"{base}.{os.getpid()}{extensao}")
+
+
+def obter_logger(nome: str) -> logging.Logger:
+    """
+    Retorna o logger de um módulo, garantindo que o pipeline de logs esteja configurado.
+
+    Args:
+        nome (str): Nome do logger, normalmente `__name__` (o nível pode ser ajustado em LOG_NIVEIS).
+
+    Returns:
+        logging.Logger: Logger do módulo.
+    """
+    configurar_logs()
+    return logging.getLogger(nome)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reconfigurar_no_filho)
 
-# Logger exportado
-logger = logging.getLogger(__name__)
+# Logger exportado (código que ainda não usa um logger por módulo)
+logger = obter_logger(__name__)
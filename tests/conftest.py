@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Os testes importam o pacote a partir da raiz do repositório e usam um cache descartável.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="testes_cache_"))
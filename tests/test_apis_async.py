@@ -0,0 +1,41 @@
+import asyncio
+
+from aiohttp import web
+
+from backend import apis_async
+from backend.metricas import PREFIXO, metricas
+from tests.test_metricas import _amostras
+
+
+async def _consultar_servidor_local():
+    """Sobe um servidor local com o endpoint de preço corrigido e consulta-o pelo cliente assíncrono."""
+    async def preco_corrigido(_):
+        return web.json_response([{"data": "2024-01-02", "fechamento": 10.5}])
+
+    app = web.Application()
+    app.router.add_get("/preco-corrigido", preco_corrigido)
+    executor = web.AppRunner(app)
+    await executor.setup()
+    site = web.TCPSite(executor, "127.0.0.1", 0)
+    await site.start()
+    porta = site._server.sockets[0].getsockname()[1]
+    try:
+        cliente = apis_async.ClienteAPIAsync(base_url=f"http://127.0.0.1:{porta}", headers={}, modo="rede")
+        return await apis_async.get_preco_corrigido("PETR4", "2024-01-01", "2024-01-05", cliente_api=cliente)
+    finally:
+        await executor.cleanup()
+
+
+def test_consulta_assincrona_registra_metricas_da_api():
+    antes = _amostras(metricas.exportar_prometheus())
+
+    dados = asyncio.run(_consultar_servidor_local())
+
+    depois = _amostras(metricas.exportar_prometheus())
+    assert dados == [{"data": "2024-01-02", "fechamento": 10.5}]
+    for serie in (
+        f'{PREFIXO}funcao_chamadas_total{{funcao="apis_async.get_preco_corrigido",resultado="ok"}}',
+        f'{PREFIXO}api_respostas_total{{endpoint="preco-corrigido",status="200"}}',
+        f'{PREFIXO}api_requisicao_segundos_count{{endpoint="preco-corrigido"}}',
+    ):
+        assert depois[serie] == antes.get(serie, 0) + 1
@@ -0,0 +1,38 @@
+import threading
+import pandas as pd
+from backend.controle_fluxo import ChamadaUnica
+
+
+def test_chamadas_agrupadas_recebem_copias():
+    chamada = ChamadaUnica()
+    liberar, iniciou = threading.Event(), threading.Event()
+    execucoes = []
+
+    def funcao():
+        execucoes.append(1)
+        iniciou.set()
+        liberar.wait(5)
+        return pd.DataFrame({"a": [1, 2]})
+
+    resultados = [None] * 4
+
+    def chamar(posicao):
+        resultados[posicao] = chamada.executar("chave", funcao, lambda df: df.copy())
+
+    lider = threading.Thread(target=chamar, args=(0,))
+    lider.start()
+    iniciou.wait(5)
+    agrupadas = [threading.Thread(target=chamar, args=(i,)) for i in range(1, 4)]
+    for thread in agrupadas:
+        thread.start()
+    while chamada.agrupadas < 3:
+        threading.Event().wait(0.01)
+    liberar.set()
+    for thread in [lider, *agrupadas]:
+        thread.join(5)
+
+    assert len(execucoes) == 1
+    assert len({id(df) for df in resultados}) == 4
+    resultados[1]["a"] = 0
+    assert resultados[0]["a"].tolist() == [1, 2]
+    assert resultados[2]["a"].tolist() == [1, 2]
@@ -0,0 +1,91 @@
+import json
+import math
+import pytest
+from backend.leitor_json import TAMANHO_LOTE, ler_tabela_json
+
+
+def _em_blocos(texto: str, tamanho: int):
+    """Divide o JSON em blocos de bytes de `tamanho`, que podem cortar caracteres UTF-8 ao meio."""
+    corpo = texto.encode("utf-8")
+    return [corpo[i:i + tamanho] for i in range(0, len(corpo), tamanho)]
+
+
+def _ausente(valor) -> bool:
+    return valor is None or (isinstance(valor, float) and math.isnan(valor))
+
+
+def _conferir(texto: str, tamanho: int, chave: str = "dados", colunas=None):
+    """Compara a leitura em streaming, registro a registro, com o `json.loads` do documento inteiro."""
+    registros = json.loads(texto).get(chave, [])
+    df = ler_tabela_json(_em_blocos(texto, tamanho), chave, colunas)
+
+    esperadas = list(dict.fromkeys(c for r in registros for c in r if colunas is None or c in colunas))
+    assert list(df.columns) == esperadas
+    assert len(df) == len(registros)
+    for linha, registro in zip(df.to_dict(orient="records"), registros):
+        for coluna in esperadas:
+            lido, original = linha[coluna], registro.get(coluna)
+            if _ausente(original):
+                assert _ausente(lido)
+            else:
+                assert lido == original
+
+
+PAYLOAD = {
+    "status": "ok",
+    "meta": {"fonte": ["a", {"b": [1, 2]}], "vazio": {}},
+    "dados": [
+        {"ticker": "PETR4", "roe": 0.12, "volume": 10, "lista": [1, 2], "setor": "Petróleo e Gás"},
+        {"ticker": "VALE3", "roe": None, "volume": 20, "lista": [3, 4], "setor": "Mineração ☕"},
+        {"ticker": "WEGE3", "roe": 3, "volume": None, "lista": [5, 6], "extra": {"x": [1, None]}},
+        {"ticker": "ÇÃÕ11", "roe": -1.5e-3, "volume": 30, "lista": [7, 8], "misto": 1},
+        {"ticker": "ITUB4", "roe": 1e300, "volume": 40, "lista": [9, 10], "misto": "texto 😀", "setor": None},
+    ],
+    "depois": [1, 2, 3],
+}
+
+
+@pytest.mark.parametrize("tamanho", [1, 2, 3, 5, 7, 64, 1 << 16])
+def test_igual_ao_json_loads_com_blocos_de_qualquer_tamanho(tamanho):
+    _conferir(json.dumps(PAYLOAD, ensure_ascii=False), tamanho)
+
+
+def test_listas_do_mesmo_tamanho_viram_uma_coluna_de_objetos():
+    df = ler_tabela_json(_em_blocos('{"dados":[{"nest":[1,2]},{"nest":[3,4]}]}', 4))
+    assert df["nest"].tolist() == [[1, 2], [3, 4]]
+
+
+def test_tipos_das_colunas():
+    df = ler_tabela_json(_em_blocos(json.dumps(PAYLOAD, ensure_ascii=False), 7))
+    assert df["volume"].dtype == "float64"  # Inteiros com ausentes.
+    assert df["roe"].dtype == "float64"
+    assert df["misto"].dtype == object
+    assert df["misto"].tolist()[3:] == [1, "texto 😀"]
+
+
+def test_coluna_inteira_sem_ausentes_fica_int64():
+    texto = json.dumps({"dados": [{"n": i} for i in range(TAMANHO_LOTE * 2 + 3)]})
+    df = ler_tabela_json(_em_blocos(texto, 100))
+    assert df["n"].dtype == "int64"
+    assert df["n"].tolist() == list(range(TAMANHO_LOTE * 2 + 3))
+
+
+def test_mudanca_de_tipo_depois_do_primeiro_lote():
+    registros = [{"v": i} for i in range(TAMANHO_LOTE + 1)] + [{"v": None}, {"v": "fim"}]
+    _conferir(json.dumps({"dados": registros}), 33)
+
+
+def test_projecao_de_colunas():
+    texto = json.dumps(PAYLOAD, ensure_ascii=False)
+    _conferir(texto, 5, colunas=["ticker", "misto", "inexistente"])
+
+
+@pytest.mark.parametrize("texto", ['{}', '{"dados": []}', '{"outro": [1]}'])
+def test_sem_registros(texto):
+    assert ler_tabela_json(_em_blocos(texto, 3)).empty
+
+
+@pytest.mark.parametrize("texto", ['{"dados": [1, 2]}', '{"dados": [{"a": 1}', '[{"a": 1}]'])
+def test_json_invalido(texto):
+    with pytest.raises(json.JSONDecodeError):
+        ler_tabela_json(_em_blocos(texto, 4))
@@ -0,0 +1,33 @@
+from backend.metricas import PREFIXO, RegistroMetricas
+
+
+def _amostras(texto: str) -> dict:
+    """Lê as amostras de uma exportação Prometheus como {nome com rótulos: valor}."""
+    amostras = {}
+    for linha in texto.splitlines():
+        if linha and not linha.startswith("#"):
+            nome, _, valor = linha.rpartition(" ")
+            amostras[nome] = float(valor)
+    return amostras
+
+
+def test_contador_grande_exportado_sem_perder_digitos():
+    registro = RegistroMetricas()
+    registro.incrementar("api_resposta_bytes_total", 1234567, endpoint="planilhao")
+    registro.incrementar("cache_consultas_total", 123456789012)
+
+    amostras = _amostras(registro.exportar_prometheus())
+
+    assert amostras[f'{PREFIXO}api_resposta_bytes_total{{endpoint="planilhao"}}'] == 1234567
+    assert amostras[f"{PREFIXO}cache_consultas_total"] == 123456789012
+
+
+def test_soma_do_histograma_exportada_sem_perder_digitos():
+    registro = RegistroMetricas()
+    for valor in (1000000.125, 234567.5, 0.1):
+        registro.observar("api_requisicao_segundos", valor)
+
+    amostras = _amostras(registro.exportar_prometheus())
+
+    assert amostras[f"{PREFIXO}api_requisicao_segundos_sum"] == 1000000.125 + 234567.5 + 0.1
+    assert amostras[f"{PREFIXO}api_requisicao_segundos_count"] == 3